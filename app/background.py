@@ -0,0 +1,57 @@
+import logging
+from threading import Thread, Event
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Runs a function every `interval` seconds on a daemon thread"""
+
+    def __init__(self, name: str, interval: float, func: Callable[[], None], run_immediately: bool = True):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.run_immediately = run_immediately
+        self._stop = Event()
+        self._wake = Event()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        """Stop the worker thread after the current run"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def after_fork(self):
+        """Drop the parent's thread and events in a forked child (start() runs it here)"""
+        self._stop = Event()
+        self._wake = Event()
+        self._thread = None
+
+    def trigger(self):
+        """Run as soon as possible instead of waiting for the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        if not self.run_immediately:
+            self._wait()
+        while not self._stop.is_set():
+            try:
+                self.func()
+            except Exception:
+                logger.exception('Background task %s failed', self.name)
+            self._wait()
+
+    def _wait(self):
+        self._wake.wait(self.interval)
+        self._wake.clear()
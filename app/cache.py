@@ -0,0 +1,160 @@
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.lookups import like_to_regex
+
+
+class _Flight:
+    """A load in progress that concurrent identical misses wait on"""
+
+    def __init__(self):
+        self.done = Event()
+        self.rows = None
+        self.error = None
+
+
+class SearchCache:
+    """Bounded LRU cache with TTL for typeahead search results
+
+    Entries are keyed on (namespace, lowercased LIKE pattern); the namespace
+    names the endpoint and searched column. Concurrent misses for the same
+    key share one load. A result with fewer than `limit` rows is complete,
+    so a narrower pattern that extends it (e.g. '%ab%' -> '%abc%') is
+    answered by filtering those rows locally.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 30, limit: int = 50):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.limit = limit
+        self._lock = Lock()
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], _Flight] = {}
+        # Bumped by invalidate() so loads started before it are not stored
+        self._generation = 0
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Tuple[str, str], now: float) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Tuple[str, str], expires: float, rows: List[Dict[str, Any]]):
+        self._entries[key] = (expires, rows)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _narrow(self, namespace: str, pattern: str, column: str,
+                now: float) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """Filter a cached complete result for a broader pattern, if there is one"""
+        regex = None
+        # Every string matching X + Y also matches X + '%' (X must not end
+        # inside a [...] class)
+        for end in range(len(pattern) - 1, -1, -1):
+            if pattern.rfind('[', 0, end) > pattern.rfind(']', 0, end):
+                continue
+            entry = self._lookup((namespace, pattern[:end] + '%'), now)
+            if entry is None or len(entry[1]) >= self.limit:
+                continue
+            if regex is None:
+                regex = like_to_regex(pattern)
+                if regex is None:
+                    return None
+            rows = [row for row in entry[1]
+                    if row.get(column) is not None and regex.fullmatch(row[column])]
+            return entry[0], rows
+        return None
+
+    def get_or_load(self, namespace: str, pattern: str, column: str,
+                    loader: Callable[[], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Return cached rows for a LIKE pattern, calling loader() on a miss
+
+        `column` is the field the pattern is matched against, used when
+        narrowing a broader cached result.
+        """
+        key = (namespace, pattern.lower())
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._lookup(key, now)
+            if entry is not None:
+                self.hits += 1
+                return list(entry[1])
+
+            entry = self._narrow(namespace, key[1], column, now)
+            if entry is not None:
+                self.narrowed += 1
+                # Keep the broader entry's expiry so narrowing never extends staleness
+                self._store(key, *entry)
+                return list(entry[1])
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return list(flight.rows)
+
+        try:
+            rows = list(loader())
+            flight.rows = rows
+            with self._lock:
+                if generation == self._generation:
+                    self._store(key, time.monotonic() + self.ttl, rows)
+            return list(rows)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, namespace_prefix: str = ''):
+        """Drop entries whose namespace starts with the prefix (all by default)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0].startswith(namespace_prefix)]:
+                del self._entries[key]
+            self._generation += 1
+
+    def after_fork(self):
+        """Replace the lock inherited from the parent process (and its in-flight loads)"""
+        self._lock = Lock()
+        self._inflight = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.narrowed + self.misses + self.coalesced
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'narrowed': self.narrowed,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'hit_ratio': round((lookups - self.misses) / lookups, 4) if lookups else None
+            }
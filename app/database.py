@@ -1,10 +1,24 @@
+import atexit
+import base64
+import json
+import os
 import sqlite3
+import time
 import pymssql
+from collections import deque
 from contextlib import contextmanager
-from threading import Lock
-from typing import Optional, Dict, Any, List, Tuple
-from datetime import datetime
+from threading import Lock, Condition
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator, Callable
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+from app.background import PeriodicTask
+from app.cache import SearchCache
+from app.history_rollups import HistoryRollupStore, OPERATION_COLUMNS, parse_day
+from app.history_writer import HistoryWriter, HISTORY_COLUMNS
+from app.metrics import Metrics, InstrumentedConnection
+from app.profiling import SlowQueryLog
+from app.replica import InventoryReplica
+from app.lookups import ProductSearchIndex, BinDirectory, UnusedBinSet, PRODUCT_SEARCH_FIELDS
 
 
 class SQLiteManager:
@@ -13,6 +27,8 @@ class SQLiteManager:
     def __init__(self, db_path: str = '/app/data/config.db'):
         self.db_path = db_path
         self.lock = Lock()
+        # (file version, config) pair, swapped as a whole so readers never see a mix
+        self._config_cache = None
         self._init_db()
 
     def _init_db(self):
@@ -58,51 +74,605 @@ class SQLiteManager:
                     config['password']
                 ))
                 conn.commit()
+                self._config_cache = None
                 return True
 
+    def _file_version(self) -> Optional[Tuple[int, int]]:
+        """Cheap change marker for the database file (shared across worker processes)"""
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
     def get_config(self) -> Optional[Dict[str, Any]]:
-        """Get MSSQL connection configuration"""
+        """Get MSSQL connection configuration (cached until the database file changes)"""
+        version = self._file_version()
+        cached = self._config_cache
+        if cached is not None and version is not None and cached[0] == version:
+            config = cached[1]
+            return dict(config) if config else None
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT * FROM config WHERE id = 1')
             row = cursor.fetchone()
+            config = None
             if row:
-                return {
+                config = {
                     'server': row['server'],
                     'port': row['port'],
                     'database': row['database'],
                     'username': row['username'],
                     'password': row['password']
                 }
-            return None
+
+        self._config_cache = (version, config)
+        return dict(config) if config else None
+
+
+class PooledConnection:
+    """A pymssql connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class MSSQLConnectionPool:
+    """Thread-safe, bounded pool of reusable pymssql connections
+
+    `connect` opens a connection from connect_kwargs; anything with
+    pymssql.connect's signature and connection interface can stand in.
+    """
+
+    def __init__(self,
+                 connect_kwargs: Dict[str, Any],
+                 max_size: int = 10,
+                 max_lifetime: float = 1800,
+                 max_idle: float = 300,
+                 health_check_after: float = 30,
+                 checkout_timeout: float = 30,
+                 connect: Callable[..., Any] = pymssql.connect):
+        self.connect_kwargs = connect_kwargs
+        self.connect = connect
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+
+        self._cond = Condition(Lock())
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        # Counters for pool sizing
+        self._created = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+
+    def _is_expired(self, pooled: PooledConnection, now: float) -> bool:
+        """Check whether a connection has outlived its lifetime or idle window"""
+        return (now - pooled.created_at > self.max_lifetime or
+                now - pooled.last_used > self.max_idle)
+
+    def _evict_expired(self) -> List[PooledConnection]:
+        """Remove expired idle connections (caller holds the lock)"""
+        now = time.monotonic()
+        expired = [p for p in self._idle if self._is_expired(p, now)]
+        if expired:
+            self._idle = deque(p for p in self._idle if not self._is_expired(p, now))
+            self._size -= len(expired)
+            self._discarded += len(expired)
+        return expired
+
+    def _close_quietly(self, pooled: PooledConnection):
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+
+    def _connect(self) -> PooledConnection:
+        pooled = PooledConnection(self.connect(**self.connect_kwargs))
+        with self._cond:
+            self._created += 1
+        return pooled
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        """Ping connections that have been idle long enough to have gone stale"""
+        if time.monotonic() - pooled.last_used < self.health_check_after:
+            return True
+        try:
+            cursor = pooled.conn.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection, waiting for a free slot if the pool is full"""
+        started = time.monotonic()
+        waited = False
+        expired = []
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise Exception("Connection pool is closed")
+                expired.extend(self._evict_expired())
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    pooled = None
+                    self._size += 1
+                    break
+                remaining = self.checkout_timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise Exception("Timed out waiting for a database connection")
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                self._wait_time += time.monotonic() - started
+
+        for stale in expired:
+            self._close_quietly(stale)
+
+        try:
+            if pooled is not None and not self._is_healthy(pooled):
+                self._close_quietly(pooled)
+                with self._cond:
+                    self._discarded += 1
+                pooled = None
+            if pooled is None:
+                pooled = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return pooled
+
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        """Return a connection to the pool, or close it if it is no longer usable"""
+        pooled.last_used = time.monotonic()
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed or self._is_expired(pooled, pooled.last_used):
+                self._size -= 1
+                self._discarded += 1
+                close = True
+            else:
+                self._idle.append(pooled)
+                close = False
+            self._cond.notify()
+        if close:
+            self._close_quietly(pooled)
+
+    def close(self):
+        """Close idle connections; checked-out ones are closed on release"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage counters"""
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'created': self._created,
+                'discarded': self._discarded,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_seconds': round(self._wait_time, 6),
+                'timeouts': self._timeouts
+            }
+
+
+# ============================================================================
+# Query Helpers
+# ============================================================================
+
+def build_search_pattern(query: str) -> str:
+    """Turn user input into a LIKE pattern with smart wildcard support"""
+    # Smart wildcard: if user includes %, use their exact pattern
+    # Otherwise, auto-wrap with % for standard substring search
+    if '%' in query:
+        search_pattern = query
+        # If pattern is just wildcards (no actual search text), treat as "show all"
+        stripped = query.replace('%', '').strip()
+        if not stripped:
+            search_pattern = '%'
+        # If pattern doesn't end with %, add it for "contains" behavior
+        # This makes term1%term2 match "term1...term2...more" not just "term1...term2"
+        elif not search_pattern.endswith('%'):
+            search_pattern = search_pattern + '%'
+    else:
+        search_pattern = f'%{query}%'
+    return search_pattern
+
+
+def escape_like(text: str) -> str:
+    """Escape LIKE wildcards so text is matched literally"""
+    return text.replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor token"""
+    def default(value):
+        if isinstance(value, datetime):
+            # DATETIME only keeps milliseconds - more digits fail to convert
+            return value.isoformat(timespec='milliseconds')
+        raise TypeError(f'Cannot encode {type(value).__name__} in cursor')
+
+    raw = json.dumps(values, default=default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> List[Any]:
+    """Decode a cursor token produced by encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def _with_total_quantity(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Calculate total quantity (cases x qty per case) for a row"""
+    qty_cases = row['Qty_Cases'] or 0
+    unit_qty = row['UnitQty2'] or 0
+    row['TotalQuantity'] = qty_cases * unit_qty if unit_qty > 0 else 0
+    return row
+
+
+def _add_total_quantity(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Calculate total quantity for each row"""
+    for row in rows:
+        _with_total_quantity(row)
+    return rows
+
+
+# Seconds of LastUpdate overlap re-read by each delta sync (covers writes that
+# were stamped before, but committed after, the previous sync)
+_DELTA_OVERLAP_SECONDS = 5
+
+# A delta sync returns each changed row's predecessor in the grid order (so the
+# client places it without sorting) for up to this many rows; more and the
+# client reloads instead
+_DELTA_POSITION_LIMIT = 200
+
+# (ID column, name column) pairs filled from the bin directory on history rows
+_HISTORY_BIN_COLUMNS = (('PreviousBinLocationID', 'PreviousBinLocation'),
+                        ('NewBinLocationID', 'NewBinLocation'))
+
+# Sort keys accepted by query_bin_locations; NULLs are folded so keyset
+# comparisons stay well-defined
+BIN_LOCATION_SORTS = {
+    'bin': "ISNULL(bl.BinLocation, '')",
+    'product': "ISNULL(ibl.ProductDescription, '')",
+    'upc': "ISNULL(ibl.ProductUPC, '')",
+    'qty': 'ISNULL(ibl.Qty_Cases, 0)',
+    'updated': 'ibl.LastUpdate'
+}
+
+
+# ============================================================================
+# Mutation Batches
+# ============================================================================
+#
+# Every write runs as a single batch in one transaction: the row change captures
+# its before/after state with OUTPUT ... INTO @changes, the history rows are
+# inserted from @changes in the same batch, and @changes is returned to the
+# caller. Batches start with the @now timestamp and @user parameters.
+
+_CHANGE_BATCH_PREAMBLE = '''
+    SET NOCOUNT ON;
+    DECLARE @now DATETIME = %s;
+    DECLARE @user NVARCHAR(255) = %s;
+    DECLARE @changes TABLE (
+        RecordID INT,
+        OperationType VARCHAR(20),
+        PreviousProductUPC VARCHAR(255),
+        PreviousProductDescription VARCHAR(255),
+        PreviousQty_Cases INT,
+        PreviousBinLocationID INT,
+        PreviousUnitQty2 REAL,
+        NewProductUPC VARCHAR(255),
+        NewProductDescription VARCHAR(255),
+        NewQty_Cases INT,
+        NewBinLocationID INT,
+        NewUnitQty2 REAL,
+        AdjustmentAmount INT,
+        Notes NVARCHAR(500),
+        RecordCreatedAt DATETIME,
+        RecordLastUpdate DATETIME
+    );
+'''
+
+_UPDATE_UNIT_QTY = '''
+    UPDATE Items_tbl
+    SET UnitQty2 = %s
+    WHERE ProductUPC = %s;
+'''
+
+_SELECT_CHANGES = '''
+    SELECT * FROM @changes;
+'''
+
+_INSERT_HISTORY_FROM_CHANGES = '''
+    INSERT INTO dbo.Items_BinLocations_History (
+        RecordID, OperationType, Timestamp, Username,
+        PreviousProductUPC, PreviousProductDescription, PreviousQty_Cases,
+        PreviousBinLocationID, PreviousUnitQty2,
+        NewProductUPC, NewProductDescription, NewQty_Cases,
+        NewBinLocationID, NewUnitQty2,
+        AdjustmentAmount, Notes,
+        RecordCreatedAt, RecordLastUpdate
+    )
+    SELECT
+        RecordID, OperationType, @now, @user,
+        PreviousProductUPC, PreviousProductDescription, PreviousQty_Cases,
+        PreviousBinLocationID, PreviousUnitQty2,
+        NewProductUPC, NewProductDescription, NewQty_Cases,
+        NewBinLocationID, NewUnitQty2,
+        AdjustmentAmount, Notes,
+        RecordCreatedAt, RecordLastUpdate
+    FROM @changes;
+''' + _SELECT_CHANGES
+
+
+# Cap on errors / dry-run changes listed in an import report (counts are always complete)
+_IMPORT_REPORT_LIMIT = 1000
+
+
+def _report_import_error(report: Dict[str, Any], row_number: int, message: str):
+    report['error_count'] += 1
+    if len(report['errors']) < _IMPORT_REPORT_LIMIT:
+        report['errors'].append({'row': row_number, 'message': message})
+
+
+# Errors meaning SQL Server refused the rows themselves (not that it was unreachable)
+_REJECTED_ROW_ERRORS = (pymssql.IntegrityError, pymssql.DataError, pymssql.ProgrammingError)
+
+
+# Manager methods enable_metrics() leaves alone: setup, plumbing and diagnostics
+_UNINSTRUMENTED_METHODS = {
+    'after_fork', 'get_connection', 'get_pool_stats', 'reset_pool', 'stop_background_tasks'
+}
 
 
 class MSSQLManager:
     """Manages MSSQL database connections and queries"""
 
-    def __init__(self, sqlite_manager: SQLiteManager):
+    def __init__(self, sqlite_manager: SQLiteManager, pool_size: int = 10,
+                 connect: Callable[..., Any] = pymssql.connect,
+                 defer_background_tasks: bool = False):
         self.sqlite_manager = sqlite_manager
-
-    @contextmanager
-    def get_connection(self):
-        """Get MSSQL connection with automatic cleanup"""
+        self.pool_size = pool_size
+        self.connect = connect
+        # Set in a preloading server's master: threads start in each worker's after_fork()
+        self.defer_background_tasks = defer_background_tasks
+        self._pool = None
+        self._pool_key = None
+        self._pool_pid = os.getpid()
+        self._pool_lock = Lock()
+        self.product_index = None
+        self.bin_directory = None
+        self.search_cache = None
+        self.unused_bins = None
+        self.history_rollups = None
+        self._rollup_task = None
+        self.history_writer = None
+        self.metrics = None
+        self.slow_query_log = None
+        self.replica = None
+        self._replica_task = None
+        self._background_tasks = []
+
+    def _get_pool(self) -> MSSQLConnectionPool:
+        """Get the connection pool, rebuilding it when the configuration changes"""
         config = self.sqlite_manager.get_config()
         if not config:
             raise Exception("Database configuration not found. Please configure in Settings.")
 
-        conn = pymssql.connect(
-            server=config['server'],
-            port=config['port'],
-            database=config['database'],
-            user=config['username'],
-            password=config['password'],
-            timeout=30,
-            login_timeout=10
-        )
+        key = (config['server'], config['port'], config['database'],
+               config['username'], config['password'])
+        if self._pool_pid != os.getpid():
+            self.after_fork()
+        with self._pool_lock:
+            if self._pool is None or self._pool_key != key:
+                old_pool = self._pool
+                self._pool = MSSQLConnectionPool({
+                    'server': config['server'],
+                    'port': config['port'],
+                    'database': config['database'],
+                    'user': config['username'],
+                    'password': config['password'],
+                    'timeout': 30,
+                    'login_timeout': 10
+                }, max_size=self.pool_size, connect=self.connect)
+                self._pool_key = key
+                if old_pool is not None:
+                    old_pool.close()
+            return self._pool
+
+    def reset_pool(self):
+        """Drop all pooled connections (e.g. after the configuration was saved)"""
+        with self._pool_lock:
+            old_pool = self._pool
+            self._pool = None
+            self._pool_key = None
+        if old_pool is not None:
+            old_pool.close()
+
+    def after_fork(self):
+        """Re-initialize per-process resources in a forked worker
+
+        Connections, threads and locks inherited from the parent are
+        abandoned (the sockets belong to the parent, so they are not closed
+        here) and the background tasks are started in this process.
+        """
+        self._pool_lock = Lock()
+        self._pool = None
+        self._pool_key = None
+        self._pool_pid = os.getpid()
+        self.defer_background_tasks = False
+        for cache in (self.product_index, self.unused_bins, self.search_cache,
+                      self.history_rollups, self.replica):
+            if cache is not None:
+                cache.after_fork()
+        for task in self._background_tasks:
+            task.after_fork()
+            task.start()
+        if self.history_writer is not None:
+            self.history_writer.after_fork()
+            self.history_writer.start()
+
+    def _start_background_task(self, task: PeriodicTask):
+        self._background_tasks.append(task)
+        if not self.defer_background_tasks:
+            task.start()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        with self._pool_lock:
+            pool = self._pool
+        return pool.stats() if pool else {}
+
+    def enable_product_index(self, refresh_interval: float = 300):
+        """Serve product search from an in-memory trigram index refreshed in the background"""
+        self.product_index = ProductSearchIndex(self._load_search_products)
+        task = PeriodicTask('product-index-refresh', refresh_interval, self.product_index.refresh)
+        self._start_background_task(task)
+
+    def enable_bin_directory(self, refresh_interval: float = 600):
+        """Serve bin search and bin names from a cached copy of BinLocations_tbl"""
+        task = PeriodicTask('bin-directory-refresh', refresh_interval, lambda: self.bin_directory.refresh())
+        self.bin_directory = BinDirectory(self._load_bins, on_miss=task.trigger)
+        self._start_background_task(task)
+
+    def enable_unused_bins(self, reconcile_interval: float = 300):
+        """Serve unused bins from in-memory usage counts, reconciled in the background"""
+        task = PeriodicTask('unused-bins-reconcile', reconcile_interval, lambda: self.unused_bins.refresh())
+        self.unused_bins = UnusedBinSet(self._load_bin_usage, on_unknown=task.trigger)
+        self._start_background_task(task)
+
+    def enable_history_rollups(self, db_path: str = '/app/data/history_rollups.db',
+                               refresh_interval: float = 300):
+        """Serve history statistics from SQLite rollups kept in sync in the background"""
+        self.history_rollups = HistoryRollupStore(db_path)
+        self._rollup_task = PeriodicTask('history-rollups-sync', refresh_interval, self.sync_history_rollups)
+        self._start_background_task(self._rollup_task)
+
+    def enable_replica(self, db_path: str = '/app/data/replica.db', max_staleness: float = 30,
+                       sync_interval: float = 5, full_sync_interval: float = 3600,
+                       lookup_interval: float = 20):
+        """Serve grid loads, delta syncs and lookups from a local SQLite replica while it is fresh"""
+        self.replica = InventoryReplica(db_path, max_staleness=max_staleness,
+                                        full_sync_interval=full_sync_interval,
+                                        lookup_interval=lookup_interval,
+                                        sync_interval=sync_interval)
+        self._replica_task = PeriodicTask('replica-sync', sync_interval, self.sync_replica)
+        self._start_background_task(self._replica_task)
+
+    def enable_history_writer(self, spool_path: str = '/app/data/history_spool.db',
+                              flush_interval: float = 1.0):
+        """Write history rows from a background thread instead of inside each mutation"""
+        self.history_writer = HistoryWriter(self.insert_history_rows, spool_path,
+                                            flush_interval=flush_interval,
+                                            rejected_errors=_REJECTED_ROW_ERRORS)
+        if not self.defer_background_tasks:
+            self.history_writer.start()
+        atexit.register(self.history_writer.stop)
+
+    def enable_search_cache(self, ttl: float = 30, max_entries: int = 1000):
+        """Cache product and bin search results (used when no in-memory index answers)"""
+        self.search_cache = SearchCache(max_entries=max_entries, ttl=ttl)
+
+    def enable_metrics(self, metrics: Metrics):
+        """Time public methods and their connect/execute/fetch phases"""
+        self.metrics = metrics
+        for name in dir(type(self)):
+            if name.startswith(('_', 'enable_')) or name in _UNINSTRUMENTED_METHODS:
+                continue
+            method = getattr(self, name)
+            if callable(method):
+                setattr(self, name, metrics.wrap_method(name, method))
+
+    def enable_slow_query_log(self, threshold: float, path: str = '/app/data/slow_queries.log'):
+        """Log statements taking at least `threshold` seconds (execute + fetch)"""
+        self.slow_query_log = SlowQueryLog(threshold, path)
+
+    def _bin_directory_ready(self) -> bool:
+        return self.bin_directory is not None and self.bin_directory.ready
+
+    def _decorate_bin_names(self, rows: List[Dict[str, Any]], *pairs: Tuple[str, str]) -> List[Dict[str, Any]]:
+        """Fill bin-name columns from the bin directory, given (id column, name column) pairs"""
+        name = self.bin_directory.name
+        for row in rows:
+            for id_column, name_column in pairs:
+                row[name_column] = name(row.get(id_column))
+        return rows
+
+    def stop_background_tasks(self):
+        """Stop background refresh threads (unwritten history rows stay spooled)"""
+        for task in self._background_tasks:
+            task.stop()
+        self._background_tasks = []
+        if self.history_writer is not None:
+            self.history_writer.stop()
+
+    @contextmanager
+    def get_connection(self):
+        """Get pooled MSSQL connection, returned to the pool on exit"""
+        pool = self._get_pool()
+        metrics = self.metrics
+        slow_log = self.slow_query_log
+        if metrics is None and slow_log is None:
+            pooled = pool.acquire()
+            conn = pooled.conn
+        else:
+            start = time.perf_counter()
+            pooled = pool.acquire()
+            if metrics is not None:
+                # Includes the TDS login when the pool has to open a connection
+                metrics.record('connect', time.perf_counter() - start)
+            conn = InstrumentedConnection(pooled.conn, metrics, slow_log)
         try:
             yield conn
+        except BaseException:
+            # Connection state is unknown after an error - don't reuse it
+            pool.release(pooled, discard=True)
+            raise
+        else:
+            pool.release(pooled)
         finally:
-            conn.close()
+            if conn is not pooled.conn:
+                conn.release()
 
     def test_connection(self) -> Dict[str, Any]:
         """Test MSSQL connection"""
@@ -115,240 +685,1025 @@ class MSSQLManager:
         except Exception as e:
             return {'success': False, 'message': str(e)}
 
-    def get_bin_locations(self) -> List[Dict[str, Any]]:
-        """Get all bin location records with JOINs"""
+    def _bin_location_filters(self,
+                              bin_pattern: Optional[str] = None,
+                              product_pattern: Optional[str] = None,
+                              upc_pattern: Optional[str] = None,
+                              grid_match: bool = False) -> Tuple[List[str], List[Any]]:
+        """Build WHERE clauses for the bin/product/UPC filters"""
+        where_clauses = []
+        params = []
+
+        if bin_pattern:
+            if not grid_match:
+                where_clauses.append('bl.BinLocation LIKE %s')
+                params.append(build_search_pattern(bin_pattern))
+            elif any(ch.isdigit() for ch in bin_pattern):
+                # Grid rule: exact match when the search contains numbers
+                where_clauses.append('bl.BinLocation = %s')
+                params.append(bin_pattern)
+            else:
+                # Grid rule: prefix match when the search has no numbers
+                where_clauses.append('bl.BinLocation LIKE %s')
+                params.append(escape_like(bin_pattern) + '%')
+
+        if product_pattern:
+            where_clauses.append('ibl.ProductDescription LIKE %s')
+            params.append(build_search_pattern(product_pattern))
+
+        if upc_pattern:
+            if grid_match:
+                where_clauses.append('ibl.ProductUPC = %s')
+                params.append(upc_pattern)
+            else:
+                where_clauses.append('ibl.ProductUPC LIKE %s')
+                params.append(build_search_pattern(upc_pattern))
+
+        return where_clauses, params
+
+    def _bin_locations_query(self,
+                             bin_pattern: Optional[str] = None,
+                             product_pattern: Optional[str] = None,
+                             upc_pattern: Optional[str] = None,
+                             grid_match: bool = False) -> Tuple[str, Tuple]:
+        """Build the full (optionally filtered) bin locations query and its parameters"""
+        where_clauses, params = self._bin_location_filters(bin_pattern, product_pattern,
+                                                           upc_pattern, grid_match)
+        where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
+
+        # The bin-name JOIN stays even with the bin directory: the server's
+        # collation decides the order
+        query = f'''
+            SELECT
+                ibl.id,
+                ibl.ProductUPC,
+                ibl.ProductDescription,
+                ibl.Qty_Cases,
+                ibl.BinLocationID,
+                bl.BinLocation,
+                ISNULL(it.UnitQty2, 0) as UnitQty2,
+                ibl.CreatedAt,
+                ibl.LastUpdate
+            FROM Items_BinLocations ibl
+            LEFT JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+            {where_sql}
+            ORDER BY ISNULL(bl.BinLocation, ''), ISNULL(ibl.ProductDescription, ''), ibl.id
+        '''
+        return query, tuple(params)
+
+    def get_bin_locations(self,
+                          bin_pattern: Optional[str] = None,
+                          product_pattern: Optional[str] = None,
+                          upc_pattern: Optional[str] = None,
+                          grid_match: bool = False) -> List[Dict[str, Any]]:
+        """Get all (optionally filtered) bin location records with JOINs"""
+        return self._load_bin_locations(bin_pattern, product_pattern, upc_pattern, grid_match)[0]
+
+    def get_bin_locations_with_watermark(self,
+                                         bin_pattern: Optional[str] = None,
+                                         product_pattern: Optional[str] = None,
+                                         upc_pattern: Optional[str] = None,
+                                         grid_match: bool = False) -> Tuple[List[Dict[str, Any]], str]:
+        """Get all (optionally filtered) records and the delta-sync watermark for them"""
+        rows, history_id = self._load_bin_locations(bin_pattern, product_pattern, upc_pattern,
+                                                    grid_match, with_history_id=True)
+        last_update = max((row['LastUpdate'] for row in rows if row.get('LastUpdate')), default=None)
+        return rows, encode_cursor([last_update, history_id])
+
+    def _load_bin_locations(self, bin_pattern: Optional[str], product_pattern: Optional[str],
+                            upc_pattern: Optional[str], grid_match: bool,
+                            with_history_id: bool = False) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Full bin locations query, plus MAX(HistoryID) read before the rows if requested
+
+        Reading the history high-water mark first means a change committed
+        while the rows are read is either in the rows or after the mark, so
+        the next delta sync cannot skip it.
+        """
+        if self.replica is not None:
+            # The replica stores rows and last_history_id in one transaction
+            history_id = self.replica.history_id() if with_history_id else None
+            if history_id is not None or not with_history_id:
+                rows = self.replica.bin_locations(*self._bin_location_filters(bin_pattern, product_pattern,
+                                                                              upc_pattern, grid_match))
+                if rows is not None:
+                    return _add_total_quantity(rows), history_id
+
+        query, params = self._bin_locations_query(bin_pattern, product_pattern, upc_pattern, grid_match)
+        history_id = None
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            if with_history_id:
+                cursor.execute('SELECT MAX(HistoryID) as history_id FROM dbo.Items_BinLocations_History')
+                history_id = cursor.fetchone()['history_id'] or 0
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        return _add_total_quantity(rows), history_id
+
+    def iter_bin_locations(self,
+                           bin_pattern: Optional[str] = None,
+                           product_pattern: Optional[str] = None,
+                           upc_pattern: Optional[str] = None,
+                           grid_match: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield bin location records one at a time straight from the cursor"""
+        if self.replica is not None:
+            rows = self.replica.iter_bin_locations(*self._bin_location_filters(bin_pattern, product_pattern,
+                                                                               upc_pattern, grid_match))
+            if rows is not None:
+                for row in rows:
+                    yield _with_total_quantity(row)
+                return
+
+        query, params = self._bin_locations_query(bin_pattern, product_pattern, upc_pattern, grid_match)
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(query, params)
+            for row in cursor:
+                yield _with_total_quantity(row)
+
+    def query_bin_locations(self,
+                            bin_pattern: Optional[str] = None,
+                            product_pattern: Optional[str] = None,
+                            upc_pattern: Optional[str] = None,
+                            grid_match: bool = False,
+                            sort: str = 'bin',
+                            descending: bool = False,
+                            limit: int = 100,
+                            cursor_token: Optional[str] = None,
+                            include_total: bool = False) -> Dict[str, Any]:
+        """Get one keyset-paginated page of filtered bin location records"""
+        if sort not in BIN_LOCATION_SORTS:
+            raise ValueError(f'Invalid sort: {sort}')
+        sort_expr = BIN_LOCATION_SORTS[sort]
+        direction = 'DESC' if descending else 'ASC'
+        comparison = '<' if descending else '>'
+
+        where_clauses, params = self._bin_location_filters(bin_pattern, product_pattern,
+                                                           upc_pattern, grid_match)
+        filter_clauses, filter_params = list(where_clauses), list(params)
+
+        after = None
+        if cursor_token:
+            after = decode_cursor(cursor_token)
+            if len(after) != 2:
+                raise ValueError('Invalid cursor')
+
+        page = None
+        if self.replica is not None:
+            page = self.replica.page(where_clauses, params, sort, descending, limit, after, include_total)
+
+        if page is not None:
+            rows, totals = page
+            result = totals or {}
+        else:
+            # Keyset: continue strictly after the (sort key, id) of the last row served
+            if after is not None:
+                last_key, last_id = after
+                where_clauses.append(
+                    f'({sort_expr} {comparison} %s OR ({sort_expr} = %s AND ibl.id {comparison} %s))'
+                )
+                params.extend([last_key, last_key, last_id])
+
+            where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
+
+            with self.get_connection() as conn:
+                cursor = conn.cursor(as_dict=True)
+                cursor.execute(f'''
+                    SELECT TOP {int(limit) + 1}
+                        ibl.id,
+                        ibl.ProductUPC,
+                        ibl.ProductDescription,
+                        ibl.Qty_Cases,
+                        ibl.BinLocationID,
+                        bl.BinLocation,
+                        ISNULL(it.UnitQty2, 0) as UnitQty2,
+                        ibl.LastUpdate,
+                        {sort_expr} as SortKey
+                    FROM Items_BinLocations ibl
+                    LEFT JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID
+                    LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+                    {where_sql}
+                    ORDER BY {sort_expr} {direction}, ibl.id {direction}
+                ''', tuple(params))
+                rows = cursor.fetchall()
+
+                result = {}
+                if include_total:
+                    filter_sql = 'WHERE ' + ' AND '.join(filter_clauses) if filter_clauses else ''
+                    cursor.execute(f'''
+                        SELECT
+                            COUNT(*) as total,
+                            ISNULL(SUM(ISNULL(ibl.Qty_Cases, 0)), 0) as total_cases,
+                            ISNULL(SUM(CASE WHEN it.UnitQty2 > 0
+                                            THEN ISNULL(ibl.Qty_Cases, 0) * it.UnitQty2
+                                            ELSE 0 END), 0) as total_items
+                        FROM Items_BinLocations ibl
+                        LEFT JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID
+                        LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+                        {filter_sql}
+                    ''', tuple(filter_params))
+                    result.update(cursor.fetchone())
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_cursor([rows[-1]['SortKey'], rows[-1]['id']])
+        for row in rows:
+            del row['SortKey']
+
+        result['data'] = _add_total_quantity(rows)
+        result['next_cursor'] = next_cursor
+        return result
+
+    def get_data_version(self) -> str:
+        """Get a cheap version token that changes whenever list/lookup data changes"""
+        if self.replica is not None:
+            version = self.replica.data_version()
+            if version is not None:
+                return version
+
         with self.get_connection() as conn:
             cursor = conn.cursor(as_dict=True)
             cursor.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM Items_BinLocations) as row_count,
+                    (SELECT MAX(LastUpdate) FROM Items_BinLocations) as last_update,
+                    (SELECT MAX(HistoryID) FROM dbo.Items_BinLocations_History) as history_id,
+                    (SELECT CHECKSUM_AGG(CHECKSUM(BinLocationID, BinLocation))
+                     FROM dbo.BinLocations_tbl) as bins_checksum,
+                    (SELECT CHECKSUM_AGG(CHECKSUM(it.ProductUPC, it.UnitQty2))
+                     FROM dbo.Items_tbl it
+                     WHERE EXISTS (SELECT 1 FROM Items_BinLocations ibl
+                                   WHERE ibl.ProductUPC = it.ProductUPC)) as unit_qty_checksum
+            ''')
+            row = cursor.fetchone()
+        return '{row_count}:{last_update}:{history_id}:{bins_checksum}:{unit_qty_checksum}'.format(**row)
+
+    def get_bin_location_changes(self, watermark: str) -> Dict[str, Any]:
+        """Get rows changed and IDs deleted since a watermark from get_bin_locations_with_watermark"""
+        values = decode_cursor(watermark)
+        if len(values) != 2:
+            raise ValueError('Invalid watermark')
+        last_update, history_id = values
+
+        if self.replica is not None:
+            since = None
+            if last_update:
+                since = datetime.fromisoformat(last_update) - timedelta(seconds=_DELTA_OVERLAP_SECONDS)
+            changes = self.replica.changes(since, history_id, _DELTA_POSITION_LIMIT)
+            if changes is not None:
+                rows = _add_total_quantity(changes['data'])
+                new_last_update = max((row['LastUpdate'] for row in rows if row.get('LastUpdate')),
+                                      default=last_update)
+                return {
+                    'data': rows,
+                    'deleted': changes['deleted'],
+                    'after': changes['after'],
+                    'watermark': encode_cursor([new_last_update, changes['history_id']])
+                }
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+
+            # Read the history high-water mark first so nothing committed in
+            # between is skipped by the next sync
+            cursor.execute('SELECT MAX(HistoryID) as history_id FROM dbo.Items_BinLocations_History')
+            new_history_id = cursor.fetchone()['history_id'] or 0
+
+            # LastUpdate is stamped before commit, so re-read a short overlap
+            # window; the client merges rows by id, so repeats are harmless
+            where_sql = ''
+            params = ()
+            if last_update:
+                where_sql = 'WHERE ibl.LastUpdate >= DATEADD(second, %s, %s)'
+                params = (-_DELTA_OVERLAP_SECONDS, last_update)
+
+            use_directory = self._bin_directory_ready()
+            if use_directory:
+                bin_column = ''
+                bin_join = ''
+            else:
+                bin_column = 'bl.BinLocation,'
+                bin_join = 'LEFT JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID'
+
+            cursor.execute(f'''
                 SELECT
                     ibl.id,
                     ibl.ProductUPC,
                     ibl.ProductDescription,
                     ibl.Qty_Cases,
                     ibl.BinLocationID,
-                    bl.BinLocation,
+                    {bin_column}
                     ISNULL(it.UnitQty2, 0) as UnitQty2,
                     ibl.LastUpdate
                 FROM Items_BinLocations ibl
-                LEFT JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID
+                {bin_join}
                 LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
-                ORDER BY bl.BinLocation, ibl.ProductDescription
-            ''')
+                {where_sql}
+            ''', params)
             rows = cursor.fetchall()
+            if use_directory:
+                self._decorate_bin_names(rows, ('BinLocationID', 'BinLocation'))
+            rows = _add_total_quantity(rows)
+            after = self._grid_predecessors(cursor, [row['id'] for row in rows])
 
-            # Calculate total quantity for each row
-            for row in rows:
-                qty_cases = row['Qty_Cases'] or 0
-                unit_qty = row['UnitQty2'] or 0
-                row['TotalQuantity'] = qty_cases * unit_qty if unit_qty > 0 else 0
+            # DELETE history rows are the tombstones
+            cursor.execute('''
+                SELECT DISTINCT h.RecordID
+                FROM dbo.Items_BinLocations_History h WITH (READCOMMITTEDLOCK)
+                WHERE h.OperationType = 'DELETE'
+                AND h.HistoryID > %s
+                AND h.HistoryID <= %s
+            ''', (history_id, new_history_id))
+            deleted = [row['RecordID'] for row in cursor.fetchall()]
+
+        # The previous watermark is kept when nothing newer was read (a deleted
+        # row may have held the maximum, which only widens the next overlap)
+        new_last_update = max((row['LastUpdate'] for row in rows if row.get('LastUpdate')),
+                              default=last_update)
+
+        return {
+            'data': rows,
+            'deleted': deleted,
+            'after': after,
+            'watermark': encode_cursor([new_last_update, new_history_id])
+        }
 
-            return rows
+    @staticmethod
+    def _grid_predecessors(cursor, ids: List[int]) -> Optional[Dict[int, Optional[int]]]:
+        """ID of the row before each of `ids` in the full grid order (None for the first row)
+
+        The server's collation decides the order, so the client can place
+        changed rows without comparing strings itself. None when there are
+        more than _DELTA_POSITION_LIMIT ids.
+        """
+        if len(ids) > _DELTA_POSITION_LIMIT:
+            return None
+        if not ids:
+            return {}
+        cursor.execute(f'''
+            SELECT
+                c.id,
+                (SELECT TOP 1 p.id
+                 FROM Items_BinLocations p
+                 LEFT JOIN BinLocations_tbl pb ON p.BinLocationID = pb.BinLocationID
+                 WHERE ISNULL(pb.BinLocation, '') < ISNULL(cb.BinLocation, '')
+                 OR (ISNULL(pb.BinLocation, '') = ISNULL(cb.BinLocation, '')
+                     AND (ISNULL(p.ProductDescription, '') < ISNULL(c.ProductDescription, '')
+                          OR (ISNULL(p.ProductDescription, '') = ISNULL(c.ProductDescription, '')
+                              AND p.id < c.id)))
+                 ORDER BY ISNULL(pb.BinLocation, '') DESC, ISNULL(p.ProductDescription, '') DESC,
+                          p.id DESC) as after_id
+            FROM Items_BinLocations c
+            LEFT JOIN BinLocations_tbl cb ON c.BinLocationID = cb.BinLocationID
+            WHERE c.id IN ({', '.join(['%s'] * len(ids))})
+        ''', tuple(ids))
+        return {row['id']: row['after_id'] for row in cursor.fetchall()}
+
+    def _history_sql(self) -> str:
+        """End of a mutation batch: record history in the transaction, or just return @changes for the writer"""
+        return _SELECT_CHANGES if self.history_writer is not None else _INSERT_HISTORY_FROM_CHANGES
+
+    def _apply_change_batch(self, batch: str, params: Tuple,
+                            timestamp: datetime, username: str,
+                            require_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run a mutation batch in one transaction and return the captured @changes rows
+
+        With require_rows, the transaction is rolled back (and nothing is
+        recorded) unless exactly that many rows changed.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(batch, params)
+            changes = cursor.fetchall()
+            if require_rows is not None and len(changes) != require_rows:
+                conn.rollback()
+                return changes
+            conn.commit()
+
+        if self.history_writer is not None and changes:
+            self.history_writer.write([dict(change, Timestamp=timestamp, Username=username)
+                                       for change in changes])
+
+        if self.unused_bins is not None:
+            for change in changes:
+                self.unused_bins.move(change['PreviousBinLocationID'], change['NewBinLocationID'])
+        if changes and self._rollup_task is not None:
+            self._rollup_task.trigger()
+        if changes and self.replica is not None:
+            self.replica.apply_writes(changes, timestamp)
+        if changes and self._replica_task is not None:
+            self._replica_task.trigger()
+        return changes
 
     def create_bin_location(self, data: Dict[str, Any], username: str) -> Dict[str, Any]:
         """Create new bin location record and update UnitQty2 if provided"""
         # Get current Central Time (naive datetime - SQL Server doesn't handle timezone-aware datetimes)
         central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
 
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Update UnitQty2 in Items_tbl if provided
-            if data.get('qty_per_case') is not None and data.get('product_upc'):
-                cursor.execute('''
-                    UPDATE Items_tbl
-                    SET UnitQty2 = %s
-                    WHERE ProductUPC = %s
-                ''', (data['qty_per_case'], data['product_upc']))
-
-            # Insert into Items_BinLocations with Central Time for both CreatedAt and LastUpdate
-            cursor.execute('''
-                INSERT INTO Items_BinLocations
-                (ProductUPC, ProductDescription, Qty_Cases, BinLocationID, CreatedAt, LastUpdate)
-                VALUES (%s, %s, %s, %s, %s, %s);
-                SELECT SCOPE_IDENTITY() AS new_id;
-            ''', (
-                data['product_upc'],
-                data['product_description'],
-                data.get('qty_cases', 0),
-                data['bin_location_id'],
-                central_time,
-                central_time
-            ))
-
-            # Get the new record ID
-            new_id = int(cursor.fetchone()[0])
-
-            conn.commit()
+        # Update UnitQty2 in Items_tbl if provided
+        update_unit_qty = data.get('qty_per_case') is not None and data.get('product_upc')
+        unit_qty_sql = _UPDATE_UNIT_QTY if update_unit_qty else ''
+
+        batch = f'''
+            {_CHANGE_BATCH_PREAMBLE}
+
+            {unit_qty_sql}
+
+            INSERT INTO Items_BinLocations
+            (ProductUPC, ProductDescription, Qty_Cases, BinLocationID, CreatedAt, LastUpdate)
+            OUTPUT
+                inserted.id, 'CREATE',
+                NULL, NULL, NULL, NULL, NULL,
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, %s,
+                NULL, NULL, NULL, NULL
+            INTO @changes
+            VALUES (%s, %s, %s, %s, @now, @now);
+
+            {self._history_sql()}
+        '''
+        params = (central_time, username)
+        if update_unit_qty:
+            params += (data['qty_per_case'], data['product_upc'])
+        params += (
+            data.get('qty_per_case', 0),
+            data['product_upc'],
+            data['product_description'],
+            data.get('qty_cases', 0),
+            data['bin_location_id']
+        )
 
-        # Record history after commit
-        new_state = {
-            'ProductUPC': data['product_upc'],
-            'ProductDescription': data['product_description'],
-            'Qty_Cases': data.get('qty_cases', 0),
-            'BinLocationID': data['bin_location_id'],
-            'UnitQty2': data.get('qty_per_case', 0)
-        }
+        changes = self._apply_change_batch(batch, params, central_time, username)
 
-        self.insert_history_record(
-            record_id=new_id,
-            operation_type='CREATE',
-            username=username,
-            previous_state=None,
-            new_state=new_state
-        )
+        if update_unit_qty and self.product_index is not None:
+            self.product_index.note_unit_qty(data['product_upc'], data['qty_per_case'])
+        if update_unit_qty and self.replica is not None:
+            self.replica.note_unit_qty(data['product_upc'], data['qty_per_case'])
+        if update_unit_qty and self.search_cache is not None:
+            self.search_cache.invalidate('products:')
+        # A bin created outside this app schedules a directory refresh
+        if self.bin_directory is not None:
+            self.bin_directory.knows(data['bin_location_id'])
 
-        return {'success': True, 'message': 'Record created successfully'}
+        return {'success': True, 'message': 'Record created successfully', 'id': changes[0]['RecordID']}
 
     def update_bin_location(self, record_id: int, data: Dict[str, Any], username: str) -> Dict[str, Any]:
         """Update bin location record and UnitQty2 if provided"""
-        # Get before state for history
-        previous_state = self._get_record_before_state(record_id)
-
         # Get current Central Time (naive datetime - SQL Server doesn't handle timezone-aware datetimes)
         central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
 
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # Update UnitQty2 in Items_tbl if provided
-            if data.get('qty_per_case') is not None and data.get('product_upc'):
-                cursor.execute('''
-                    UPDATE Items_tbl
-                    SET UnitQty2 = %s
-                    WHERE ProductUPC = %s
-                ''', (data['qty_per_case'], data['product_upc']))
-
-            # Update Items_BinLocations
-            cursor.execute('''
-                UPDATE Items_BinLocations
-                SET ProductUPC = %s,
-                    ProductDescription = %s,
-                    Qty_Cases = %s,
-                    BinLocationID = %s,
-                    LastUpdate = %s
-                WHERE id = %s
-            ''', (
-                data['product_upc'],
-                data['product_description'],
-                data.get('qty_cases', 0),
-                data['bin_location_id'],
-                central_time,
-                record_id
-            ))
-
-            conn.commit()
-
-        # Record history after commit
-        new_state = {
-            'ProductUPC': data['product_upc'],
-            'ProductDescription': data['product_description'],
-            'Qty_Cases': data.get('qty_cases', 0),
-            'BinLocationID': data['bin_location_id'],
-            'UnitQty2': data.get('qty_per_case', 0)
-        }
-
-        self.insert_history_record(
-            record_id=record_id,
-            operation_type='UPDATE',
-            username=username,
-            previous_state=previous_state,
-            new_state=new_state
+        # Update UnitQty2 in Items_tbl if provided (after the row update, so the
+        # previous UnitQty2 is captured as it was)
+        update_unit_qty = data.get('qty_per_case') is not None and data.get('product_upc')
+        unit_qty_sql = 'IF EXISTS (SELECT 1 FROM @changes)' + _UPDATE_UNIT_QTY if update_unit_qty else ''
+
+        batch = f'''
+            {_CHANGE_BATCH_PREAMBLE}
+
+            UPDATE ibl
+            SET ProductUPC = %s,
+                ProductDescription = %s,
+                Qty_Cases = %s,
+                BinLocationID = %s,
+                LastUpdate = @now
+            OUTPUT
+                inserted.id, 'UPDATE',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, %s,
+                NULL, NULL, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+            WHERE ibl.id = %s;
+
+            {unit_qty_sql}
+
+            {self._history_sql()}
+        '''
+        params = (
+            central_time,
+            username,
+            data['product_upc'],
+            data['product_description'],
+            data.get('qty_cases', 0),
+            data['bin_location_id'],
+            data.get('qty_per_case', 0),
+            record_id
         )
+        if update_unit_qty:
+            params += (data['qty_per_case'], data['product_upc'])
+
+        if not self._apply_change_batch(batch, params, central_time, username):
+            return {'success': False, 'message': 'Record not found'}
+
+        if update_unit_qty and self.product_index is not None:
+            self.product_index.note_unit_qty(data['product_upc'], data['qty_per_case'])
+        if update_unit_qty and self.replica is not None:
+            self.replica.note_unit_qty(data['product_upc'], data['qty_per_case'])
+        if update_unit_qty and self.search_cache is not None:
+            self.search_cache.invalidate('products:')
+        # A bin created outside this app schedules a directory refresh
+        if self.bin_directory is not None:
+            self.bin_directory.knows(data['bin_location_id'])
 
         return {'success': True, 'message': 'Record updated successfully'}
 
     def adjust_quantity(self, record_id: int, adjustment: int, username: str, notes: Optional[str] = None) -> Dict[str, Any]:
         """Adjust case quantity by adding or removing cases"""
-        # Get before state for history
-        previous_state = self._get_record_before_state(record_id)
+        # Get current Central Time (naive datetime - SQL Server doesn't handle timezone-aware datetimes)
+        central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
+
+        batch = f'''
+            {_CHANGE_BATCH_PREAMBLE}
+
+            UPDATE ibl
+            SET Qty_Cases = ISNULL(ibl.Qty_Cases, 0) + %s,
+                LastUpdate = @now
+            OUTPUT
+                inserted.id, 'ADJUST',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                %s, %s, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+            WHERE ibl.id = %s;
+
+            {self._history_sql()}
+        '''
+        params = (central_time, username, adjustment, adjustment, notes, record_id)
+
+        if not self._apply_change_batch(batch, params, central_time, username):
+            return {'success': False, 'message': 'Record not found'}
+
+        return {'success': True, 'message': 'Quantity adjusted successfully'}
 
+    def delete_bin_location(self, record_id: int, username: str) -> Dict[str, Any]:
+        """Delete bin location record"""
         # Get current Central Time (naive datetime - SQL Server doesn't handle timezone-aware datetimes)
         central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
 
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE Items_BinLocations
-                SET Qty_Cases = ISNULL(Qty_Cases, 0) + %s,
-                    LastUpdate = %s
-                WHERE id = %s
-            ''', (adjustment, central_time, record_id))
+        batch = f'''
+            {_CHANGE_BATCH_PREAMBLE}
+
+            DELETE ibl
+            OUTPUT
+                deleted.id, 'DELETE',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                NULL, NULL, NULL, NULL, NULL,
+                NULL, NULL, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+            WHERE ibl.id = %s;
+
+            {self._history_sql()}
+        '''
+        params = (central_time, username, record_id)
+
+        if not self._apply_change_batch(batch, params, central_time, username):
+            return {'success': False, 'message': 'Record not found'}
+
+        return {'success': True, 'message': 'Record deleted successfully', 'id': record_id}
+
+    def bulk_apply(self, operations: List[Dict[str, Any]], username: str,
+                   atomic: bool = False) -> Dict[str, Any]:
+        """Apply adjust/move/update/delete operations set-based in one transaction
+
+        Each operation names a distinct record `id`. The operations are loaded
+        into a table variable with multi-row INSERTs and applied with one
+        statement per operation type; history is recorded for all of them
+        at once. With atomic=True nothing is applied unless every record
+        was found.
+        """
+        central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
 
-            conn.commit()
+        ops_rows = []
+        ops_params = []
+        for op in operations:
+            ops_rows.append('(%s, %s, %s, %s, %s, %s, %s, %s, %s)')
+            ops_params.extend([
+                op['id'],
+                op['op'],
+                op.get('adjustment'),
+                op.get('notes'),
+                op.get('product_upc'),
+                op.get('product_description'),
+                op.get('qty_cases'),
+                op.get('bin_location_id'),
+                op.get('qty_per_case')
+            ])
+        # INSERT ... VALUES takes at most 1000 rows
+        ops_inserts = '\n'.join(
+            'INSERT INTO @ops (RecordID, Op, Adjustment, Notes, ProductUPC, ProductDescription, '
+            'QtyCases, BinLocationID, UnitQty2) VALUES ' + ', '.join(ops_rows[start:start + 500]) + ';'
+            for start in range(0, len(ops_rows), 500)
+        )
 
-        # Calculate new quantity
-        new_qty_cases = (previous_state['Qty_Cases'] or 0) + adjustment
+        batch = f'''
+            {_CHANGE_BATCH_PREAMBLE}
+
+            DECLARE @ops TABLE (
+                RecordID INT PRIMARY KEY,
+                Op VARCHAR(10) NOT NULL,
+                Adjustment INT,
+                Notes NVARCHAR(500),
+                ProductUPC VARCHAR(255),
+                ProductDescription VARCHAR(255),
+                QtyCases INT,
+                BinLocationID INT,
+                UnitQty2 REAL
+            );
+
+            {ops_inserts}
+
+            UPDATE ibl
+            SET Qty_Cases = ISNULL(ibl.Qty_Cases, 0) + o.Adjustment,
+                LastUpdate = @now
+            OUTPUT
+                inserted.id, 'ADJUST',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                o.Adjustment, o.Notes, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            INNER JOIN @ops o ON o.RecordID = ibl.id AND o.Op = 'adjust'
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC;
+
+            UPDATE ibl
+            SET BinLocationID = o.BinLocationID,
+                LastUpdate = @now
+            OUTPUT
+                inserted.id, 'UPDATE',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                NULL, o.Notes, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            INNER JOIN @ops o ON o.RecordID = ibl.id AND o.Op = 'move'
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC;
+
+            UPDATE ibl
+            SET ProductUPC = o.ProductUPC,
+                ProductDescription = o.ProductDescription,
+                Qty_Cases = ISNULL(o.QtyCases, 0),
+                BinLocationID = o.BinLocationID,
+                LastUpdate = @now
+            OUTPUT
+                inserted.id, 'UPDATE',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, ISNULL(o.UnitQty2, 0),
+                NULL, o.Notes, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            INNER JOIN @ops o ON o.RecordID = ibl.id AND o.Op = 'update'
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC;
+
+            -- After the row updates, so the previous UnitQty2 is captured as it was
+            UPDATE it
+            SET UnitQty2 = o.UnitQty2
+            FROM Items_tbl it
+            INNER JOIN @ops o ON it.ProductUPC = o.ProductUPC
+            WHERE o.Op = 'update'
+            AND o.UnitQty2 IS NOT NULL
+            AND EXISTS (SELECT 1 FROM @changes c WHERE c.RecordID = o.RecordID);
+
+            DELETE ibl
+            OUTPUT
+                deleted.id, 'DELETE',
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, ISNULL(it.UnitQty2, 0),
+                NULL, NULL, NULL, NULL, NULL,
+                NULL, o.Notes, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes
+            FROM Items_BinLocations ibl
+            INNER JOIN @ops o ON o.RecordID = ibl.id AND o.Op = 'delete'
+            LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC;
+
+            {self._history_sql()}
+        '''
+        params = (central_time, username) + tuple(ops_params)
+
+        changes = self._apply_change_batch(batch, params, central_time, username,
+                                           require_rows=len(operations) if atomic else None)
+        changed_ids = {change['RecordID'] for change in changes}
+        rolled_back = atomic and len(changes) != len(operations)
+
+        results = []
+        for index, op in enumerate(operations):
+            found = op['id'] in changed_ids
+            if not found:
+                message = 'Record not found'
+            elif rolled_back:
+                message = 'Not applied: other operations in this request failed'
+            else:
+                message = 'Applied'
+            results.append({
+                'index': index,
+                'id': op['id'],
+                'op': op['op'],
+                'success': found and not rolled_back,
+                'message': message
+            })
+
+        if not rolled_back:
+            for op in operations:
+                if op['id'] not in changed_ids:
+                    continue
+                if op['op'] == 'update' and op.get('qty_per_case') is not None:
+                    if self.product_index is not None:
+                        self.product_index.note_unit_qty(op['product_upc'], op['qty_per_case'])
+                    if self.replica is not None:
+                        self.replica.note_unit_qty(op['product_upc'], op['qty_per_case'])
+                    if self.search_cache is not None:
+                        self.search_cache.invalidate('products:')
+                if op['op'] in ('move', 'update') and self.bin_directory is not None:
+                    self.bin_directory.knows(op['bin_location_id'])
+
+        applied = sum(1 for result in results if result['success'])
+        failed = len(results) - applied
+        if rolled_back:
+            message = f'No changes applied: {failed - len(changed_ids)} record(s) not found'
+        elif failed:
+            message = f'{applied} of {len(results)} operations applied; {failed} record(s) not found'
+        else:
+            message = f'{applied} operations applied successfully'
+
+        return {
+            'success': failed == 0,
+            'message': message,
+            'applied': applied,
+            'failed': failed,
+            'results': results
+        }
 
-        # Record history after commit
-        new_state = {
-            'ProductUPC': previous_state['ProductUPC'],
-            'ProductDescription': previous_state['ProductDescription'],
-            'Qty_Cases': new_qty_cases,
-            'BinLocationID': previous_state['BinLocationID'],
-            'UnitQty2': previous_state['UnitQty2']
+    def import_bin_locations(self,
+                             rows: Iterable[Tuple[int, Optional[Dict[str, Any]], Optional[str]]],
+                             username: str,
+                             dry_run: bool = False,
+                             source_name: Optional[str] = None,
+                             chunk_size: int = 500) -> Dict[str, Any]:
+        """Upsert (UPC, bin, cases) rows from iter_import_rows in chunks
+
+        Each chunk resolves its UPCs and bin names with one query each, then
+        MERGEs on (ProductUPC, BinLocationID): new pairs are created, existing
+        ones get the new case quantity. Chunks commit separately, with their
+        history rows. A dry run reports the same diff without writing.
+
+        An error while reading or writing a chunk stops the import: earlier
+        chunks stay committed, and the report gets the failing row range in
+        `failed_rows` and the first row not imported in `stopped_at`.
+        """
+        report = {
+            'dry_run': dry_run,
+            'rows': 0,
+            'created': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'error_count': 0,
+            'errors': [],
+            'changes': [],
+            'stopped_at': None,
+            'failed_rows': None
         }
+        # (ProductUPC, BinLocationID) -> first row number, across the whole file
+        seen = {}
+        notes = f'Imported from {source_name}' if source_name else 'Imported'
 
-        self.insert_history_record(
-            record_id=record_id,
-            operation_type='ADJUST',
-            username=username,
-            previous_state=previous_state,
-            new_state=new_state,
-            adjustment_amount=adjustment,
-            notes=notes
-        )
+        chunk = []
+        last_row = 0
+        writing = False
+        try:
+            for row_number, row, error in rows:
+                last_row = row_number
+                report['rows'] += 1
+                if error:
+                    _report_import_error(report, row_number, error)
+                    continue
+                chunk.append((row_number, row))
+                if len(chunk) >= chunk_size:
+                    writing = True
+                    self._import_chunk(chunk, seen, report, username, dry_run, notes)
+                    writing = False
+                    chunk = []
+            if chunk:
+                writing = True
+                self._import_chunk(chunk, seen, report, username, dry_run, notes)
+                chunk = []
+        except Exception as e:
+            if not report['rows'] and isinstance(e, ValueError):
+                # Unreadable file or header: nothing was imported
+                raise
+            # The failed chunk's MERGE rolled back; rows read after it were never written
+            first = chunk[0][0] if chunk else last_row + 1
+            last = chunk[-1][0] if writing else last_row + 1
+            report['stopped_at'] = first
+            report['failed_rows'] = {'first': first, 'last': last}
+            _report_import_error(report, first, f'Import stopped at rows {first}-{last}: {e}')
+
+        return report
+
+    def _import_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]], seen: Dict[Tuple[str, int], int],
+                      report: Dict[str, Any], username: str, dry_run: bool, notes: str):
+        upcs = sorted({row['upc'] for _, row in chunk})
+        bin_names = sorted({row['bin'] for _, row in chunk})
 
-        return {'success': True, 'message': 'Quantity adjusted successfully'}
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(f'''
+                SELECT ProductUPC, ProductDescription, ISNULL(UnitQty2, 0) as UnitQty2
+                FROM dbo.Items_tbl
+                WHERE ProductUPC IN ({', '.join(['%s'] * len(upcs))})
+            ''', tuple(upcs))
+            products = {}
+            for product in cursor.fetchall():
+                products.setdefault(product['ProductUPC'].casefold(), product)
 
-    def delete_bin_location(self, record_id: int, username: str) -> Dict[str, Any]:
-        """Delete bin location record"""
-        # Get before state for history
-        previous_state = self._get_record_before_state(record_id)
+            cursor.execute(f'''
+                SELECT BinLocationID, BinLocation
+                FROM dbo.BinLocations_tbl
+                WHERE BinLocation IN ({', '.join(['%s'] * len(bin_names))})
+            ''', tuple(bin_names))
+            bins = {}
+            for bin_row in cursor.fetchall():
+                bins.setdefault(bin_row['BinLocation'].strip().casefold(), bin_row)
+
+        resolved = []
+        for row_number, row in chunk:
+            product = products.get(row['upc'].casefold())
+            bin_row = bins.get(row['bin'].casefold())
+            if product is None:
+                _report_import_error(report, row_number, f"Unknown product UPC: {row['upc']}")
+                continue
+            if bin_row is None:
+                _report_import_error(report, row_number, f"Unknown bin location: {row['bin']}")
+                continue
+            key = (product['ProductUPC'], bin_row['BinLocationID'])
+            if key in seen:
+                _report_import_error(report, row_number, f'Duplicate of row {seen[key]}')
+                continue
+            seen[key] = row_number
+            resolved.append({
+                'row': row_number,
+                'ProductUPC': product['ProductUPC'],
+                'ProductDescription': product['ProductDescription'],
+                'UnitQty2': product['UnitQty2'],
+                'BinLocationID': bin_row['BinLocationID'],
+                'BinLocation': bin_row['BinLocation'],
+                'Qty_Cases': row['cases']
+            })
+
+        if resolved:
+            if dry_run:
+                self._import_diff(resolved, report)
+            else:
+                self._import_merge(resolved, report, username, notes)
 
+    def _import_diff(self, resolved: List[Dict[str, Any]], report: Dict[str, Any]):
+        """Dry run: classify rows the way the MERGE would, without writing"""
+        values = ', '.join(['(%s, %s, %s)'] * len(resolved))
+        params = tuple(value for row in resolved
+                       for value in (row['row'], row['ProductUPC'], row['BinLocationID']))
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM Items_BinLocations WHERE id = %s', (record_id,))
-            conn.commit()
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(f'''
+                SELECT v.RowNum, ibl.id, ibl.Qty_Cases
+                FROM (VALUES {values}) AS v (RowNum, ProductUPC, BinLocationID)
+                INNER JOIN Items_BinLocations ibl
+                    ON ibl.ProductUPC = v.ProductUPC AND ibl.BinLocationID = v.BinLocationID
+            ''', params)
+            existing = {}
+            for match in cursor.fetchall():
+                existing.setdefault(match['RowNum'], []).append(match)
+
+        for row in resolved:
+            matches = existing.get(row['row'], [])
+            if not matches:
+                action, qty_before = 'create', None
+            else:
+                changed = [m for m in matches if m['Qty_Cases'] != row['Qty_Cases']]
+                action = 'update' if changed else 'unchanged'
+                qty_before = (changed or matches)[0]['Qty_Cases']
+
+            if action == 'create':
+                report['created'] += 1
+            elif action == 'update':
+                report['updated'] += len(changed)
+            else:
+                report['unchanged'] += 1
+
+            if action != 'unchanged' and len(report['changes']) < _IMPORT_REPORT_LIMIT:
+                report['changes'].append({
+                    'row': row['row'],
+                    'action': action,
+                    'upc': row['ProductUPC'],
+                    'description': row['ProductDescription'],
+                    'bin': row['BinLocation'],
+                    'qty_before': qty_before,
+                    'qty_after': row['Qty_Cases']
+                })
+
+    def _import_merge(self, resolved: List[Dict[str, Any]], report: Dict[str, Any],
+                      username: str, notes: str):
+        """Upsert one chunk with a single MERGE, recording history for every row it touched"""
+        central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
 
-        # Record history after commit
-        self.insert_history_record(
-            record_id=record_id,
-            operation_type='DELETE',
-            username=username,
-            previous_state=previous_state,
-            new_state=None
+        values = ', '.join(['(%s, %s, %s, %s, %s)'] * len(resolved))
+        batch = f'''
+            {_CHANGE_BATCH_PREAMBLE}
+            DECLARE @notes NVARCHAR(500) = %s;
+
+            MERGE Items_BinLocations WITH (HOLDLOCK) AS target
+            USING (VALUES {values})
+                AS source (ProductUPC, ProductDescription, BinLocationID, Qty_Cases, UnitQty2)
+            ON target.ProductUPC = source.ProductUPC
+            AND target.BinLocationID = source.BinLocationID
+            WHEN MATCHED AND ISNULL(target.Qty_Cases, -1) <> source.Qty_Cases THEN
+                UPDATE SET Qty_Cases = source.Qty_Cases,
+                           LastUpdate = @now
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT (ProductUPC, ProductDescription, Qty_Cases, BinLocationID, CreatedAt, LastUpdate)
+                VALUES (source.ProductUPC, source.ProductDescription, source.Qty_Cases,
+                        source.BinLocationID, @now, @now)
+            OUTPUT
+                inserted.id, CASE $action WHEN 'INSERT' THEN 'CREATE' ELSE 'UPDATE' END,
+                deleted.ProductUPC, deleted.ProductDescription, deleted.Qty_Cases,
+                deleted.BinLocationID, CASE $action WHEN 'INSERT' THEN NULL ELSE source.UnitQty2 END,
+                inserted.ProductUPC, inserted.ProductDescription, inserted.Qty_Cases,
+                inserted.BinLocationID, source.UnitQty2,
+                NULL, @notes, deleted.CreatedAt, deleted.LastUpdate
+            INTO @changes;
+
+            {self._history_sql()}
+        '''
+        params = (central_time, username, notes) + tuple(
+            value for row in resolved
+            for value in (row['ProductUPC'], row['ProductDescription'], row['BinLocationID'],
+                          row['Qty_Cases'], row['UnitQty2'])
         )
 
-        return {'success': True, 'message': 'Record deleted successfully'}
+        changes = self._apply_change_batch(batch, params, central_time, username)
+        created = sum(1 for change in changes if change['OperationType'] == 'CREATE')
+        updated = len(changes) - created
+        report['created'] += created
+        report['updated'] += updated
+        report['unchanged'] += max(len(resolved) - len(changes), 0)
 
-    def search_products(self, query: str, search_field: str = 'description') -> List[Dict[str, Any]]:
-        """Search products by description, UPC, or SKU with smart wildcard support"""
+    def _load_search_products(self) -> List[Dict[str, Any]]:
+        """Load every searchable (non-discontinued) item for the product index"""
         with self.get_connection() as conn:
             cursor = conn.cursor(as_dict=True)
+            cursor.execute('''
+                SELECT
+                    ProductID,
+                    ProductUPC,
+                    ProductSKU,
+                    ProductDescription,
+                    ISNULL(UnitQty2, 0) as UnitQty2
+                FROM dbo.Items_tbl
+                WHERE Discontinued = 0
+            ''')
+            return cursor.fetchall()
 
-            # Smart wildcard: if user includes %, use their exact pattern
-            # Otherwise, auto-wrap with % for standard substring search
-            if '%' in query:
-                search_pattern = query
-                # If pattern is just wildcards (no actual search text), treat as "show all"
-                stripped = query.replace('%', '').strip()
-                if not stripped:
-                    search_pattern = '%'
-                # If pattern doesn't end with %, add it for "contains" behavior
-                # This makes term1%term2 match "term1...term2...more" not just "term1...term2"
-                elif not search_pattern.endswith('%'):
-                    search_pattern = search_pattern + '%'
-            else:
-                search_pattern = f'%{query}%'
+    def search_products(self, query: str, search_field: str = 'description') -> List[Dict[str, Any]]:
+        """Search products by description, UPC, or SKU with smart wildcard support"""
+        search_pattern = build_search_pattern(query)
 
-            # Determine which field to search
-            field_map = {
-                'description': 'ProductDescription',
-                'upc': 'ProductUPC',
-                'sku': 'ProductSKU'
-            }
-            field_name = field_map.get(search_field, 'ProductDescription')
+        if self.product_index is not None:
+            results = self.product_index.search(search_pattern, search_field)
+            if results is not None:
+                return results
+
+        # Determine which field to search
+        field_name = PRODUCT_SEARCH_FIELDS.get(search_field, 'ProductDescription')
+
+        if self.search_cache is not None:
+            return self.search_cache.get_or_load(
+                f'products:{field_name}', search_pattern, field_name,
+                lambda: self._query_products(search_pattern, field_name))
+        return self._query_products(search_pattern, field_name)
+
+    def _query_products(self, search_pattern: str, field_name: str) -> List[Dict[str, Any]]:
+        if self.replica is not None:
+            results = self.replica.search_products(search_pattern, field_name)
+            if results is not None:
+                return results
 
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
             cursor.execute(f'''
                 SELECT TOP 50
                     ProductID,
@@ -363,26 +1718,36 @@ class MSSQLManager:
             ''', (search_pattern,))
             return cursor.fetchall()
 
-    def search_bin_locations(self, query: str) -> List[Dict[str, Any]]:
-        """Search bin locations with smart wildcard support"""
+    def _load_bins(self) -> List[Dict[str, Any]]:
+        """Load the whole bin table for the bin directory"""
         with self.get_connection() as conn:
             cursor = conn.cursor(as_dict=True)
+            cursor.execute('SELECT BinLocationID, BinLocation FROM dbo.BinLocations_tbl ORDER BY BinLocation')
+            return cursor.fetchall()
 
-            # Smart wildcard: if user includes %, use their exact pattern
-            # Otherwise, auto-wrap with % for standard substring search
-            if '%' in query:
-                search_pattern = query
-                # If pattern is just wildcards (no actual search text), treat as "show all"
-                stripped = query.replace('%', '').strip()
-                if not stripped:
-                    search_pattern = '%'
-                # If pattern doesn't end with %, add it for "contains" behavior
-                # This makes term1%term2 match "term1...term2...more" not just "term1...term2"
-                elif not search_pattern.endswith('%'):
-                    search_pattern = search_pattern + '%'
-            else:
-                search_pattern = f'%{query}%'
+    def search_bin_locations(self, query: str) -> List[Dict[str, Any]]:
+        """Search bin locations with smart wildcard support"""
+        search_pattern = build_search_pattern(query)
+
+        if self.bin_directory is not None:
+            results = self.bin_directory.search(search_pattern)
+            if results is not None:
+                return results
+
+        if self.search_cache is not None:
+            return self.search_cache.get_or_load(
+                'bins', search_pattern, 'BinLocation',
+                lambda: self._query_bins(search_pattern))
+        return self._query_bins(search_pattern)
+
+    def _query_bins(self, search_pattern: str) -> List[Dict[str, Any]]:
+        if self.replica is not None:
+            results = self.replica.search_bins(search_pattern)
+            if results is not None:
+                return results
 
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
             cursor.execute('''
                 SELECT TOP 50
                     BinLocationID,
@@ -394,8 +1759,33 @@ class MSSQLManager:
             ''', (search_pattern,))
             return cursor.fetchall()
 
+    def _load_bin_usage(self) -> Tuple[List[Dict[str, Any]], Dict[int, int]]:
+        """Load every bin and its Items_BinLocations row count for the unused-bins set"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute('SELECT BinLocationID, BinLocation FROM dbo.BinLocations_tbl ORDER BY BinLocation')
+            bins = cursor.fetchall()
+            cursor.execute('''
+                SELECT BinLocationID, COUNT(*) as row_count
+                FROM dbo.Items_BinLocations
+                WHERE BinLocationID IS NOT NULL
+                GROUP BY BinLocationID
+            ''')
+            counts = {row['BinLocationID']: row['row_count'] for row in cursor.fetchall()}
+        return bins, counts
+
     def get_unused_bin_locations(self) -> List[Dict[str, Any]]:
         """Get bin locations that are not used in Items_BinLocations"""
+        if self.unused_bins is not None:
+            unused = self.unused_bins.unused()
+            if unused is not None:
+                return unused
+
+        if self.replica is not None:
+            unused = self.replica.unused_bins()
+            if unused is not None:
+                return unused
+
         with self.get_connection() as conn:
             cursor = conn.cursor(as_dict=True)
             cursor.execute('''
@@ -410,6 +1800,107 @@ class MSSQLManager:
             ''')
             return cursor.fetchall()
 
+    # ========================================================================
+    # Read Replica Methods
+    # ========================================================================
+
+    def _replica_checksums(self, cursor) -> Tuple[Optional[int], Optional[int]]:
+        cursor.execute('''
+            SELECT
+                (SELECT CHECKSUM_AGG(CHECKSUM(BinLocationID, BinLocation))
+                 FROM dbo.BinLocations_tbl) as bins_checksum,
+                (SELECT CHECKSUM_AGG(CHECKSUM(ProductID, ProductUPC, ProductSKU, ProductDescription,
+                                              UnitQty2, Discontinued))
+                 FROM dbo.Items_tbl) as items_checksum
+        ''')
+        row = cursor.fetchone()
+        return row['bins_checksum'], row['items_checksum']
+
+    @staticmethod
+    def _replica_lookup_rows(cursor, bins: bool, items: bool) -> Dict[str, Any]:
+        lookups = {'bins': None, 'items': None}
+        if bins:
+            cursor.execute('SELECT BinLocationID, BinLocation FROM dbo.BinLocations_tbl')
+            lookups['bins'] = cursor.fetchall()
+        if items:
+            cursor.execute('''
+                SELECT ProductID, ProductUPC, ProductSKU, ProductDescription, UnitQty2, Discontinued
+                FROM dbo.Items_tbl
+            ''')
+            lookups['items'] = cursor.fetchall()
+        return lookups
+
+    def _load_replica_snapshot(self) -> Dict[str, Any]:
+        """Everything the read replica holds, for a full reload"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            # History high-water mark first: deletes committed during the copy
+            # are applied as tombstones by the next incremental sync
+            cursor.execute('SELECT MAX(HistoryID) as history_id FROM dbo.Items_BinLocations_History')
+            history_id = cursor.fetchone()['history_id'] or 0
+            bins_checksum, items_checksum = self._replica_checksums(cursor)
+            cursor.execute('''
+                SELECT id, ProductUPC, ProductDescription, Qty_Cases, BinLocationID, CreatedAt, LastUpdate
+                FROM dbo.Items_BinLocations
+            ''')
+            rows = cursor.fetchall()
+            lookups = self._replica_lookup_rows(cursor, bins=True, items=True)
+        return {
+            'history_id': history_id,
+            'rows': rows,
+            'bins_checksum': bins_checksum,
+            'items_checksum': items_checksum,
+            **lookups
+        }
+
+    def _load_replica_changes(self, last_update: Optional[datetime], history_id: int,
+                              checksums: Optional[Tuple[Optional[int], Optional[int]]]) -> Dict[str, Any]:
+        """Rows, tombstones and (when checksums are given) changed lookups since the last sync"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute('SELECT MAX(HistoryID) as history_id FROM dbo.Items_BinLocations_History')
+            new_history_id = cursor.fetchone()['history_id'] or 0
+
+            # Same overlap as get_bin_location_changes; rows are upserted by id
+            where_sql = ''
+            params = ()
+            if last_update:
+                where_sql = 'WHERE LastUpdate >= DATEADD(second, %s, %s)'
+                params = (-_DELTA_OVERLAP_SECONDS, last_update)
+            cursor.execute(f'''
+                SELECT id, ProductUPC, ProductDescription, Qty_Cases, BinLocationID, CreatedAt, LastUpdate
+                FROM dbo.Items_BinLocations
+                {where_sql}
+            ''', params)
+            rows = cursor.fetchall()
+
+            # Locking read, as in _aggregate_history: a lower HistoryID still
+            # being committed is waited for instead of skipped
+            cursor.execute('''
+                SELECT HistoryID, RecordID
+                FROM dbo.Items_BinLocations_History WITH (READCOMMITTEDLOCK)
+                WHERE OperationType = 'DELETE'
+                AND HistoryID > %s
+                AND HistoryID <= %s
+            ''', (history_id, new_history_id))
+            deleted = [(row['HistoryID'], row['RecordID']) for row in cursor.fetchall()]
+
+            result = {'history_id': new_history_id, 'rows': rows, 'deleted': deleted,
+                      'bins': None, 'items': None, 'bins_checksum': None, 'items_checksum': None}
+            if checksums is not None:
+                bins_checksum, items_checksum = self._replica_checksums(cursor)
+                result.update(self._replica_lookup_rows(cursor,
+                                                        bins=bins_checksum != checksums[0],
+                                                        items=items_checksum != checksums[1]))
+                result['bins_checksum'] = bins_checksum
+                result['items_checksum'] = items_checksum
+        return result
+
+    def sync_replica(self) -> int:
+        """Catch the read replica up with SQL Server"""
+        return self.replica.sync(self._history_rollup_source(),
+                                 self._load_replica_snapshot, self._load_replica_changes)
+
     # ========================================================================
     # Authentication Methods
     # ========================================================================
@@ -436,26 +1927,6 @@ class MSSQLManager:
     # History Recording Methods
     # ========================================================================
 
-    def _get_record_before_state(self, record_id: int) -> Optional[Dict[str, Any]]:
-        """Fetch complete record state before modification (for history tracking)"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor(as_dict=True)
-            cursor.execute('''
-                SELECT
-                    ibl.id,
-                    ibl.ProductUPC,
-                    ibl.ProductDescription,
-                    ibl.Qty_Cases,
-                    ibl.BinLocationID,
-                    ibl.CreatedAt,
-                    ibl.LastUpdate,
-                    ISNULL(it.UnitQty2, 0) as UnitQty2
-                FROM Items_BinLocations ibl
-                LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
-                WHERE ibl.id = %s
-            ''', (record_id,))
-            return cursor.fetchone()
-
     def insert_history_record(self,
                             record_id: int,
                             operation_type: str,
@@ -464,52 +1935,152 @@ class MSSQLManager:
                             new_state: Optional[Dict[str, Any]] = None,
                             adjustment_amount: Optional[int] = None,
                             notes: Optional[str] = None) -> None:
-        """Insert history record for audit trail"""
+        """Insert history record for audit trail (queued when the history writer is enabled)"""
         # Get current Central Time (naive datetime - SQL Server doesn't handle timezone-aware datetimes)
         central_time = datetime.now(ZoneInfo("America/Chicago")).replace(tzinfo=None)
 
+        row = {
+            'RecordID': record_id,
+            'OperationType': operation_type,
+            'Timestamp': central_time,
+            'Username': username,
+            # Previous state
+            'PreviousProductUPC': previous_state['ProductUPC'] if previous_state else None,
+            'PreviousProductDescription': previous_state['ProductDescription'] if previous_state else None,
+            'PreviousQty_Cases': previous_state['Qty_Cases'] if previous_state else None,
+            'PreviousBinLocationID': previous_state['BinLocationID'] if previous_state else None,
+            'PreviousUnitQty2': previous_state['UnitQty2'] if previous_state else None,
+            # New state
+            'NewProductUPC': new_state['ProductUPC'] if new_state else None,
+            'NewProductDescription': new_state['ProductDescription'] if new_state else None,
+            'NewQty_Cases': new_state['Qty_Cases'] if new_state else None,
+            'NewBinLocationID': new_state['BinLocationID'] if new_state else None,
+            'NewUnitQty2': new_state['UnitQty2'] if new_state else None,
+            # Adjustment & notes
+            'AdjustmentAmount': adjustment_amount,
+            'Notes': notes,
+            # Metadata
+            'RecordCreatedAt': previous_state['CreatedAt'] if previous_state else None,
+            'RecordLastUpdate': previous_state['LastUpdate'] if previous_state else None
+        }
+
+        if self.history_writer is not None:
+            self.history_writer.write([row])
+        else:
+            self.insert_history_rows([row])
+
+    def insert_history_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert history rows with one multi-row INSERT per 100 rows"""
+        columns = ', '.join(HISTORY_COLUMNS)
+        placeholders = '(' + ', '.join(['%s'] * len(HISTORY_COLUMNS)) + ')'
+
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO dbo.Items_BinLocations_History (
-                    RecordID, OperationType, Timestamp, Username,
-                    PreviousProductUPC, PreviousProductDescription, PreviousQty_Cases,
-                    PreviousBinLocationID, PreviousUnitQty2,
-                    NewProductUPC, NewProductDescription, NewQty_Cases,
-                    NewBinLocationID, NewUnitQty2,
-                    AdjustmentAmount, Notes,
-                    RecordCreatedAt, RecordLastUpdate
-                ) VALUES (
-                    %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s, %s,
-                    %s, %s, %s, %s
+            # Keep each INSERT ... VALUES well under its 1000-row limit
+            for start in range(0, len(rows), 100):
+                batch = rows[start:start + 100]
+                cursor.execute(
+                    f'INSERT INTO dbo.Items_BinLocations_History ({columns}) VALUES '
+                    + ', '.join([placeholders] * len(batch)),
+                    tuple(row.get(column) for row in batch for column in HISTORY_COLUMNS)
                 )
-            ''', (
-                record_id,
-                operation_type,
-                central_time,
-                username,
-                # Previous state
-                previous_state['ProductUPC'] if previous_state else None,
-                previous_state['ProductDescription'] if previous_state else None,
-                previous_state['Qty_Cases'] if previous_state else None,
-                previous_state['BinLocationID'] if previous_state else None,
-                previous_state['UnitQty2'] if previous_state else None,
-                # New state
-                new_state['ProductUPC'] if new_state else None,
-                new_state['ProductDescription'] if new_state else None,
-                new_state['Qty_Cases'] if new_state else None,
-                new_state['BinLocationID'] if new_state else None,
-                new_state['UnitQty2'] if new_state else None,
-                # Adjustment & notes
-                adjustment_amount,
-                notes,
-                # Metadata
-                previous_state['CreatedAt'] if previous_state else None,
-                previous_state['LastUpdate'] if previous_state else None
-            ))
             conn.commit()
+        # Also reached from the history writer, once its rows are actually in MSSQL
+        if rows and self._rollup_task is not None:
+            self._rollup_task.trigger()
+
+    def _history_query(self,
+                       record_id: Optional[int] = None,
+                       operation_type: Optional[str] = None,
+                       username: Optional[str] = None,
+                       start_date: Optional[str] = None,
+                       end_date: Optional[str] = None,
+                       limit: Optional[int] = 500,
+                       join_bins: bool = True,
+                       cursor_token: Optional[str] = None) -> Tuple[str, Tuple]:
+        """Build the filtered history query and its parameters
+
+        Rows are ordered newest first, ties broken by HistoryID ascending:
+        the Timestamp indexes carry the clustered HistoryID key ascending,
+        so that order (and the keyset after cursor_token) is an index seek
+        without a sort.
+        """
+        # Build dynamic WHERE clause
+        where_clauses = []
+        params = []
+
+        if record_id is not None:
+            where_clauses.append('h.RecordID = %s')
+            params.append(record_id)
+
+        if operation_type and operation_type != 'ALL':
+            where_clauses.append('h.OperationType = %s')
+            params.append(operation_type)
+
+        if username:
+            where_clauses.append('h.Username = %s')
+            params.append(username)
+
+        if start_date:
+            where_clauses.append('h.Timestamp >= %s')
+            params.append(start_date)
+
+        if end_date:
+            where_clauses.append('h.Timestamp <= %s')
+            params.append(end_date)
+
+        # Keyset: continue strictly after the (Timestamp, HistoryID) of the last row served
+        if cursor_token:
+            values = decode_cursor(cursor_token)
+            if len(values) != 2:
+                raise ValueError('Invalid cursor')
+            last_timestamp, last_id = values
+            where_clauses.append('(h.Timestamp < %s OR (h.Timestamp = %s AND h.HistoryID > %s))')
+            params.extend([last_timestamp, last_timestamp, last_id])
+
+        where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
+
+        # Build query with TOP clause directly (not in subquery)
+        top_clause = f'TOP {int(limit)}' if limit else ''
+
+        # Without the JOINs the bin names are filled from the bin directory
+        if join_bins:
+            prev_bin = 'prev_bl.BinLocation as PreviousBinLocation,'
+            new_bin = 'new_bl.BinLocation as NewBinLocation,'
+            bin_joins = (
+                'LEFT JOIN dbo.BinLocations_tbl prev_bl ON h.PreviousBinLocationID = prev_bl.BinLocationID\n'
+                '            LEFT JOIN dbo.BinLocations_tbl new_bl ON h.NewBinLocationID = new_bl.BinLocationID'
+            )
+        else:
+            prev_bin = new_bin = bin_joins = ''
+
+        query = f'''
+            SELECT {top_clause}
+                h.HistoryID,
+                h.RecordID,
+                h.OperationType,
+                h.Timestamp,
+                h.Username,
+                h.PreviousProductUPC,
+                h.PreviousProductDescription,
+                h.PreviousQty_Cases,
+                h.PreviousBinLocationID,
+                {prev_bin}
+                h.PreviousUnitQty2,
+                h.NewProductUPC,
+                h.NewProductDescription,
+                h.NewQty_Cases,
+                h.NewBinLocationID,
+                {new_bin}
+                h.NewUnitQty2,
+                h.AdjustmentAmount,
+                h.Notes
+            FROM dbo.Items_BinLocations_History h
+            {bin_joins}
+            {where_sql}
+            ORDER BY h.Timestamp DESC, h.HistoryID ASC
+        '''
+        return query, tuple(params)
 
     def get_history_records(self,
                            record_id: Optional[int] = None,
@@ -519,71 +2090,120 @@ class MSSQLManager:
                            end_date: Optional[str] = None,
                            limit: int = 500) -> List[Dict[str, Any]]:
         """Get history records with optional filtering"""
+        use_directory = self._bin_directory_ready()
+        query, params = self._history_query(record_id, operation_type, username,
+                                            start_date, end_date, limit,
+                                            join_bins=not use_directory)
         with self.get_connection() as conn:
             cursor = conn.cursor(as_dict=True)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
 
-            # Build dynamic WHERE clause
-            where_clauses = []
-            params = []
-
-            if record_id is not None:
-                where_clauses.append('h.RecordID = %s')
-                params.append(record_id)
+        if use_directory:
+            self._decorate_bin_names(rows, *_HISTORY_BIN_COLUMNS)
+        return rows
+
+    def query_history_records(self,
+                              record_id: Optional[int] = None,
+                              operation_type: Optional[str] = None,
+                              username: Optional[str] = None,
+                              start_date: Optional[str] = None,
+                              end_date: Optional[str] = None,
+                              limit: int = 500,
+                              cursor_token: Optional[str] = None) -> Dict[str, Any]:
+        """Get one keyset-paginated page of history records, newest first"""
+        use_directory = self._bin_directory_ready()
+        query, params = self._history_query(record_id, operation_type, username,
+                                            start_date, end_date, int(limit) + 1,
+                                            join_bins=not use_directory,
+                                            cursor_token=cursor_token)
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
 
-            if operation_type and operation_type != 'ALL':
-                where_clauses.append('h.OperationType = %s')
-                params.append(operation_type)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if use_directory:
+            self._decorate_bin_names(rows, *_HISTORY_BIN_COLUMNS)
+
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_cursor([rows[-1]['Timestamp'], rows[-1]['HistoryID']])
+
+        return {'data': rows, 'next_cursor': next_cursor}
+
+    def iter_history_records(self,
+                             record_id: Optional[int] = None,
+                             operation_type: Optional[str] = None,
+                             username: Optional[str] = None,
+                             start_date: Optional[str] = None,
+                             end_date: Optional[str] = None,
+                             limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield history records one at a time straight from the cursor (no limit by default)"""
+        use_directory = self._bin_directory_ready()
+        query, params = self._history_query(record_id, operation_type, username,
+                                            start_date, end_date, limit,
+                                            join_bins=not use_directory)
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(query, params)
+            for row in cursor:
+                if use_directory:
+                    self._decorate_bin_names((row,), *_HISTORY_BIN_COLUMNS)
+                yield row
 
-            if username:
-                where_clauses.append('h.Username = %s')
-                params.append(username)
+    def _history_rollup_source(self) -> str:
+        config = self.sqlite_manager.get_config()
+        if not config:
+            raise Exception("Database configuration not found. Please configure in Settings.")
+        return f"{config['server']}:{config['port']}/{config['database']}"
 
-            if start_date:
-                where_clauses.append('h.Timestamp >= %s')
-                params.append(start_date)
+    def _history_max_id(self) -> int:
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute('SELECT MAX(HistoryID) as history_id FROM dbo.Items_BinLocations_History')
+            return cursor.fetchone()['history_id'] or 0
 
-            if end_date:
-                where_clauses.append('h.Timestamp <= %s')
-                params.append(end_date)
+    def _aggregate_history(self, after_id: int, upto_id: int) -> List[Dict[str, Any]]:
+        """Grouped history counts for a HistoryID range (a clustered-key seek)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            # Locking read even under READ_COMMITTED_SNAPSHOT: a lower HistoryID
+            # still being committed is waited for instead of skipped for good
+            cursor.execute('''
+                SELECT
+                    CONVERT(char(10), Timestamp, 23) as day,
+                    OperationType,
+                    Username,
+                    COUNT(*) as operations,
+                    MIN(Timestamp) as first_ts,
+                    MAX(Timestamp) as last_ts
+                FROM dbo.Items_BinLocations_History WITH (READCOMMITTEDLOCK)
+                WHERE HistoryID > %s AND HistoryID <= %s
+                GROUP BY CONVERT(char(10), Timestamp, 23), OperationType, Username
+            ''', (after_id, upto_id))
+            return cursor.fetchall()
 
-            where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
+    def sync_history_rollups(self) -> int:
+        """Apply history rows added since the last sync to the rollups"""
+        return self.history_rollups.sync(self._history_rollup_source(),
+                                         self._history_max_id, self._aggregate_history)
 
-            # Build query with TOP clause directly (not in subquery)
-            top_clause = f'TOP {limit}' if limit else ''
-
-            query = f'''
-                SELECT {top_clause}
-                    h.HistoryID,
-                    h.RecordID,
-                    h.OperationType,
-                    h.Timestamp,
-                    h.Username,
-                    h.PreviousProductUPC,
-                    h.PreviousProductDescription,
-                    h.PreviousQty_Cases,
-                    h.PreviousBinLocationID,
-                    prev_bl.BinLocation as PreviousBinLocation,
-                    h.PreviousUnitQty2,
-                    h.NewProductUPC,
-                    h.NewProductDescription,
-                    h.NewQty_Cases,
-                    h.NewBinLocationID,
-                    new_bl.BinLocation as NewBinLocation,
-                    h.NewUnitQty2,
-                    h.AdjustmentAmount,
-                    h.Notes
-                FROM dbo.Items_BinLocations_History h
-                LEFT JOIN dbo.BinLocations_tbl prev_bl ON h.PreviousBinLocationID = prev_bl.BinLocationID
-                LEFT JOIN dbo.BinLocations_tbl new_bl ON h.NewBinLocationID = new_bl.BinLocationID
-                {where_sql}
-                ORDER BY h.Timestamp DESC
-            '''
+    def _history_rollups_ready(self) -> bool:
+        """Whether stats are served from the rollups (False until the first backfill completes)
 
-            cursor.execute(query, tuple(params))
-            return cursor.fetchall()
+        Not synced here: writes trigger the sync task and its interval
+        covers external writes, so a request never waits on MSSQL or on
+        another request's sync.
+        """
+        return self.history_rollups is not None and self.history_rollups.ready
 
     def get_history_stats(self) -> Dict[str, Any]:
         """Get summary statistics for history"""
+        if self._history_rollups_ready():
+            return self.history_rollups.summary()
+
         with self.get_connection() as conn:
             cursor = conn.cursor(as_dict=True)
             cursor.execute('''
@@ -599,3 +2219,64 @@ class MSSQLManager:
                 FROM dbo.Items_BinLocations_History
             ''')
             return cursor.fetchone() or {}
+
+    def _history_breakdown(self, group_expr: str, alias: str, extra_columns: str, order_sql: str,
+                           start_date: Optional[str], end_date: Optional[str],
+                           operation_type: Optional[str]) -> List[Dict[str, Any]]:
+        """Grouped history counts straight from MSSQL (used until the rollups are ready)"""
+        where_clauses = []
+        params = []
+        if start_date:
+            where_clauses.append('Timestamp >= %s')
+            params.append(start_date)
+        if end_date:
+            where_clauses.append('Timestamp < DATEADD(day, 1, %s)')
+            params.append(end_date)
+        if operation_type and operation_type != 'ALL':
+            where_clauses.append('OperationType = %s')
+            params.append(operation_type)
+        where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
+
+        operation_sums = ',\n'.join(
+            f"SUM(CASE WHEN OperationType = '{operation}' THEN 1 ELSE 0 END) as {column}"
+            for operation, column in OPERATION_COLUMNS.items()
+        )
+        with self.get_connection() as conn:
+            cursor = conn.cursor(as_dict=True)
+            cursor.execute(f'''
+                SELECT
+                    {group_expr} as {alias},
+                    COUNT(*) as total_operations,
+                    {operation_sums},
+                    {extra_columns}
+                FROM dbo.Items_BinLocations_History
+                {where_sql}
+                GROUP BY {group_expr}
+                ORDER BY {order_sql}
+            ''', tuple(params))
+            return cursor.fetchall()
+
+    def get_history_daily(self,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          operation_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-day operation counts for an inclusive date range, oldest first"""
+        start_day, end_day = parse_day(start_date), parse_day(end_date)
+        if self._history_rollups_ready():
+            return self.history_rollups.daily(start_day, end_day, operation_type)
+        return self._history_breakdown('CONVERT(char(10), Timestamp, 23)', 'day',
+                                       'COUNT(DISTINCT Username) as unique_users', 'day',
+                                       start_day, end_day, operation_type)
+
+    def get_history_users(self,
+                          start_date: Optional[str] = None,
+                          end_date: Optional[str] = None,
+                          operation_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-user operation counts for an inclusive date range, busiest first"""
+        start_day, end_day = parse_day(start_date), parse_day(end_date)
+        if self._history_rollups_ready():
+            return self.history_rollups.users(start_day, end_day, operation_type)
+        return self._history_breakdown('Username', 'Username',
+                                       'MIN(Timestamp) as first_operation, MAX(Timestamp) as last_operation',
+                                       'total_operations DESC, Username',
+                                       start_day, end_day, operation_type)
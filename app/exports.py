@@ -0,0 +1,279 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment, Border, Side
+
+
+# ============================================================================
+# Excel Layout
+# ============================================================================
+
+BIN_LOCATION_HEADERS = [
+    'Bin Location',
+    'Product Name',
+    'Product UPC',
+    'Case Quantity',
+    'Qty per Case',
+    'Total Quantity',
+    'Bin Location ID',
+    'Created At',
+    'Last Updated'
+]
+
+BIN_LOCATION_COLUMN_WIDTHS = {
+    'A': 18,  # Bin Location
+    'B': 35,  # Product Name
+    'C': 15,  # Product UPC
+    'D': 15,  # Case Quantity
+    'E': 14,  # Qty per Case
+    'F': 15,  # Total Quantity
+    'G': 16,  # Bin Location ID
+    'H': 20,  # Created At
+    'I': 20   # Last Updated
+}
+
+# Numeric columns (1-based): right-aligned, with thousand separators on 4 and 6
+NUMBER_COLUMNS = (4, 5, 6)
+THOUSANDS_COLUMNS = (4, 6)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _bin_location_styles() -> List[NamedStyle]:
+    """Build the shared named styles - Material Design 3 Slate theme"""
+    side = Side(style='thin', color='dadce0')
+    border = Border(left=side, right=side, top=side, bottom=side)
+    alt_row_fill = PatternFill(start_color='f8f9fa', end_color='f8f9fa', fill_type='solid')
+    totals_fill = PatternFill(start_color='eceff1', end_color='eceff1', fill_type='solid')
+
+    styles = []
+
+    header = NamedStyle(name='bl_header')
+    header.fill = PatternFill(start_color='546e7a', end_color='546e7a', fill_type='solid')
+    header.font = Font(bold=True, color='FFFFFF', size=11)
+    header.alignment = Alignment(horizontal='center', vertical='center')
+    header.border = border
+    styles.append(header)
+
+    # Data cells: alignment/number format variants, each with and without the alternate fill
+    variants = {
+        'left': (Alignment(horizontal='left'), 'General'),
+        'center': (Alignment(horizontal='center'), 'General'),
+        'right': (Alignment(horizontal='right'), 'General'),
+        'thousands': (Alignment(horizontal='right'), '#,##0')
+    }
+    for name, (alignment, number_format) in variants.items():
+        for alt in (False, True):
+            style = NamedStyle(name=f"bl_{name}{'_alt' if alt else ''}")
+            style.alignment = alignment
+            style.number_format = number_format
+            style.border = border
+            if alt:
+                style.fill = alt_row_fill
+            styles.append(style)
+
+    for name, (alignment, number_format) in (('left', variants['left']),
+                                             ('right', variants['right']),
+                                             ('thousands', variants['thousands'])):
+        style = NamedStyle(name=f'bl_totals_{name}')
+        style.alignment = alignment
+        style.number_format = number_format
+        style.border = border
+        style.fill = totals_fill
+        style.font = Font(bold=True, size=11)
+        styles.append(style)
+
+    return styles
+
+
+def _format_timestamp(value: Any) -> Any:
+    """Format a datetime (or ISO/HTTP-date string from the browser) for display"""
+    if not value:
+        return 'N/A'
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                value = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return value
+    return value.strftime('%m/%d/%Y %I:%M %p')
+
+
+def _bin_location_row(record: Dict[str, Any]) -> Tuple[List[Any], int, Any]:
+    """Extract display values for one record; returns (values, cases, items)"""
+    qty_cases = record.get('Qty_Cases') or 0
+    unit_qty2 = record.get('UnitQty2')
+    total_qty = record.get('TotalQuantity')
+    items = 0
+
+    # Handle null UnitQty2
+    if unit_qty2 is None or unit_qty2 == 0:
+        unit_qty2_display = 'Not Set'
+        total_qty_display = '—'
+    else:
+        unit_qty2_display = unit_qty2
+        if total_qty is not None:
+            total_qty_display = total_qty
+            items = total_qty
+        else:
+            total_qty_display = '—'
+
+    values = [
+        record.get('BinLocation') or 'N/A',
+        record.get('ProductDescription') or 'N/A',
+        record.get('ProductUPC') or 'N/A',
+        qty_cases,
+        unit_qty2_display,
+        total_qty_display,
+        record.get('BinLocationID') or 'N/A',
+        _format_timestamp(record.get('CreatedAt')),
+        _format_timestamp(record.get('LastUpdate'))
+    ]
+    return values, qty_cases, items
+
+
+def write_bin_locations_xlsx(records: Iterable[Dict[str, Any]], fileobj) -> int:
+    """Write records to an .xlsx file object in write-only mode; returns the record count"""
+    wb = Workbook(write_only=True)
+    for style in _bin_location_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet("Bin Locations")
+
+    # Column widths must be set before the first row is written
+    for col, width in BIN_LOCATION_COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled(header, 'bl_header') for header in BIN_LOCATION_HEADERS])
+
+    # Track totals
+    total_cases = 0
+    total_items = 0
+    count = 0
+
+    for row_num, record in enumerate(records, 2):
+        values, cases, items = _bin_location_row(record)
+        total_cases += cases
+        total_items += items
+        count += 1
+
+        # Alternating row colors
+        suffix = '_alt' if row_num % 2 == 0 else ''
+        cells = []
+        for col_num, value in enumerate(values, 1):
+            if col_num in NUMBER_COLUMNS:
+                if isinstance(value, (int, float)):
+                    name = 'thousands' if col_num in THOUSANDS_COLUMNS else 'right'
+                else:
+                    name = 'center'
+            else:
+                name = 'left'
+            cells.append(styled(value, f'bl_{name}{suffix}'))
+        ws.append(cells)
+
+    # Add totals row
+    totals_data = [
+        'TOTALS',
+        '',
+        '',
+        total_cases,
+        '',
+        total_items if total_items > 0 else '—',
+        f'{count} records',
+        '',
+        ''
+    ]
+    totals = []
+    for col_num, value in enumerate(totals_data, 1):
+        if col_num in THOUSANDS_COLUMNS:
+            name = 'thousands' if isinstance(value, (int, float)) else 'right'
+        else:
+            name = 'left'
+        totals.append(styled(value, f'bl_totals_{name}'))
+    ws.append(totals)
+
+    wb.save(fileobj)
+    return count
+
+
+# ============================================================================
+# CSV Export
+# ============================================================================
+
+BIN_LOCATION_CSV_COLUMNS = [
+    'id',
+    'BinLocationID',
+    'BinLocation',
+    'ProductUPC',
+    'ProductDescription',
+    'Qty_Cases',
+    'UnitQty2',
+    'TotalQuantity',
+    'CreatedAt',
+    'LastUpdate'
+]
+
+HISTORY_CSV_COLUMNS = [
+    'HistoryID',
+    'RecordID',
+    'OperationType',
+    'Timestamp',
+    'Username',
+    'PreviousProductUPC',
+    'PreviousProductDescription',
+    'PreviousQty_Cases',
+    'PreviousBinLocationID',
+    'PreviousBinLocation',
+    'PreviousUnitQty2',
+    'NewProductUPC',
+    'NewProductDescription',
+    'NewQty_Cases',
+    'NewBinLocationID',
+    'NewBinLocation',
+    'NewUnitQty2',
+    'AdjustmentAmount',
+    'Notes'
+]
+
+
+def iter_csv(records: Iterable[Dict[str, Any]], columns: List[str], chunk_rows: int = 1000) -> Iterator[bytes]:
+    """Encode records as UTF-8 CSV, yielding one chunk per chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+
+    for record in records:
+        writer.writerow([
+            value.isoformat(sep=' ') if isinstance(value, datetime) else value
+            for value in (record.get(column) for column in columns)
+        ])
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a stream of byte chunks incrementally"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
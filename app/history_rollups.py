@@ -0,0 +1,255 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# Operation type -> stats column, shared by the rollup and fallback queries
+OPERATION_COLUMNS = {
+    'CREATE': 'creates',
+    'UPDATE': 'updates',
+    'ADJUST': 'adjustments',
+    'DELETE': 'deletes'
+}
+
+
+def parse_day(value: Optional[str]) -> Optional[str]:
+    """Normalize a date filter (YYYY-MM-DD, optionally with a time) to YYYY-MM-DD"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f'Invalid date: {value}')
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class HistoryRollupStore:
+    """Per-day, per-operation, per-user history counts kept in SQLite
+
+    Rows are added in HistoryID order: sync() aggregates history rows after
+    the last processed HistoryID (a clustered-key range on the server) and
+    applies the counts and the new high-water mark in one transaction, so
+    several processes can sync the same file safely.
+    """
+
+    def __init__(self, db_path: str = '/app/data/history_rollups.db', batch_size: int = 50000):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.lock = Lock()
+        self.ready = False
+        self.syncs = 0
+        self.last_applied = 0
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize SQLite database with rollup and state tables"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS history_rollups (
+                    day TEXT NOT NULL,
+                    operation TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    operations INTEGER NOT NULL,
+                    first_ts TEXT,
+                    last_ts TEXT,
+                    PRIMARY KEY (day, operation, username)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rollup_state (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT,
+                    last_history_id INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            cursor.execute('INSERT OR IGNORE INTO rollup_state (id, last_history_id) VALUES (1, 0)')
+            conn.commit()
+
+    @contextmanager
+    def get_connection(self):
+        """Get SQLite connection with automatic cleanup"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _state(self, conn) -> Tuple[Optional[str], int]:
+        row = conn.execute('SELECT source, last_history_id FROM rollup_state WHERE id = 1').fetchone()
+        return row['source'], row['last_history_id']
+
+    def sync(self, source: str,
+             max_history_id: Callable[[], int],
+             aggregate: Callable[[int, int], List[Dict[str, Any]]]) -> int:
+        """Catch up with the history table; returns the number of history rows applied
+
+        `source` identifies the server/database (a different one resets the
+        rollups). `max_history_id()` returns the current MAX(HistoryID) and
+        `aggregate(after_id, upto_id)` the grouped counts for that ID range:
+        day, OperationType, Username, operations, first_ts, last_ts.
+        """
+        with self.lock:
+            applied = 0
+            target = max_history_id()
+
+            with self.get_connection() as conn:
+                stored_source, last_id = self._state(conn)
+                # A different database, or a history table that went backwards: rebuild
+                if stored_source != source or target < last_id:
+                    conn.execute('BEGIN IMMEDIATE')
+                    conn.execute('DELETE FROM history_rollups')
+                    conn.execute('UPDATE rollup_state SET source = ?, last_history_id = 0 WHERE id = 1',
+                                 (source,))
+                    conn.execute('COMMIT')
+                    last_id = 0
+
+                while last_id < target:
+                    upto_id = min(last_id + self.batch_size, target)
+                    groups = aggregate(last_id, upto_id)
+
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        # Another process may have applied this range meanwhile
+                        current_source, current_id = self._state(conn)
+                        if current_source != source or current_id != last_id:
+                            conn.execute('ROLLBACK')
+                            last_id = current_id if current_source == source else 0
+                            if current_source != source:
+                                break
+                            continue
+
+                        conn.executemany('''
+                            INSERT INTO history_rollups
+                                (day, operation, username, operations, first_ts, last_ts)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                            ON CONFLICT (day, operation, username) DO UPDATE SET
+                                operations = operations + excluded.operations,
+                                first_ts = MIN(first_ts, excluded.first_ts),
+                                last_ts = MAX(last_ts, excluded.last_ts)
+                        ''', [(
+                            group['day'],
+                            group['OperationType'],
+                            group['Username'],
+                            group['operations'],
+                            group['first_ts'].isoformat(sep=' ') if group['first_ts'] else None,
+                            group['last_ts'].isoformat(sep=' ') if group['last_ts'] else None
+                        ) for group in groups])
+                        conn.execute('UPDATE rollup_state SET last_history_id = ? WHERE id = 1', (upto_id,))
+                        conn.execute('COMMIT')
+                    except Exception:
+                        conn.execute('ROLLBACK')
+                        raise
+
+                    applied += sum(group['operations'] for group in groups)
+                    last_id = upto_id
+
+            self.ready = True
+            self.syncs += 1
+            self.last_applied = applied
+            return applied
+
+    def _where(self, start_day: Optional[str], end_day: Optional[str],
+               operation_type: Optional[str] = None) -> Tuple[str, List[Any]]:
+        clauses = []
+        params = []
+        if start_day:
+            clauses.append('day >= ?')
+            params.append(start_day)
+        if end_day:
+            clauses.append('day <= ?')
+            params.append(end_day)
+        if operation_type and operation_type != 'ALL':
+            clauses.append('operation = ?')
+            params.append(operation_type)
+        return ('WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    @staticmethod
+    def _operation_sums() -> str:
+        return ',\n'.join(
+            f"COALESCE(SUM(CASE WHEN operation = '{operation}' THEN operations END), 0) as {column}"
+            for operation, column in OPERATION_COLUMNS.items()
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals in the shape of get_history_stats"""
+        with self.get_connection() as conn:
+            row = conn.execute(f'''
+                SELECT
+                    COALESCE(SUM(operations), 0) as total_operations,
+                    {self._operation_sums()},
+                    COUNT(DISTINCT username) as unique_users,
+                    MIN(first_ts) as earliest_operation,
+                    MAX(last_ts) as latest_operation
+                FROM history_rollups
+            ''').fetchone()
+        stats = dict(row)
+        stats['earliest_operation'] = _timestamp(stats['earliest_operation'])
+        stats['latest_operation'] = _timestamp(stats['latest_operation'])
+        return stats
+
+    def daily(self, start_day: Optional[str] = None, end_day: Optional[str] = None,
+              operation_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-day counts (inclusive day range), oldest first"""
+        where_sql, params = self._where(start_day, end_day, operation_type)
+        with self.get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT
+                    day,
+                    SUM(operations) as total_operations,
+                    {self._operation_sums()},
+                    COUNT(DISTINCT username) as unique_users
+                FROM history_rollups
+                {where_sql}
+                GROUP BY day
+                ORDER BY day
+            ''', params).fetchall()
+        return [dict(row) for row in rows]
+
+    def users(self, start_day: Optional[str] = None, end_day: Optional[str] = None,
+              operation_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-user counts (inclusive day range), busiest first"""
+        where_sql, params = self._where(start_day, end_day, operation_type)
+        with self.get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT
+                    username as Username,
+                    SUM(operations) as total_operations,
+                    {self._operation_sums()},
+                    MIN(first_ts) as first_operation,
+                    MAX(last_ts) as last_operation
+                FROM history_rollups
+                {where_sql}
+                GROUP BY username
+                ORDER BY total_operations DESC, username
+            ''', params).fetchall()
+        users = []
+        for row in rows:
+            user = dict(row)
+            user['first_operation'] = _timestamp(user['first_operation'])
+            user['last_operation'] = _timestamp(user['last_operation'])
+            users.append(user)
+        return users
+
+    def after_fork(self):
+        """Replace the lock inherited from the parent process"""
+        self.lock = Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Rollup size and sync counters"""
+        with self.get_connection() as conn:
+            _, last_id = self._state(conn)
+            groups = conn.execute('SELECT COUNT(*) FROM history_rollups').fetchone()[0]
+        return {
+            'ready': self.ready,
+            'groups': groups,
+            'last_history_id': last_id,
+            'syncs': self.syncs,
+            'last_applied': self.last_applied
+        }
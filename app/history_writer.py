@@ -0,0 +1,311 @@
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Items_BinLocations_History columns written by the app, in insert order
+HISTORY_COLUMNS = [
+    'RecordID', 'OperationType', 'Timestamp', 'Username',
+    'PreviousProductUPC', 'PreviousProductDescription', 'PreviousQty_Cases',
+    'PreviousBinLocationID', 'PreviousUnitQty2',
+    'NewProductUPC', 'NewProductDescription', 'NewQty_Cases',
+    'NewBinLocationID', 'NewUnitQty2',
+    'AdjustmentAmount', 'Notes',
+    'RecordCreatedAt', 'RecordLastUpdate'
+]
+
+HISTORY_DATETIME_COLUMNS = ('Timestamp', 'RecordCreatedAt', 'RecordLastUpdate')
+
+
+def _encode_row(row: Dict[str, Any]) -> str:
+    return json.dumps({column: row.get(column) for column in HISTORY_COLUMNS},
+                      default=lambda value: value.isoformat())
+
+
+def _decode_row(raw: str) -> Dict[str, Any]:
+    row = json.loads(raw)
+    for column in HISTORY_DATETIME_COLUMNS:
+        if row.get(column):
+            row[column] = datetime.fromisoformat(row[column])
+    return row
+
+
+class HistoryWriter:
+    """Writes history rows to MSSQL in batches from a background thread
+
+    write() appends the rows to a SQLite spool before returning, so a
+    crash or a killed worker cannot lose them; the flusher thread inserts
+    spooled rows oldest first in multi-row batches and deletes them once
+    written. Rows stay spooled while MSSQL is slow or unreachable. DELETE
+    rows are the delta-sync tombstones, so write() inserts the rows it
+    just spooled itself (not the backlog): the client's sync right after a
+    delete must see them.
+
+    A batch that fails with one of `rejected_errors` (MSSQL refused the
+    rows, as opposed to being unreachable) `max_attempts` times is retried
+    row by row, and rows that are still rejected move to the
+    history_dead_letter table so they stop blocking the spool.
+    """
+
+    def __init__(self, insert_rows: Callable[[List[Dict[str, Any]]], None],
+                 spool_path: str = '/app/data/history_spool.db',
+                 batch_size: int = 100,
+                 flush_interval: float = 1.0,
+                 retry_interval: float = 5.0,
+                 claim_timeout: float = 300,
+                 rejected_errors: Tuple[type, ...] = (),
+                 max_attempts: int = 3):
+        self.insert_rows = insert_rows
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.claim_timeout = claim_timeout
+        self.rejected_errors = rejected_errors
+        self.max_attempts = max_attempts
+        self._lock = Lock()
+        self._seq = itertools.count()
+        self._stop = Event()
+        self._wake = Event()
+        self._thread = None
+        self.spooled = 0
+        self.written = 0
+        self.dead_lettered = 0
+        self.immediate_flushes = 0
+        self.failures = 0
+        self.last_error = None
+        self._init_spool()
+
+    @property
+    def _claimant(self) -> str:
+        # Evaluated per call so a forked worker claims rows under its own pid
+        return f'{os.getpid()}:{id(self)}'
+
+    def _init_spool(self):
+        """Initialize SQLite spool table"""
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS history_spool (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    row TEXT NOT NULL,
+                    claimed_by TEXT,
+                    claimed_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_history_spool_order ON history_spool (ts, seq, id)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS history_dead_letter (
+                    id INTEGER PRIMARY KEY,
+                    row TEXT NOT NULL,
+                    error TEXT,
+                    failed_at REAL NOT NULL
+                )
+            ''')
+
+    @contextmanager
+    def get_connection(self):
+        """Get SQLite connection with automatic cleanup"""
+        conn = sqlite3.connect(self.spool_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _spool_count(self) -> int:
+        with self.get_connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM history_spool').fetchone()[0]
+
+    def _dead_letter_count(self) -> int:
+        with self.get_connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM history_dead_letter').fetchone()[0]
+
+    # ------------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------------
+
+    def write(self, rows: List[Dict[str, Any]]):
+        """Spool history rows (called on the request path after the change committed)"""
+        if not rows:
+            return
+        with self._lock:
+            batch = [(next(self._seq), row) for row in rows]
+        # Committed before returning: the row change is already in MSSQL
+        with self.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            ids = [conn.execute('INSERT INTO history_spool (ts, seq, row) VALUES (?, ?, ?)',
+                                (row['Timestamp'].isoformat(), seq, _encode_row(row))).lastrowid
+                   for seq, row in batch]
+            conn.execute('COMMIT')
+        with self._lock:
+            self.spooled += len(batch)
+
+        if any(row.get('OperationType') == 'DELETE' for row in rows):
+            with self._lock:
+                self.immediate_flushes += 1
+            try:
+                for start in range(0, len(ids), self.batch_size):
+                    self._replay_batch(ids[start:start + self.batch_size])
+            except Exception as e:
+                # Still spooled; the flusher retries and the tombstone arrives late
+                self._record_failure(e)
+        else:
+            self._wake.set()
+
+    # ------------------------------------------------------------------------
+    # Spool replay
+    # ------------------------------------------------------------------------
+
+    def _replay_batch(self, ids: Optional[List[int]] = None) -> bool:
+        """Write the oldest unclaimed spooled rows (or just `ids`); False once none are left"""
+        now = time.time()
+        with self.get_connection() as conn:
+            # Claim the batch so other threads and processes sharing the spool skip it
+            conn.execute('BEGIN IMMEDIATE')
+            if ids is None:
+                claimed = conn.execute('''
+                    SELECT id, row, attempts FROM history_spool
+                    WHERE claimed_by IS NULL OR claimed_at < ?
+                    ORDER BY ts, seq, id
+                    LIMIT ?
+                ''', (now - self.claim_timeout, self.batch_size)).fetchall()
+            else:
+                claimed = conn.execute(f'''
+                    SELECT id, row, attempts FROM history_spool
+                    WHERE id IN ({', '.join('?' * len(ids))})
+                    AND (claimed_by IS NULL OR claimed_at < ?)
+                    ORDER BY ts, seq, id
+                ''', ids + [now - self.claim_timeout]).fetchall()
+            if not claimed:
+                conn.execute('COMMIT')
+                return False
+
+            claimed_ids = [row_id for row_id, _, _ in claimed]
+            id_list = ', '.join('?' * len(claimed_ids))
+            conn.execute(f'UPDATE history_spool SET claimed_by = ?, claimed_at = ? WHERE id IN ({id_list})',
+                         [self._claimant, now] + claimed_ids)
+            conn.execute('COMMIT')
+
+            try:
+                self.insert_rows([_decode_row(raw) for _, raw, _ in claimed])
+            except self.rejected_errors as e:
+                if max(attempts for _, _, attempts in claimed) + 1 < self.max_attempts:
+                    conn.execute(f'''
+                        UPDATE history_spool SET claimed_by = NULL, attempts = attempts + 1
+                        WHERE id IN ({id_list})
+                    ''', claimed_ids)
+                    raise
+                self._isolate_rejected(conn, claimed, e)
+                return True
+            except Exception:
+                conn.execute(f'UPDATE history_spool SET claimed_by = NULL WHERE id IN ({id_list})', claimed_ids)
+                raise
+
+            conn.execute(f'DELETE FROM history_spool WHERE id IN ({id_list})', claimed_ids)
+        with self._lock:
+            self.written += len(claimed)
+        return True
+
+    def _isolate_rejected(self, conn, claimed: List[Tuple[int, str, int]], error: Exception):
+        """Retry a repeatedly rejected batch row by row, dead-lettering the rows MSSQL refuses"""
+        for index, (row_id, raw, _) in enumerate(claimed):
+            if len(claimed) > 1:
+                try:
+                    self.insert_rows([_decode_row(raw)])
+                except self.rejected_errors as e:
+                    error = e
+                except Exception:
+                    # Unreachable again: the rest stays spooled for the next flush
+                    remaining = [rest_id for rest_id, _, _ in claimed[index:]]
+                    conn.execute(f'''
+                        UPDATE history_spool SET claimed_by = NULL
+                        WHERE id IN ({', '.join('?' * len(remaining))})
+                    ''', remaining)
+                    raise
+                else:
+                    conn.execute('DELETE FROM history_spool WHERE id = ?', (row_id,))
+                    with self._lock:
+                        self.written += 1
+                    continue
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT INTO history_dead_letter VALUES (?, ?, ?, ?)',
+                         (row_id, raw, str(error), time.time()))
+            conn.execute('DELETE FROM history_spool WHERE id = ?', (row_id,))
+            conn.execute('COMMIT')
+            with self._lock:
+                self.dead_lettered += 1
+            logger.error('History row rejected by MSSQL, moved to history_dead_letter (id %s): %s; row: %s',
+                         row_id, error, raw)
+
+    def _flush(self):
+        """Write everything spooled, oldest first"""
+        while self._replay_batch():
+            pass
+
+    def _record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+        logger.warning('History write failed, rows stay spooled: %s', error)
+
+    # ------------------------------------------------------------------------
+    # Flusher thread
+    # ------------------------------------------------------------------------
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self._flush()
+            except Exception as e:
+                self._record_failure(e)
+                self._stop.wait(self.retry_interval)
+
+    def start(self):
+        """Start the flusher thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+
+    def after_fork(self):
+        """Drop the parent's thread, events and lock in a forked child (start() runs it here)"""
+        self._lock = Lock()
+        self._stop = Event()
+        self._wake = Event()
+        self._thread = None
+
+    def stop(self, timeout: float = 10):
+        """Stop the flusher; unwritten rows stay in the spool for the next start"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Spool backlog and write counters (spooled/written/dead_lettered since start)"""
+        return {
+            'backlog': self._spool_count(),
+            'dead_letter': self._dead_letter_count(),
+            'spooled': self.spooled,
+            'written': self.written,
+            'dead_lettered': self.dead_lettered,
+            'immediate_flushes': self.immediate_flushes,
+            'failures': self.failures,
+            'last_error': self.last_error
+        }
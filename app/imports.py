@@ -0,0 +1,137 @@
+import csv
+import io
+import re
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from openpyxl import load_workbook
+
+
+# ============================================================================
+# Column Mapping
+# ============================================================================
+
+# Normalized header (lowercase, letters/digits only) -> import field; the
+# export's own headers are included so an exported sheet can be re-imported
+IMPORT_HEADER_ALIASES = {
+    'upc': 'upc',
+    'productupc': 'upc',
+    'bin': 'bin',
+    'binlocation': 'bin',
+    'cases': 'cases',
+    'qty': 'cases',
+    'qtycases': 'cases',
+    'quantity': 'cases',
+    'casequantity': 'cases'
+}
+
+REQUIRED_IMPORT_FIELDS = ('upc', 'bin', 'cases')
+
+IMPORT_EXTENSIONS = ('.xlsx', '.csv')
+
+
+def _normalize_header(value: Any) -> str:
+    return re.sub(r'[^a-z0-9]', '', str(value).lower()) if value is not None else ''
+
+
+def _map_headers(header: Iterable[Any]) -> Dict[str, int]:
+    """Map import fields to column positions; raises ValueError if one is missing"""
+    positions = {}
+    for position, value in enumerate(header):
+        field = IMPORT_HEADER_ALIASES.get(_normalize_header(value))
+        if field and field not in positions:
+            positions[field] = position
+    missing = [field for field in REQUIRED_IMPORT_FIELDS if field not in positions]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)} "
+                         f"(expected headers like 'Product UPC', 'Bin Location', 'Case Quantity')")
+    return positions
+
+
+def _text(value: Any) -> str:
+    """Cell value as text; integral floats (Excel numbers) lose the '.0'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _whole_number(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    try:
+        return int(_text(value))
+    except ValueError:
+        return None
+
+
+def parse_import_row(values: List[Any], positions: Dict[str, int]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Turn one data row into (row, None) or (None, error message)"""
+    def cell(field):
+        position = positions[field]
+        return values[position] if position < len(values) else None
+
+    upc = _text(cell('upc'))
+    bin_name = _text(cell('bin'))
+    if not upc:
+        return None, 'Product UPC is required'
+    if not bin_name:
+        return None, 'Bin location is required'
+
+    cases = _whole_number(cell('cases'))
+    if cases is None or cases < 0:
+        return None, 'Case quantity must be a whole number of at least 0'
+
+    return {'upc': upc, 'bin': bin_name, 'cases': cases}, None
+
+
+# ============================================================================
+# Streaming Readers
+# ============================================================================
+
+def _iter_xlsx(fileobj: IO[bytes]) -> Iterator[List[Any]]:
+    # Read-only mode streams rows from the sheet XML instead of loading the workbook
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for values in wb.worksheets[0].iter_rows(values_only=True):
+            yield list(values)
+    finally:
+        wb.close()
+
+
+def _iter_csv(fileobj: IO[bytes]) -> Iterator[List[Any]]:
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+
+def iter_import_rows(fileobj: IO[bytes], filename: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Stream (sheet row number, row, error) from an .xlsx or .csv upload
+
+    The first non-empty row is the header; blank rows are skipped.
+    """
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        rows = _iter_xlsx(fileobj)
+    elif name.endswith('.csv'):
+        rows = _iter_csv(fileobj)
+    else:
+        raise ValueError(f"Unsupported file type (use {' or '.join(IMPORT_EXTENSIONS)})")
+
+    positions = None
+    for row_number, values in enumerate(rows, 1):
+        if not any(_text(value) for value in values):
+            continue
+        if positions is None:
+            positions = _map_headers(values)
+            continue
+        row, error = parse_import_row(values, positions)
+        yield row_number, row, error
+
+    if positions is None:
+        raise ValueError('The file is empty')
@@ -0,0 +1,439 @@
+import bisect
+import re
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+
+# ============================================================================
+# LIKE Pattern Matching
+# ============================================================================
+
+def like_to_regex(pattern: str) -> Optional[Pattern]:
+    """Compile a SQL Server LIKE pattern into a case-insensitive regex
+
+    Supports %, _ and [...] / [^...] character classes. Returns None for
+    patterns this translation does not reproduce faithfully (unterminated
+    brackets), so callers can fall back to the database.
+    """
+    parts = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '%':
+            parts.append('.*')
+        elif ch == '_':
+            parts.append('.')
+        elif ch == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                return None
+            body = pattern[i + 1:end]
+            negate = body.startswith('^')
+            if negate:
+                body = body[1:]
+            body = body.replace('\\', '\\\\').replace('[', '\\[').replace('^', '\\^')
+            parts.append(f"[{'^' if negate else ''}{body}]")
+            i = end
+        else:
+            parts.append(re.escape(ch))
+        i += 1
+    return re.compile(''.join(parts), re.IGNORECASE | re.DOTALL)
+
+
+def like_literals(pattern: str) -> List[str]:
+    """Literal (wildcard-free) runs of a LIKE pattern, lowercased"""
+    return [part.lower() for part in re.split(r'[%_]|\[[^\]]*\]', pattern) if part]
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# ============================================================================
+# Product Search Index
+# ============================================================================
+
+PRODUCT_SEARCH_FIELDS = {
+    'description': 'ProductDescription',
+    'upc': 'ProductUPC',
+    'sku': 'ProductSKU'
+}
+
+
+class ProductSearchIndex:
+    """In-memory trigram index over non-discontinued items for typeahead search
+
+    Reproduces search_products: LIKE semantics on one field, TOP 50 ordered
+    by ProductDescription. `loader` returns the full item list; refresh()
+    diffs it against the index and only re-indexes rows that changed.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Dict[str, Any]]], limit: int = 50):
+        self.loader = loader
+        self.limit = limit
+        self._lock = Lock()
+        self._items: Dict[int, Dict[str, Any]] = {}
+        self._grams: Dict[str, Dict[str, Set[int]]] = {field: {} for field in PRODUCT_SEARCH_FIELDS}
+        self._by_upc: Dict[str, Set[int]] = {}
+        # Product IDs in result order, rebuilt lazily after the item set changes
+        self._order: List[int] = []
+        self._rank: Dict[int, int] = {}
+        self._order_dirty = False
+        self.ready = False
+        self.refreshes = 0
+        self.last_changes = 0
+
+    @staticmethod
+    def _sort_key(item: Dict[str, Any]) -> Tuple:
+        # ORDER BY ProductDescription: NULLs first, case-insensitive collation
+        description = item['ProductDescription']
+        return (description is not None, (description or '').casefold(), item['ProductID'])
+
+    def _ensure_order(self):
+        if self._order_dirty:
+            self._order = sorted(self._items, key=lambda pid: self._sort_key(self._items[pid]))
+            self._rank = {pid: rank for rank, pid in enumerate(self._order)}
+            self._order_dirty = False
+
+    def _add(self, item: Dict[str, Any]):
+        product_id = item['ProductID']
+        self._items[product_id] = item
+        self._order_dirty = True
+        for field, column in PRODUCT_SEARCH_FIELDS.items():
+            value = item[column]
+            if value:
+                postings = self._grams[field]
+                for gram in _trigrams(value.lower()):
+                    postings.setdefault(gram, set()).add(product_id)
+        if item['ProductUPC']:
+            self._by_upc.setdefault(item['ProductUPC'], set()).add(product_id)
+
+    def _remove(self, product_id: int):
+        item = self._items.pop(product_id)
+        self._order_dirty = True
+        for field, column in PRODUCT_SEARCH_FIELDS.items():
+            value = item[column]
+            if value:
+                postings = self._grams[field]
+                for gram in _trigrams(value.lower()):
+                    ids = postings.get(gram)
+                    if ids:
+                        ids.discard(product_id)
+                        if not ids:
+                            del postings[gram]
+        upc_ids = self._by_upc.get(item['ProductUPC'])
+        if upc_ids:
+            upc_ids.discard(product_id)
+            if not upc_ids:
+                del self._by_upc[item['ProductUPC']]
+
+    def refresh(self):
+        """Reload items and apply only the differences to the index"""
+        rows = {row['ProductID']: dict(row) for row in self.loader()}
+        changes = 0
+        with self._lock:
+            for product_id in [pid for pid in self._items if pid not in rows]:
+                self._remove(product_id)
+                changes += 1
+            for product_id, row in rows.items():
+                current = self._items.get(product_id)
+                if current == row:
+                    continue
+                if current is not None:
+                    self._remove(product_id)
+                self._add(row)
+                changes += 1
+            self.ready = True
+            self.refreshes += 1
+            self.last_changes = changes
+
+    def note_unit_qty(self, product_upc: str, unit_qty: Any):
+        """Apply a UnitQty2 change written by this app without waiting for a refresh"""
+        with self._lock:
+            for product_id in self._by_upc.get(product_upc, ()):
+                self._items[product_id] = dict(self._items[product_id], UnitQty2=unit_qty)
+
+    def search(self, search_pattern: str, search_field: str = 'description') -> Optional[List[Dict[str, Any]]]:
+        """Search with a LIKE pattern; returns None when the database should answer instead"""
+        if not self.ready:
+            return None
+        regex = like_to_regex(search_pattern)
+        if regex is None:
+            return None
+        field = search_field if search_field in PRODUCT_SEARCH_FIELDS else 'description'
+        column = PRODUCT_SEARCH_FIELDS[field]
+
+        grams = set()
+        for literal in like_literals(search_pattern):
+            grams |= _trigrams(literal)
+
+        with self._lock:
+            self._ensure_order()
+            candidates = None
+            if grams:
+                postings = self._grams[field]
+                # Intersect the rarest posting lists first
+                lists = sorted((postings.get(gram, set()) for gram in grams), key=len)
+                candidates = set(lists[0])
+                for ids in lists[1:]:
+                    if not candidates:
+                        break
+                    candidates &= ids
+
+            # Walk candidates in result order and stop at the limit; broad
+            # candidate sets are cheaper to filter while walking the full order
+            if candidates is None:
+                ordered = self._order
+            elif len(candidates) * 8 > len(self._order):
+                ordered = (pid for pid in self._order if pid in candidates)
+            else:
+                ordered = sorted(candidates, key=self._rank.__getitem__)
+
+            results = []
+            for product_id in ordered:
+                item = self._items[product_id]
+                value = item[column]
+                if value is not None and regex.fullmatch(value):
+                    results.append(dict(item))
+                    if len(results) >= self.limit:
+                        break
+            return results
+
+    def after_fork(self):
+        """Replace the lock inherited from the parent process"""
+        self._lock = Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and refresh counters"""
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'items': len(self._items),
+                'trigrams': sum(len(postings) for postings in self._grams.values()),
+                'refreshes': self.refreshes,
+                'last_changes': self.last_changes
+            }
+
+
+# ============================================================================
+# Bin Directory
+# ============================================================================
+
+class BinDirectory:
+    """Cached BinLocations_tbl: ID -> name map plus the names in database order
+
+    Replaces bin-name JOINs and answers search_bin_locations (LIKE semantics,
+    TOP 50 ordered by BinLocation). `loader` must return the bins ordered by
+    BinLocation, so results follow the server's collation. An unknown
+    BinLocationID calls `on_miss` (at most once per `miss_interval`
+    seconds), which should schedule a refresh.
+    """
+
+    def __init__(self, loader: Callable[[], Iterable[Dict[str, Any]]],
+                 on_miss: Optional[Callable[[], None]] = None,
+                 miss_interval: float = 30, limit: int = 50):
+        self.loader = loader
+        self.on_miss = on_miss
+        self.miss_interval = miss_interval
+        self.limit = limit
+        self._last_miss = 0.0
+        self._names: Dict[int, Optional[str]] = {}
+        # Named bins in loader (database) order
+        self._entries: List[Dict[str, Any]] = []
+        # Casefolded names, sorted, and each one's position in _entries (for prefix lookups)
+        self._keys: List[str] = []
+        self._positions: List[int] = []
+        self.ready = False
+        self.refreshes = 0
+        self.misses = 0
+
+    def refresh(self):
+        """Reload the whole bin table (it is small) and swap it in"""
+        names = {}
+        entries = []
+        for row in self.loader():
+            names[row['BinLocationID']] = row['BinLocation']
+            if row['BinLocation'] is not None:
+                entries.append({'BinLocationID': row['BinLocationID'], 'BinLocation': row['BinLocation']})
+        index = sorted((e['BinLocation'].casefold(), position) for position, e in enumerate(entries))
+
+        # Single attribute assignments, so readers see either the old or new directory
+        self._names = names
+        self._entries, self._keys, self._positions = (entries, [key for key, _ in index],
+                                                      [position for _, position in index])
+        self.ready = True
+        self.refreshes += 1
+
+    def name(self, bin_location_id: Optional[int]) -> Optional[str]:
+        """Bin name for an ID (None for NULL/unknown IDs)"""
+        if bin_location_id is None:
+            return None
+        names = self._names
+        if bin_location_id not in names:
+            self._missed()
+            return None
+        return names[bin_location_id]
+
+    def knows(self, bin_location_id: Optional[int]) -> bool:
+        """Whether an ID is in the directory (requests a refresh if not)"""
+        if bin_location_id is None or bin_location_id in self._names:
+            return True
+        self._missed()
+        return False
+
+    def _missed(self):
+        self.misses += 1
+        now = time.monotonic()
+        if self.on_miss and now - self._last_miss >= self.miss_interval:
+            self._last_miss = now
+            self.on_miss()
+
+    def search(self, search_pattern: str) -> Optional[List[Dict[str, Any]]]:
+        """Search with a LIKE pattern; returns None when the database should answer instead"""
+        if not self.ready:
+            return None
+        regex = like_to_regex(search_pattern)
+        if regex is None:
+            return None
+        entries, keys, positions = self._entries, self._keys, self._positions
+
+        # A literal prefix narrows the candidates with two binary searches on
+        # the casefolded names; they are then visited in database order
+        prefix = re.split(r'[%_\[]', search_pattern, maxsplit=1)[0].casefold()
+        candidates = range(len(entries))
+        if prefix:
+            start = bisect.bisect_left(keys, prefix)
+            end = bisect.bisect_left(keys, prefix + '\U0010ffff', lo=start)
+            candidates = sorted(positions[start:end])
+
+        results = []
+        for i in candidates:
+            if regex.fullmatch(entries[i]['BinLocation']):
+                results.append(dict(entries[i]))
+                if len(results) >= self.limit:
+                    break
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Directory size and refresh counters"""
+        return {
+            'ready': self.ready,
+            'bins': len(self._names),
+            'refreshes': self.refreshes,
+            'misses': self.misses
+        }
+
+
+# ============================================================================
+# Unused Bins
+# ============================================================================
+
+class UnusedBinSet:
+    """Per-bin usage counts, kept current from this app's writes
+
+    Answers get_unused_bin_locations (bins with no Items_BinLocations rows,
+    ordered by BinLocation). `loader` returns (bin rows ordered by
+    BinLocation, {BinLocationID: row count}) and is used to build the
+    counts and, periodically, to
+    reconcile them with writes made outside this app. A write referencing
+    a bin the set has not seen calls `on_unknown`.
+    """
+
+    def __init__(self, loader: Callable[[], Tuple[Iterable[Dict[str, Any]], Dict[int, int]]],
+                 on_unknown: Optional[Callable[[], None]] = None):
+        self.loader = loader
+        self.on_unknown = on_unknown
+        self._lock = Lock()
+        self._names: Dict[int, Optional[str]] = {}
+        self._counts: Dict[int, int] = {}
+        self._unused: Optional[List[Dict[str, Any]]] = None
+        # Bumped by every move(); a load that overlapped one is discarded
+        self._moves = 0
+        self.ready = False
+        self.reconciles = 0
+        self.last_corrections = 0
+        self.discarded_loads = 0
+
+    def refresh(self, attempts: int = 3):
+        """Reload bins and usage counts from the database
+
+        move() runs after its change commits, so a load that overlapped a
+        move may or may not include it; such a load is discarded and
+        retried. After `attempts` overlapping loads the current counts are
+        kept and `on_unknown` schedules another refresh.
+        """
+        for _ in range(attempts):
+            with self._lock:
+                moves = self._moves
+            bins, counts = self.loader()
+            names = {row['BinLocationID']: row['BinLocation'] for row in bins}
+            counts = {bin_id: counts.get(bin_id, 0) for bin_id in names}
+            with self._lock:
+                if self._moves != moves:
+                    self.discarded_loads += 1
+                    continue
+                # Bins whose usage disagreed with the locally maintained state
+                corrections = sum(1 for bin_id, count in counts.items()
+                                  if (self._counts.get(bin_id, 0) > 0) != (count > 0))
+                self._names = names
+                self._counts = counts
+                self._unused = None
+                self.last_corrections = corrections if self.ready else 0
+                self.ready = True
+                self.reconciles += 1
+                return
+        if self.on_unknown:
+            self.on_unknown()
+
+    def _apply_move(self, old_bin_id: Optional[int], new_bin_id: Optional[int]) -> bool:
+        """Update counts under the lock; True if a bin is unknown"""
+        unknown = False
+        for bin_id, delta in ((old_bin_id, -1), (new_bin_id, 1)):
+            if bin_id is None:
+                continue
+            if bin_id not in self._names:
+                unknown = True
+                continue
+            before = self._counts[bin_id]
+            self._counts[bin_id] = max(before + delta, 0)
+            if (before > 0) != (self._counts[bin_id] > 0):
+                self._unused = None
+        return unknown
+
+    def move(self, old_bin_id: Optional[int], new_bin_id: Optional[int]):
+        """Record a row leaving old_bin_id and/or entering new_bin_id"""
+        if old_bin_id == new_bin_id:
+            return
+        with self._lock:
+            self._moves += 1
+            unknown = self._apply_move(old_bin_id, new_bin_id)
+        if unknown and self.on_unknown:
+            self.on_unknown()
+
+    def unused(self) -> Optional[List[Dict[str, Any]]]:
+        """Unused bins in the loader's BinLocation order; None until first loaded"""
+        if not self.ready:
+            return None
+        with self._lock:
+            if self._unused is None:
+                # _counts keeps the loader's order (dicts preserve insertion order)
+                self._unused = [{'BinLocationID': bin_id, 'BinLocation': self._names[bin_id]}
+                                for bin_id, count in self._counts.items() if count == 0]
+            return [dict(b) for b in self._unused]
+
+    def after_fork(self):
+        """Replace the lock inherited from the parent process"""
+        self._lock = Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Set size and reconcile counters"""
+        with self._lock:
+            return {
+                'ready': self.ready,
+                'bins': len(self._names),
+                'unused': sum(1 for count in self._counts.values() if count == 0),
+                'reconciles': self.reconciles,
+                'discarded_loads': self.discarded_loads,
+                'last_corrections': self.last_corrections
+            }
@@ -1,27 +1,160 @@
-from flask import Flask, render_template, jsonify, request, session, redirect, url_for, send_file
+from flask import (Flask, render_template, jsonify, request, session, redirect, url_for, send_file, make_response,
+                   Response, g, send_from_directory)
 from flask_session import Session
 from functools import wraps
 from app.database import SQLiteManager, MSSQLManager
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from datetime import datetime
+from app.exports import (write_bin_locations_xlsx, XLSX_MIMETYPE, iter_csv, gzip_chunks,
+                         BIN_LOCATION_CSV_COLUMNS, HISTORY_CSV_COLUMNS)
+from app.imports import iter_import_rows
+from app.sessions import SQLiteSessionInterface, SessionFileSweeper
+from app.background import PeriodicTask
+from app.metrics import Metrics, TimedJSONProvider
+from app.profiling import RequestProfiler, PROFILE_MODES
+from contextlib import nullcontext
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+from typing import Optional
 from io import BytesIO
 import traceback
+import hashlib
+import itertools
+import tempfile
+import time
 import os
 
+
+def load_secret_key(path: str = '/app/data/secret_key') -> str:
+    """SECRET_KEY from the environment, else a random key persisted under /app/data
+
+    Every worker process must sign sessions with the same key, so the
+    generated key is written once (atomically) and read back by all of them.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            f.write(os.urandom(32).hex())
+        os.chmod(tmp_path, 0o600)
+        try:
+            # link() fails if another worker created the key first; theirs wins
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    with open(path) as f:
+        return f.read().strip()
+
+
 app = Flask(__name__)
 
+# Under `gunicorn --preload` (WEB_PRELOAD=1) this module is imported in the
+# master, so background threads are only started by after_fork() in each worker
+WEB_PRELOAD = os.environ.get('WEB_PRELOAD', '').lower() in ('1', 'true')
+
 # Session configuration
-app.config['SECRET_KEY'] = os.urandom(24)
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_FILE_DIR'] = '/app/data/flask_session'
+app.config['SECRET_KEY'] = load_secret_key()
 app.config['SESSION_PERMANENT'] = False
-Session(app)
+if os.environ.get('SESSION_LIFETIME_HOURS'):
+    app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=float(os.environ['SESSION_LIFETIME_HOURS']))
+
+# SESSION_BACKEND: filesystem (Flask-Session files), sqlite (shared SQLite
+# store) or cookie (Flask's signed cookie, no server-side state)
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'filesystem').lower()
+session_store = None
+if SESSION_BACKEND == 'sqlite':
+    session_store = SQLiteSessionInterface('/app/data/sessions.db')
+    app.session_interface = session_store
+elif SESSION_BACKEND != 'cookie':
+    app.config['SESSION_TYPE'] = 'filesystem'
+    app.config['SESSION_FILE_DIR'] = '/app/data/flask_session'
+    Session(app)
+    session_store = SessionFileSweeper(app.config['SESSION_FILE_DIR'],
+                                       app.permanent_session_lifetime.total_seconds())
+
+# Expired sessions are removed in the background
+session_sweeper = None
+if session_store is not None:
+    session_sweeper = PeriodicTask('session-sweep', float(os.environ.get('SESSION_SWEEP_SECONDS', 3600)),
+                                   session_store.sweep)
+    if not WEB_PRELOAD:
+        session_sweeper.start()
 
 # Initialize database managers
 sqlite_manager = SQLiteManager()
-mssql_manager = MSSQLManager(sqlite_manager)
+mssql_manager = MSSQLManager(sqlite_manager, defer_background_tasks=WEB_PRELOAD)
+
+# Optional in-memory product search index (PRODUCT_SEARCH_INDEX=1)
+if os.environ.get('PRODUCT_SEARCH_INDEX', '').lower() in ('1', 'true'):
+    mssql_manager.enable_product_index(
+        refresh_interval=float(os.environ.get('PRODUCT_INDEX_REFRESH_SECONDS', 300))
+    )
+
+# Optional cached bin directory for bin search and bin names (BIN_DIRECTORY=1)
+if os.environ.get('BIN_DIRECTORY', '').lower() in ('1', 'true'):
+    mssql_manager.enable_bin_directory(
+        refresh_interval=float(os.environ.get('BIN_DIRECTORY_REFRESH_SECONDS', 600))
+    )
+
+# Optional in-memory unused-bins set (UNUSED_BINS_CACHE=1)
+if os.environ.get('UNUSED_BINS_CACHE', '').lower() in ('1', 'true'):
+    mssql_manager.enable_unused_bins(
+        reconcile_interval=float(os.environ.get('UNUSED_BINS_RECONCILE_SECONDS', 300))
+    )
+
+# Optional history statistics rollups in SQLite (HISTORY_ROLLUPS=1)
+if os.environ.get('HISTORY_ROLLUPS', '').lower() in ('1', 'true'):
+    mssql_manager.enable_history_rollups(
+        refresh_interval=float(os.environ.get('HISTORY_ROLLUPS_SYNC_SECONDS', 300))
+    )
+
+# Optional local read replica of the inventory tables in SQLite (READ_REPLICA=1)
+if os.environ.get('READ_REPLICA', '').lower() in ('1', 'true'):
+    mssql_manager.enable_replica(
+        max_staleness=float(os.environ.get('REPLICA_MAX_STALENESS_SECONDS', 30)),
+        sync_interval=float(os.environ.get('REPLICA_SYNC_SECONDS', 5)),
+        full_sync_interval=float(os.environ.get('REPLICA_FULL_SYNC_SECONDS', 3600)),
+        lookup_interval=float(os.environ.get('REPLICA_LOOKUP_SECONDS', 20))
+    )
+
+# Optional background history writer with a local spool (ASYNC_HISTORY=1)
+if os.environ.get('ASYNC_HISTORY', '').lower() in ('1', 'true'):
+    mssql_manager.enable_history_writer(
+        flush_interval=float(os.environ.get('HISTORY_FLUSH_SECONDS', 1))
+    )
+
+# Optional Prometheus metrics on /metrics (METRICS=1)
+metrics = None
+if os.environ.get('METRICS', '').lower() in ('1', 'true'):
+    metrics = Metrics()
+    mssql_manager.enable_metrics(metrics)
+    metrics.add_gauges('mssql_pool', 'SQL Server connection pool statistic', mssql_manager.get_pool_stats)
+    app.json = TimedJSONProvider(app)
+    app.json.metrics = metrics
+
+# Optional slow-query log (SLOW_QUERY_MS=<threshold>)
+if os.environ.get('SLOW_QUERY_MS'):
+    mssql_manager.enable_slow_query_log(float(os.environ['SLOW_QUERY_MS']) / 1000)
+
+# On-demand request profiler, armed through the admin API (REQUEST_PROFILER=0 disables it)
+request_profiler = None
+if os.environ.get('REQUEST_PROFILER', '1').lower() not in ('0', 'false'):
+    request_profiler = RequestProfiler('/app/data/profiles')
+
+# Users allowed to use the admin API (none until configured)
+ADMIN_USERS = {name.strip() for name in os.environ.get('ADMIN_USERS', '').split(',') if name.strip()}
+
+# Optional typeahead result cache for product and bin search (SEARCH_CACHE=1)
+if os.environ.get('SEARCH_CACHE', '').lower() in ('1', 'true'):
+    mssql_manager.enable_search_cache(
+        ttl=float(os.environ.get('SEARCH_CACHE_TTL_SECONDS', 30)),
+        max_entries=int(os.environ.get('SEARCH_CACHE_SIZE', 1000))
+    )
 
 
 # ============================================================================
@@ -40,9 +173,171 @@ def login_required(f):
     return decorated_function
 
 
+def admin_required(f):
+    """Decorator to restrict routes to ADMIN_USERS"""
+    @wraps(f)
+    @login_required
+    def decorated_function(*args, **kwargs):
+        if session['username'] not in ADMIN_USERS:
+            return jsonify({'success': False, 'message': 'Administrator access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+# ============================================================================
+# Conditional GET
+# ============================================================================
+
+def conditional_get(f):
+    """Decorator to answer If-None-Match with 304 while the data version is unchanged"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            version = mssql_manager.get_data_version()
+        except Exception:
+            # Let the route report configuration/connection errors itself
+            return f(*args, **kwargs)
+
+        etag = hashlib.sha1(
+            f"{request.full_path}|{session.get('username')}|{version}".encode()
+        ).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+
+        response = make_response(f(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
+    return decorated_function
+
+
+# ============================================================================
+# Streaming Responses
+# ============================================================================
+
+STREAM_FORMATS = ('json', 'ndjson')
+
+
+def prefetch_first(rows):
+    """Fetch the first row now, so query/configuration errors raise inside the route"""
+    rows = iter(rows)
+    end = object()
+    first = next(rows, end)
+    return rows if first is end else itertools.chain([first], rows)
+
+
+def stream_records(rows, fmt='json', chunk_size=500):
+    """Stream rows from a cursor-backed generator as a JSON document or NDJSON"""
+    rows = prefetch_first(rows)
+    dumps = app.json.dumps
+
+    def generate():
+        buffer = []
+        try:
+            # "success" goes after "data" so a mid-stream failure can still be reported
+            if fmt == 'json':
+                buffer.append('{"data": [')
+            for count, row in enumerate(rows):
+                if fmt == 'json':
+                    buffer.append((',' if count else '') + dumps(row))
+                else:
+                    buffer.append(dumps(row) + '\n')
+                if len(buffer) >= chunk_size:
+                    yield ''.join(buffer)
+                    buffer = []
+            if fmt == 'json':
+                buffer.append('], "success": true}')
+        except Exception as e:
+            if fmt == 'json':
+                buffer.append('], "success": false, "message": ' + dumps(str(e)) + '}')
+            else:
+                buffer.append(dumps({'success': False, 'message': str(e)}) + '\n')
+        yield ''.join(buffer)
+
+    mimetype = 'application/json' if fmt == 'json' else 'application/x-ndjson'
+    return Response(generate(), mimetype=mimetype)
+
+
+def csv_response(rows, columns, basename):
+    """Stream rows as a CSV download, gzip-compressed when requested with gzip=1"""
+    chunks = iter_csv(prefetch_first(rows), columns)
+    timestamp = datetime.now(ZoneInfo("America/Chicago")).strftime('%Y%m%d_%H%M%S')
+    filename = f'{basename}_{timestamp}.csv'
+    mimetype = 'text/csv'
+
+    if request.args.get('gzip', '').lower() in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    response = Response(chunks, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+# ============================================================================
+# Request Metrics
+# ============================================================================
+
+def serialize_phase():
+    """Context manager timing response serialization (e.g. Excel) when metrics are on"""
+    return metrics.phase('serialize') if metrics else nullcontext()
+
+
+@app.before_request
+def start_request_metrics():
+    if metrics is not None:
+        g.metrics_token = metrics.start_request(request.endpoint or 'unmatched')
+        g.metrics_start = time.perf_counter()
+
+
+@app.after_request
+def finish_request_metrics(response):
+    token = g.pop('metrics_token', None)
+    if token is None:
+        return response
+
+    size = response.content_length
+    if size is None and response.is_streamed and not response.direct_passthrough:
+        # Streamed bodies are counted as they are sent
+        response.response = metrics.count_bytes(request.endpoint or 'unmatched', response.response)
+    elif size is None and not response.is_streamed:
+        size = response.calculate_content_length()
+
+    metrics.finish_request(token, request.method, response.status_code,
+                           time.perf_counter() - g.pop('metrics_start'), size)
+    return response
+
+
+@app.before_request
+def start_request_profile():
+    if request_profiler is not None and request.endpoint:
+        g.profile = request_profiler.start(request.endpoint)
+
+
+@app.teardown_request
+def finish_request_profile(exc):
+    active = g.pop('profile', None)
+    if active is not None:
+        try:
+            request_profiler.finish(active, request.path)
+        except Exception:
+            traceback.print_exc()
+
+
+# ============================================================================
+# Response Headers
+# ============================================================================
+
 @app.after_request
 def add_no_cache_headers(response):
     """Add no-cache headers to all responses"""
+    if response.headers.get('ETag'):
+        # Conditional GET endpoints: let the browser keep a copy but revalidate every time
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
@@ -214,11 +509,57 @@ def get_current_user():
 
 @app.route('/api/bin-locations', methods=['GET'])
 @login_required
+@conditional_get
 def get_bin_locations():
-    """Get all bin location records"""
+    """Get bin location records, optionally filtered and paginated"""
     try:
-        records = mssql_manager.get_bin_locations()
-        return jsonify({'success': True, 'data': records})
+        # Filters use the same % wildcard semantics as the search endpoints
+        bin_pattern = request.args.get('bin', '').strip()
+        product_pattern = request.args.get('product', '').strip()
+        upc_pattern = request.args.get('upc', '').strip()
+        # match=grid applies the grid's rules instead (bin exact/prefix, UPC exact)
+        grid_match = request.args.get('match') == 'grid'
+
+        # Full load streamed straight from the cursor
+        stream = request.args.get('stream')
+        if stream:
+            if stream not in STREAM_FORMATS:
+                return jsonify({'success': False, 'message': 'Invalid stream format'}), 400
+            return stream_records(
+                mssql_manager.iter_bin_locations(bin_pattern, product_pattern, upc_pattern, grid_match),
+                stream
+            )
+
+        # Full load (original behavior) unless a page was requested
+        if 'limit' not in request.args and 'cursor' not in request.args:
+            records, watermark = mssql_manager.get_bin_locations_with_watermark(
+                bin_pattern, product_pattern, upc_pattern, grid_match)
+            return jsonify({
+                'success': True,
+                'data': records,
+                'watermark': watermark
+            })
+
+        # Keyset pagination: sort=bin|product|upc|qty|updated, order=asc|desc,
+        # cursor from the previous page, count=1 adds total rows and quantities
+        limit = request.args.get('limit', 100, type=int)
+        if limit < 1 or limit > 1000:
+            return jsonify({'success': False, 'message': 'Limit must be between 1 and 1000'}), 400
+
+        page = mssql_manager.query_bin_locations(
+            bin_pattern=bin_pattern,
+            product_pattern=product_pattern,
+            upc_pattern=upc_pattern,
+            grid_match=grid_match,
+            sort=request.args.get('sort', 'bin'),
+            descending=request.args.get('order', 'asc').lower() == 'desc',
+            limit=limit,
+            cursor_token=request.args.get('cursor'),
+            include_total=request.args.get('count', '').lower() in ('1', 'true')
+        )
+        return jsonify({'success': True, **page})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         error_msg = str(e)
         if 'configuration not found' in error_msg.lower():
@@ -230,6 +571,23 @@ def get_bin_locations():
         return jsonify({'success': False, 'message': error_msg}), 500
 
 
+@app.route('/api/bin-locations/changes', methods=['GET'])
+@login_required
+def get_bin_location_changes():
+    """Get records changed and IDs deleted since the given watermark"""
+    try:
+        watermark = request.args.get('since', '')
+        if not watermark:
+            return jsonify({'success': False, 'message': 'Watermark (since) is required'}), 400
+
+        changes = mssql_manager.get_bin_location_changes(watermark)
+        return jsonify({'success': True, **changes})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @app.route('/api/bin-locations', methods=['POST'])
 @login_required
 def create_bin_location():
@@ -263,7 +621,7 @@ def update_bin_location(record_id):
             return jsonify({'success': False, 'message': 'Bin location is required'}), 400
 
         result = mssql_manager.update_bin_location(record_id, data, session['username'])
-        return jsonify(result)
+        return jsonify(result), 200 if result['success'] else 404
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -281,7 +639,7 @@ def adjust_quantity(record_id):
             return jsonify({'success': False, 'message': 'Adjustment cannot be zero'}), 400
 
         result = mssql_manager.adjust_quantity(record_id, adjustment, session['username'], notes)
-        return jsonify(result)
+        return jsonify(result), 200 if result['success'] else 404
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -292,204 +650,202 @@ def delete_bin_location(record_id):
     """Delete bin location record"""
     try:
         result = mssql_manager.delete_bin_location(record_id, session['username'])
+        return jsonify(result), 200 if result['success'] else 404
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+MAX_BULK_OPERATIONS = 1000
+
+BULK_OPERATION_TYPES = ('adjust', 'move', 'update', 'delete')
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate_bulk_operation(item) -> Optional[str]:
+    """Return an error message for an invalid bulk operation, or None"""
+    if not isinstance(item, dict):
+        return 'Operation must be an object'
+    if item.get('op') not in BULK_OPERATION_TYPES:
+        return f"op must be one of: {', '.join(BULK_OPERATION_TYPES)}"
+    if not _is_int(item.get('id')):
+        return 'id is required'
+    if item.get('notes') is not None and not isinstance(item['notes'], str):
+        return 'notes must be a string'
+
+    op = item['op']
+    if op == 'adjust':
+        if not _is_int(item.get('adjustment')) or item['adjustment'] == 0:
+            return 'Adjustment must be a non-zero whole number'
+    elif op == 'move':
+        if not _is_int(item.get('bin_location_id')):
+            return 'Bin location is required'
+    elif op == 'update':
+        if not item.get('product_upc'):
+            return 'Product is required'
+        if not _is_int(item.get('bin_location_id')):
+            return 'Bin location is required'
+        if item.get('qty_cases') is not None and not _is_int(item['qty_cases']):
+            return 'qty_cases must be a whole number'
+        if item.get('qty_per_case') is not None and not isinstance(item['qty_per_case'], (int, float)):
+            return 'qty_per_case must be a number'
+    return None
+
+
+@app.route('/api/bin-locations/bulk', methods=['POST'])
+@login_required
+def bulk_bin_locations():
+    """Apply a list of adjust/move/update/delete operations in one transaction"""
+    try:
+        data = request.json or {}
+        operations = data.get('operations')
+
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'success': False, 'message': 'operations must be a non-empty list'}), 400
+        if len(operations) > MAX_BULK_OPERATIONS:
+            return jsonify({
+                'success': False,
+                'message': f'At most {MAX_BULK_OPERATIONS} operations per request'
+            }), 400
+
+        # Validate everything before touching the database
+        errors = []
+        seen_ids = set()
+        for index, item in enumerate(operations):
+            error = _validate_bulk_operation(item)
+            if error is None:
+                if item['id'] in seen_ids:
+                    error = 'Each record may appear only once per request'
+                seen_ids.add(item['id'])
+            if error:
+                errors.append({'index': index, 'message': error})
+        if errors:
+            return jsonify({'success': False, 'message': 'Invalid operations', 'errors': errors}), 400
+
+        result = mssql_manager.bulk_apply(operations, session['username'],
+                                          atomic=bool(data.get('atomic')))
         return jsonify(result)
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
-@app.route('/api/export-excel', methods=['POST'])
+@app.route('/api/import/bin-locations', methods=['POST'])
 @login_required
-def export_to_excel():
-    """Export filtered bin location records to Excel"""
+def import_bin_locations():
+    """Create/update bin assignments from an uploaded .xlsx or .csv (dry_run=true to preview)"""
     try:
-        data = request.json
-        records = data.get('records', [])
+        upload = request.files.get('file')
+        if upload is None or not upload.filename:
+            return jsonify({'success': False, 'message': 'No file uploaded'}), 400
+
+        dry_run = request.form.get('dry_run', request.args.get('dry_run', '')).lower() in ('1', 'true', 'yes')
+        rows = iter_import_rows(upload.stream, upload.filename)
+        report = mssql_manager.import_bin_locations(rows, session['username'],
+                                                    dry_run=dry_run,
+                                                    source_name=upload.filename)
+        if report['stopped_at'] is not None:
+            # Partial import: chunks before stopped_at are committed
+            message = f"Import stopped at row {report['stopped_at']}; earlier rows were imported"
+            return jsonify({'success': False, 'message': message, **report})
+        return jsonify({'success': True, **report})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
 
-        if not records:
+
+def _export_filename() -> str:
+    """Generate export filename with Central Time timestamp"""
+    central_time = datetime.now(ZoneInfo("America/Chicago"))
+    timestamp = central_time.strftime('%Y%m%d_%H%M%S')
+    return f'bin_locations_export_{timestamp}.xlsx'
+
+
+@app.route('/api/export-excel', methods=['GET'])
+@login_required
+def export_filtered_to_excel():
+    """Export bin location records matching the grid filters to Excel (queried server-side)"""
+    try:
+        records = mssql_manager.iter_bin_locations(
+            request.args.get('bin', '').strip(),
+            request.args.get('product', '').strip(),
+            request.args.get('upc', '').strip(),
+            grid_match=request.args.get('match') == 'grid'
+        )
+
+        # Rows go from the cursor straight into a write-only workbook on disk,
+        # which is then streamed to the client
+        output = tempfile.TemporaryFile()
+        try:
+            with serialize_phase():
+                count = write_bin_locations_xlsx(records, output)
+        except Exception:
+            output.close()
+            raise
+
+        if count == 0:
+            output.close()
             return jsonify({'success': False, 'message': 'No records to export'}), 400
 
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Bin Locations"
-
-        # Define column headers
-        headers = [
-            'Bin Location',
-            'Product Name',
-            'Product UPC',
-            'Case Quantity',
-            'Qty per Case',
-            'Total Quantity',
-            'Bin Location ID',
-            'Created At',
-            'Last Updated'
-        ]
-
-        # Style definitions - Material Design 3 Slate theme
-        header_fill = PatternFill(start_color='546e7a', end_color='546e7a', fill_type='solid')
-        header_font = Font(bold=True, color='FFFFFF', size=11)
-        alt_row_fill = PatternFill(start_color='f8f9fa', end_color='f8f9fa', fill_type='solid')
-        totals_fill = PatternFill(start_color='eceff1', end_color='eceff1', fill_type='solid')
-        totals_font = Font(bold=True, size=11)
-        border = Border(
-            left=Side(style='thin', color='dadce0'),
-            right=Side(style='thin', color='dadce0'),
-            top=Side(style='thin', color='dadce0'),
-            bottom=Side(style='thin', color='dadce0')
+        output.seek(0)
+        response = send_file(
+            output,
+            mimetype=XLSX_MIMETYPE,
+            as_attachment=True,
+            download_name=_export_filename()
         )
+        response.headers['X-Record-Count'] = str(count)
+        return response
 
-        # Write headers
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-            cell.border = border
-
-        # Track totals
-        total_cases = 0
-        total_items = 0
-
-        # Write data rows
-        for row_num, record in enumerate(records, 2):
-            # Extract values with null handling
-            bin_location = record.get('BinLocation') or 'N/A'
-            product_name = record.get('ProductDescription') or 'N/A'
-            product_upc = record.get('ProductUPC') or 'N/A'
-            qty_cases = record.get('Qty_Cases') or 0
-            unit_qty2 = record.get('UnitQty2')
-            total_qty = record.get('TotalQuantity')
-            bin_location_id = record.get('BinLocationID') or 'N/A'
-            created_at = record.get('CreatedAt') or 'N/A'
-            last_update = record.get('LastUpdate') or 'N/A'
-
-            # Parse timestamps to display format
-            if created_at != 'N/A':
-                try:
-                    created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    created_at = created_at.strftime('%m/%d/%Y %I:%M %p')
-                except:
-                    pass
-
-            if last_update != 'N/A':
-                try:
-                    last_update = datetime.fromisoformat(last_update.replace('Z', '+00:00'))
-                    last_update = last_update.strftime('%m/%d/%Y %I:%M %p')
-                except:
-                    pass
-
-            # Handle null UnitQty2
-            if unit_qty2 is None or unit_qty2 == 0:
-                unit_qty2_display = 'Not Set'
-                total_qty_display = '—'
-            else:
-                unit_qty2_display = unit_qty2
-                if total_qty is not None:
-                    total_qty_display = total_qty
-                    total_items += total_qty
-                else:
-                    total_qty_display = '—'
-
-            total_cases += qty_cases
-
-            # Write row data
-            row_data = [
-                bin_location,
-                product_name,
-                product_upc,
-                qty_cases,
-                unit_qty2_display,
-                total_qty_display,
-                bin_location_id,
-                created_at,
-                last_update
-            ]
-
-            for col_num, value in enumerate(row_data, 1):
-                cell = ws.cell(row=row_num, column=col_num, value=value)
-                cell.border = border
-
-                # Right-align numbers
-                if col_num in [4, 5, 6]:
-                    if isinstance(value, (int, float)):
-                        cell.alignment = Alignment(horizontal='right')
-                        # Add thousand separators for numbers
-                        if col_num in [4, 6]:
-                            cell.number_format = '#,##0'
-                    else:
-                        cell.alignment = Alignment(horizontal='center')
-                else:
-                    cell.alignment = Alignment(horizontal='left')
-
-                # Alternating row colors
-                if row_num % 2 == 0:
-                    cell.fill = alt_row_fill
-
-        # Add totals row
-        totals_row = len(records) + 2
-        totals_data = [
-            'TOTALS',
-            '',
-            '',
-            total_cases,
-            '',
-            total_items if total_items > 0 else '—',
-            f'{len(records)} records',
-            '',
-            ''
-        ]
-
-        for col_num, value in enumerate(totals_data, 1):
-            cell = ws.cell(row=totals_row, column=col_num, value=value)
-            cell.fill = totals_fill
-            cell.font = totals_font
-            cell.border = border
-
-            if col_num in [4, 6]:
-                cell.alignment = Alignment(horizontal='right')
-                if isinstance(value, (int, float)):
-                    cell.number_format = '#,##0'
-            else:
-                cell.alignment = Alignment(horizontal='left')
-
-        # Auto-fit column widths
-        column_widths = {
-            'A': 18,  # Bin Location
-            'B': 35,  # Product Name
-            'C': 15,  # Product UPC
-            'D': 15,  # Case Quantity
-            'E': 14,  # Qty per Case
-            'F': 15,  # Total Quantity
-            'G': 16,  # Bin Location ID
-            'H': 20,  # Created At
-            'I': 20   # Last Updated
-        }
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
 
-        for col, width in column_widths.items():
-            ws.column_dimensions[col].width = width
 
-        # Generate filename with Central Time timestamp
-        central_time = datetime.now(ZoneInfo("America/Chicago"))
-        timestamp = central_time.strftime('%Y%m%d_%H%M%S')
-        filename = f'bin_locations_export_{timestamp}.xlsx'
+@app.route('/api/export-excel', methods=['POST'])
+@login_required
+def export_to_excel():
+    """Export filtered bin location records posted by the client to Excel"""
+    try:
+        data = request.json
+        records = data.get('records', [])
+
+        if not records:
+            return jsonify({'success': False, 'message': 'No records to export'}), 400
 
-        # Save to BytesIO
         output = BytesIO()
-        wb.save(output)
+        with serialize_phase():
+            write_bin_locations_xlsx(records, output)
         output.seek(0)
 
         return send_file(
             output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            mimetype=XLSX_MIMETYPE,
             as_attachment=True,
-            download_name=filename
+            download_name=_export_filename()
         )
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@app.route('/api/export-csv', methods=['GET'])
+@login_required
+def export_bin_locations_csv():
+    """Export all (optionally filtered) bin location records as CSV, streamed from the cursor"""
+    try:
+        records = mssql_manager.iter_bin_locations(
+            request.args.get('bin', '').strip(),
+            request.args.get('product', '').strip(),
+            request.args.get('upc', '').strip(),
+            grid_match=request.args.get('match') == 'grid'
+        )
+        return csv_response(records, BIN_LOCATION_CSV_COLUMNS, 'bin_locations_export')
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 # ============================================================================
 # Lookup API
 # ============================================================================
@@ -534,6 +890,7 @@ def search_bins():
 
 @app.route('/api/bin-locations/unused', methods=['GET'])
 @login_required
+@conditional_get
 def get_unused_bins():
     """Get bin locations that are not used in Items_BinLocations"""
     try:
@@ -559,22 +916,63 @@ def get_history():
         end_date = request.args.get('end_date')
         limit = request.args.get('limit', 500, type=int)
 
-        records = mssql_manager.get_history_records(
+        stream = request.args.get('stream')
+        if stream:
+            if stream not in STREAM_FORMATS:
+                return jsonify({'success': False, 'message': 'Invalid stream format'}), 400
+            # A stream sends the full result unless a limit was given
+            return stream_records(mssql_manager.iter_history_records(
+                record_id=record_id,
+                operation_type=operation_type,
+                username=username,
+                start_date=start_date,
+                end_date=end_date,
+                limit=request.args.get('limit', type=int)
+            ), stream)
+
+        # Keyset pagination: next_cursor (null on the last page) is passed
+        # back as cursor to continue after the last row served
+        if limit < 1:
+            return jsonify({'success': False, 'message': 'Limit must be at least 1'}), 400
+
+        page = mssql_manager.query_history_records(
             record_id=record_id,
             operation_type=operation_type,
             username=username,
             start_date=start_date,
             end_date=end_date,
-            limit=limit
+            limit=limit,
+            cursor_token=request.args.get('cursor')
         )
 
-        return jsonify({'success': True, 'data': records})
+        return jsonify({'success': True, **page})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/history/export-csv', methods=['GET'])
+@login_required
+def export_history_csv():
+    """Export history records as CSV (same filters as /api/history, no row limit)"""
+    try:
+        records = mssql_manager.iter_history_records(
+            record_id=request.args.get('record_id', type=int),
+            operation_type=request.args.get('operation_type'),
+            username=request.args.get('username'),
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            limit=None
+        )
+        return csv_response(records, HISTORY_CSV_COLUMNS, 'history_export')
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
 @app.route('/api/history/stats', methods=['GET'])
 @login_required
+@conditional_get
 def get_history_stats():
     """Get history statistics"""
     try:
@@ -584,6 +982,42 @@ def get_history_stats():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@app.route('/api/history/stats/daily', methods=['GET'])
+@login_required
+@conditional_get
+def get_history_daily_stats():
+    """Get per-day history counts (start_date/end_date inclusive, YYYY-MM-DD)"""
+    try:
+        days = mssql_manager.get_history_daily(
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            operation_type=request.args.get('operation_type')
+        )
+        return jsonify({'success': True, 'data': days})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/history/stats/users', methods=['GET'])
+@login_required
+@conditional_get
+def get_history_user_stats():
+    """Get per-user history counts (start_date/end_date inclusive, YYYY-MM-DD)"""
+    try:
+        users = mssql_manager.get_history_users(
+            start_date=request.args.get('start_date'),
+            end_date=request.args.get('end_date'),
+            operation_type=request.args.get('operation_type')
+        )
+        return jsonify({'success': True, 'data': users})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 # ============================================================================
 # Health Check
 # ============================================================================
@@ -594,6 +1028,94 @@ def health_check():
     return jsonify({'status': 'ok'})
 
 
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request, manager-method and connection pool metrics in Prometheus text format"""
+    if metrics is None:
+        return jsonify({'success': False, 'message': 'Metrics are disabled (set METRICS=1)'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.route('/api/stats', methods=['GET'])
+@login_required
+def get_stats():
+    """Get runtime statistics (connection pool, in-memory indexes)"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'pool': mssql_manager.get_pool_stats(),
+            'product_index': mssql_manager.product_index.stats() if mssql_manager.product_index else None,
+            'bin_directory': mssql_manager.bin_directory.stats() if mssql_manager.bin_directory else None,
+            'search_cache': mssql_manager.search_cache.stats() if mssql_manager.search_cache else None,
+            'unused_bins': mssql_manager.unused_bins.stats() if mssql_manager.unused_bins else None,
+            'history_rollups': mssql_manager.history_rollups.stats() if mssql_manager.history_rollups else None,
+            'history_writer': mssql_manager.history_writer.stats() if mssql_manager.history_writer else None,
+            'replica': mssql_manager.replica.stats() if mssql_manager.replica else None,
+            'sessions': session_store.stats() if session_store else {'backend': SESSION_BACKEND}
+        }
+    })
+
+
+# ============================================================================
+# Admin API
+# ============================================================================
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """Newest slow statements seen by this worker (all workers append to the log file)"""
+    slow_log = mssql_manager.slow_query_log
+    if slow_log is None:
+        return jsonify({'success': False, 'message': 'Slow-query log is disabled (set SLOW_QUERY_MS)'}), 404
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'success': True, 'data': slow_log.recent(limit), 'stats': slow_log.stats()})
+
+
+@app.route('/api/admin/profile', methods=['GET'])
+@admin_required
+def get_profiles():
+    """Armed endpoints and the newest profile files"""
+    if request_profiler is None:
+        return jsonify({'success': False, 'message': 'Request profiler is disabled'}), 404
+    return jsonify({'success': True, 'armed': request_profiler.armed(), 'results': request_profiler.results()})
+
+
+@app.route('/api/admin/profile', methods=['POST'])
+@admin_required
+def arm_profiler():
+    """Profile the next `count` requests to a route endpoint (count 0 disarms)"""
+    if request_profiler is None:
+        return jsonify({'success': False, 'message': 'Request profiler is disabled'}), 404
+    try:
+        data = request.json or {}
+        endpoint = data.get('endpoint')
+        count = data.get('count', 1)
+        mode = data.get('mode', 'cprofile')
+
+        if endpoint not in app.view_functions:
+            return jsonify({'success': False, 'message': f'Unknown endpoint: {endpoint}'}), 400
+        if not isinstance(count, int) or isinstance(count, bool) or not 0 <= count <= 100:
+            return jsonify({'success': False, 'message': 'count must be a whole number from 0 to 100'}), 400
+        if mode not in PROFILE_MODES:
+            return jsonify({'success': False, 'message': f"mode must be one of: {', '.join(PROFILE_MODES)}"}), 400
+
+        request_profiler.arm(endpoint, count, mode)
+        return jsonify({'success': True, 'armed': request_profiler.armed()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@app.route('/api/admin/profile/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download a profile file"""
+    if request_profiler is None:
+        return jsonify({'success': False, 'message': 'Request profiler is disabled'}), 404
+    if not name.endswith(('.prof', '.txt', '.folded')):
+        return jsonify({'success': False, 'message': 'Resource not found'}), 404
+    return send_from_directory(request_profiler.output_dir, name, as_attachment=True)
+
+
 # ============================================================================
 # Error Handlers
 # ============================================================================
@@ -610,5 +1132,16 @@ def server_error(e):
     return jsonify({'success': False, 'message': 'Internal server error'}), 500
 
 
+def after_fork():
+    """Start this process's background threads in a worker forked from a preloaded master"""
+    if session_sweeper is not None:
+        session_sweeper.after_fork()
+        session_sweeper.start()
+    mssql_manager.after_fork()
+
+
+# Development server only; production runs under gunicorn (see gunicorn.conf.py)
 if __name__ == '__main__':
+    if WEB_PRELOAD:
+        after_fork()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,431 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import isgeneratorfunction
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+DB_PHASES = ('connect', 'execute', 'fetch')
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ============================================================================
+# Metric Types
+# ============================================================================
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[Any, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, labels: Tuple[Any, ...] = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_labels(self.label_names, labels)} {_number(value)}'
+                for labels, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[Any, ...], List[Any]] = {}
+        self._lock = Lock()
+
+    def observe(self, labels: Tuple[Any, ...], value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(series[0]), series[1])
+                              for labels, series in self._series.items())
+        lines = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _number(float(bound))
+                bucket_labels = _labels(self.label_names, labels, 'le="' + le + '"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, labels)} {cumulative}')
+        return lines
+
+
+# ============================================================================
+# Registry
+# ============================================================================
+
+class _Timings:
+    """Phase durations accumulated for one request or one manager call"""
+
+    __slots__ = ('name', 'phases')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.phases: Dict[str, float] = {}
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def db_time(self) -> float:
+        return sum(self.phases.get(phase, 0.0) for phase in DB_PHASES)
+
+
+class Metrics:
+    """Request, manager-method and query metrics rendered in Prometheus text format
+
+    Timings are attributed through context variables: the request being
+    served and the MSSQLManager method running. Each cursor operation adds
+    its duration to both, and they are observed once the request or the
+    method finishes.
+    """
+
+    def __init__(self):
+        self._request: ContextVar[Optional[_Timings]] = ContextVar('metrics_request', default=None)
+        self._method: ContextVar[Optional[_Timings]] = ContextVar('metrics_method', default=None)
+        self._gauges: List[Tuple[str, str, Callable[[], Dict[str, float]]]] = []
+
+        self.http_requests = Counter(
+            'http_requests_total', 'HTTP requests by endpoint, method and status',
+            ('endpoint', 'method', 'status'))
+        self.http_duration = Histogram(
+            'http_request_duration_seconds', 'HTTP request latency until the response is built',
+            ('endpoint',))
+        self.http_phases = Histogram(
+            'http_request_phase_seconds', 'Time per request spent in each phase',
+            ('endpoint', 'phase'))
+        self.http_errors = Counter(
+            'http_request_errors_total', 'Requests that raised or returned a 5xx status',
+            ('endpoint',))
+        self.http_bytes = Counter(
+            'http_response_bytes_total', 'Response body bytes sent',
+            ('endpoint',))
+        self.method_duration = Histogram(
+            'mssql_method_duration_seconds', 'MSSQLManager method latency',
+            ('method',))
+        self.method_phases = Histogram(
+            'mssql_method_phase_seconds', 'Time per MSSQLManager call spent in each phase',
+            ('method', 'phase'))
+        self.method_errors = Counter(
+            'mssql_method_errors_total', 'MSSQLManager calls that raised',
+            ('method',))
+        self.rows = Counter(
+            'mssql_rows_total', 'Rows fetched from SQL Server',
+            ('method',))
+        self._metrics = [self.http_requests, self.http_duration, self.http_phases, self.http_errors,
+                         self.http_bytes, self.method_duration, self.method_phases,
+                         self.method_errors, self.rows]
+
+    def add_gauges(self, prefix: str, help_text: str, collect: Callable[[], Dict[str, float]]):
+        """Expose numeric values from collect() as gauges named prefix_<key>, read at scrape time"""
+        self._gauges.append((prefix, help_text, collect))
+
+    # ------------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------------
+
+    def record(self, phase: str, seconds: float, rows: int = 0):
+        """Attribute a phase duration (and fetched rows) to the current request and method"""
+        request_timings = self._request.get()
+        if request_timings is not None:
+            request_timings.add(phase, seconds)
+        method_timings = self._method.get()
+        if method_timings is not None:
+            method_timings.add(phase, seconds)
+        if rows:
+            self.rows.inc((method_timings.name if method_timings else 'other',), rows)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a block of the current request as `name`, excluding database time inside it"""
+        request_timings = self._request.get()
+        db_before = request_timings.db_time() if request_timings else 0.0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if request_timings is not None:
+                elapsed = time.perf_counter() - start
+                request_timings.add(name, max(elapsed - (request_timings.db_time() - db_before), 0.0))
+
+    def start_request(self, endpoint: str):
+        return self._request.set(_Timings(endpoint))
+
+    def finish_request(self, token, method: str, status: int, seconds: float,
+                       size: Optional[int], failed: bool = False):
+        timings = self._request.get()
+        self._request.reset(token)
+        if timings is None:
+            return
+        endpoint = timings.name
+        self.http_requests.inc((endpoint, method, status))
+        self.http_duration.observe((endpoint,), seconds)
+        for phase, phase_seconds in timings.phases.items():
+            self.http_phases.observe((endpoint, phase), phase_seconds)
+        if failed or status >= 500:
+            self.http_errors.inc((endpoint,))
+        if size:
+            self.http_bytes.inc((endpoint,), size)
+
+    def count_bytes(self, endpoint: str, chunks: Iterable[Any]) -> Iterator[Any]:
+        """Pass a streamed body through, counting its bytes"""
+        size = 0
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.http_bytes.inc((endpoint,), size)
+
+    # ------------------------------------------------------------------------
+    # Manager methods
+    # ------------------------------------------------------------------------
+
+    def _finish_method(self, timings: _Timings, seconds: float, failed: bool):
+        self.method_duration.observe((timings.name,), seconds)
+        for phase, phase_seconds in timings.phases.items():
+            self.method_phases.observe((timings.name, phase), phase_seconds)
+        if failed:
+            self.method_errors.inc((timings.name,))
+
+    def wrap_method(self, name: str, func: Callable) -> Callable:
+        """Time a (bound) manager method and attribute cursor work inside it to `name`"""
+        if isgeneratorfunction(func):
+            # Generators are timed from the first row to exhaustion
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                timings = _Timings(name)
+                token = self._method.set(timings)
+                start = time.perf_counter()
+                failed = False
+                try:
+                    yield from func(*args, **kwargs)
+                except BaseException:
+                    failed = True
+                    raise
+                finally:
+                    try:
+                        self._method.reset(token)
+                    except ValueError:
+                        # Resumed from a different context than it started in
+                        self._method.set(None)
+                    self._finish_method(timings, time.perf_counter() - start, failed)
+            return generator_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _Timings(name)
+            token = self._method.set(timings)
+            start = time.perf_counter()
+            failed = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self._method.reset(token)
+                self._finish_method(timings, time.perf_counter() - start, failed)
+        return wrapper
+
+    # ------------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------------
+
+    def render(self) -> str:
+        """All metrics in Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help_text}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render())
+        for prefix, help_text, collect in self._gauges:
+            try:
+                values = collect() or {}
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'# HELP {prefix}_{key} {help_text}')
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# ============================================================================
+# Instrumented pymssql Objects
+# ============================================================================
+
+class InstrumentedCursor:
+    """pymssql cursor proxy timing execute and fetch calls
+
+    With a slow-query log, each statement's execute and fetch time is
+    summed and reported when the next statement starts or the connection
+    is released.
+    """
+
+    __slots__ = ('_cursor', '_metrics', '_slow_log', '_statement')
+
+    def __init__(self, cursor, metrics: Optional['Metrics'], slow_log=None):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._slow_log = slow_log
+        # [sql, params, seconds, rows] of the statement being read
+        self._statement = None
+
+    def _timed(self, phase: str, seconds: float, rows: int = 0):
+        if self._metrics is not None:
+            self._metrics.record(phase, seconds, rows)
+        if self._statement is not None:
+            self._statement[2] += seconds
+            self._statement[3] += rows
+
+    def finish_statement(self):
+        """Report the current statement to the slow-query log"""
+        statement = self._statement
+        if statement is not None:
+            self._statement = None
+            self._slow_log.record(*statement)
+
+    def execute(self, operation, *args, **kwargs):
+        if self._slow_log is not None:
+            self.finish_statement()
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            if self._slow_log is not None:
+                self._statement = [operation, args[0] if args else kwargs.get('params'), 0.0, 0]
+            self._timed('execute', time.perf_counter() - start)
+
+    def executemany(self, operation, *args, **kwargs):
+        if self._slow_log is not None:
+            self.finish_statement()
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, *args, **kwargs)
+        finally:
+            if self._slow_log is not None:
+                self._statement = [operation, None, 0.0, 0]
+            self._timed('execute', time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._timed('fetch', time.perf_counter() - start, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._timed('fetch', time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._timed('fetch', time.perf_counter() - start, len(rows))
+        return rows
+
+    def __iter__(self):
+        # Streaming reads: time the cursor in batches rather than per row
+        while True:
+            rows = self.fetchmany(500)
+            if not rows:
+                return
+            yield from rows
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """pymssql connection proxy whose cursors are instrumented"""
+
+    __slots__ = ('_conn', '_metrics', '_slow_log', '_cursors')
+
+    def __init__(self, conn, metrics: Optional['Metrics'], slow_log=None):
+        self._conn = conn
+        self._metrics = metrics
+        self._slow_log = slow_log
+        self._cursors: List[InstrumentedCursor] = []
+
+    def cursor(self, *args, **kwargs) -> InstrumentedCursor:
+        cursor = InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._metrics, self._slow_log)
+        if self._slow_log is not None:
+            self._cursors.append(cursor)
+        return cursor
+
+    def release(self):
+        """Called when the connection goes back to the pool"""
+        for cursor in self._cursors:
+            cursor.finish_statement()
+        self._cursors = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# ============================================================================
+# JSON Serialization
+# ============================================================================
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that records jsonify() time as the 'serialize' phase"""
+
+    metrics: Optional[Metrics] = None
+
+    def response(self, *args, **kwargs):
+        if self.metrics is None:
+            return super().response(*args, **kwargs)
+        with self.metrics.phase('serialize'):
+            return super().response(*args, **kwargs)
@@ -0,0 +1,286 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from threading import Event, Lock, Thread, get_ident
+from typing import Any, Dict, List, Optional, Tuple
+
+PROFILE_MODES = ('cprofile', 'sample')
+
+_DATABASE_MODULE = os.path.join('app', 'database.py')
+
+
+# ============================================================================
+# Slow-Query Log
+# ============================================================================
+
+def redact_params(params: Any) -> Any:
+    """Keep numbers, dates and NULLs; replace strings and binary values by their length"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: redact_params(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [redact_params(value) for value in params]
+    if isinstance(params, (str, bytes, bytearray)):
+        return f'<{type(params).__name__}:{len(params)}>'
+    if isinstance(params, datetime):
+        return params.isoformat(sep=' ')
+    if isinstance(params, (bool, int, float)):
+        return params
+    return f'<{type(params).__name__}>'
+
+
+def _manager_caller() -> str:
+    """Name of the innermost MSSQLManager function on the stack"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.endswith(_DATABASE_MODULE) and code.co_name != 'get_connection':
+            return code.co_name
+        frame = frame.f_back
+    return 'unknown'
+
+
+class SlowQueryLog:
+    """Records statements slower than a threshold to a rotating JSON-lines file
+
+    A statement's duration is its execute time plus the time spent fetching
+    its rows. The newest entries are also kept in memory for the admin API.
+    """
+
+    def __init__(self, threshold: float, path: str = '/app/data/slow_queries.log',
+                 keep: int = 200, max_bytes: int = 5 * 1024 * 1024, backups: int = 3):
+        self.threshold = threshold
+        self.path = path
+        self._recent: deque = deque(maxlen=keep)
+        self._lock = Lock()
+        self.logged = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._logger = logging.getLogger(f'{__name__}.slow_queries')
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+
+    def record(self, sql: str, params: Any, seconds: float, rows: int):
+        """Log the statement if it took at least `threshold` seconds"""
+        if seconds < self.threshold:
+            return
+        entry = {
+            'timestamp': datetime.now().isoformat(sep=' ', timespec='milliseconds'),
+            'pid': os.getpid(),
+            'method': _manager_caller(),
+            'duration_ms': round(seconds * 1000, 1),
+            'rows': rows,
+            'sql': ' '.join(sql.split()),
+            'params': redact_params(params)
+        }
+        self._logger.info(json.dumps(entry))
+        with self._lock:
+            self._recent.append(entry)
+            self.logged += 1
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest slow statements seen by this process, newest first"""
+        with self._lock:
+            return list(self._recent)[::-1][:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'threshold_ms': round(self.threshold * 1000, 1),
+                'logged': self.logged,
+                'path': self.path
+            }
+
+
+# ============================================================================
+# Request Profiler
+# ============================================================================
+
+class _Sampler:
+    """Samples one thread's stack every `interval` seconds into folded stacks"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name='request-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class RequestProfiler:
+    """Profiles the next N requests to an endpoint, writing results to a directory
+
+    Arming is stored in a small SQLite file so every worker process sees it
+    and the N requests are shared between them. Requests only stat() that
+    file until something is armed.
+    """
+
+    def __init__(self, output_dir: str = '/app/data/profiles'):
+        self.output_dir = output_dir
+        self.db_path = os.path.join(output_dir, 'profiler.db')
+        self._armed: set = set()
+        self._armed_version = None
+        self._lock = Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize SQLite database with the armed-endpoints table"""
+        with self.get_connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS profile_requests (
+                    endpoint TEXT PRIMARY KEY,
+                    mode TEXT NOT NULL,
+                    remaining INTEGER NOT NULL
+                )
+            ''')
+
+    @contextmanager
+    def get_connection(self):
+        """Get SQLite connection with automatic cleanup"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def arm(self, endpoint: str, count: int, mode: str = 'cprofile'):
+        """Profile the next `count` requests to `endpoint` (count 0 disarms)"""
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"mode must be one of: {', '.join(PROFILE_MODES)}")
+        with self.get_connection() as conn:
+            if count > 0:
+                conn.execute('''
+                    INSERT INTO profile_requests (endpoint, mode, remaining) VALUES (?, ?, ?)
+                    ON CONFLICT (endpoint) DO UPDATE SET mode = excluded.mode, remaining = excluded.remaining
+                ''', (endpoint, mode, count))
+            else:
+                conn.execute('DELETE FROM profile_requests WHERE endpoint = ?', (endpoint,))
+
+    def armed(self) -> List[Dict[str, Any]]:
+        with self.get_connection() as conn:
+            rows = conn.execute('SELECT endpoint, mode, remaining FROM profile_requests '
+                                'WHERE remaining > 0 ORDER BY endpoint').fetchall()
+        return [{'endpoint': endpoint, 'mode': mode, 'remaining': remaining}
+                for endpoint, mode, remaining in rows]
+
+    def _claim(self, endpoint: str) -> Optional[str]:
+        """Take one of the endpoint's remaining requests; returns the mode, or None"""
+        try:
+            version = os.stat(self.db_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if version != self._armed_version:
+            with self._lock:
+                self._armed = {row['endpoint'] for row in self.armed()}
+                self._armed_version = version
+        if endpoint not in self._armed:
+            return None
+
+        with self.get_connection() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute('SELECT mode FROM profile_requests WHERE endpoint = ? AND remaining > 0',
+                               (endpoint,)).fetchone()
+            if row:
+                conn.execute('UPDATE profile_requests SET remaining = remaining - 1 WHERE endpoint = ?',
+                             (endpoint,))
+                conn.execute('DELETE FROM profile_requests WHERE remaining <= 0')
+            conn.execute('COMMIT')
+        return row[0] if row else None
+
+    def start(self, endpoint: str) -> Optional[Tuple[str, str, Any, float]]:
+        """Start profiling this request if its endpoint is armed"""
+        mode = self._claim(endpoint)
+        if mode is None:
+            return None
+        if mode == 'sample':
+            profiler = _Sampler(get_ident())
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return endpoint, mode, profiler, time.perf_counter()
+
+    def finish(self, active: Tuple[str, str, Any, float], path: str) -> str:
+        """Stop profiling and write the results; returns the output file name"""
+        endpoint, mode, profiler, start = active
+        elapsed = time.perf_counter() - start
+        if mode == 'sample':
+            profiler.stop()
+        else:
+            profiler.disable()
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        basename = f"{re.sub(r'[^A-Za-z0-9_]', '_', endpoint)}_{stamp}_{os.getpid()}"
+        header = f'# {path} ({endpoint}) {elapsed * 1000:.1f} ms, pid {os.getpid()}\n'
+
+        if mode == 'sample':
+            # Folded stacks: feed to flamegraph.pl or speedscope
+            name = f'{basename}.folded'
+            with open(os.path.join(self.output_dir, name), 'w') as f:
+                f.write(header)
+                f.write(f'# {profiler.samples} samples every {profiler.interval * 1000:g} ms\n')
+                for stack, count in profiler.stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+            return name
+
+        # Binary stats for pstats/snakeviz plus a readable top-50 summary
+        profiler.dump_stats(os.path.join(self.output_dir, f'{basename}.prof'))
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(50)
+        name = f'{basename}.txt'
+        with open(os.path.join(self.output_dir, name), 'w') as f:
+            f.write(header)
+            f.write(summary.getvalue())
+        return name
+
+    def results(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Newest profile files"""
+        files = []
+        for entry in os.scandir(self.output_dir):
+            if entry.is_file() and entry.name.endswith(('.prof', '.txt', '.folded')):
+                stat = entry.stat()
+                files.append({
+                    'name': entry.name,
+                    'size': stat.st_size,
+                    'created': datetime.fromtimestamp(stat.st_mtime)
+                })
+        files.sort(key=lambda item: item['created'], reverse=True)
+        return files[:limit]
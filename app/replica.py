@@ -0,0 +1,692 @@
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.lookups import like_to_regex
+
+logger = logging.getLogger(__name__)
+
+
+# Sort keys of query_bin_locations in SQLite; NULLs folded and text compared
+# case-insensitively, like the SQL Server expressions
+REPLICA_SORTS = {
+    'bin': "IFNULL(bl.BinLocation, '') COLLATE NOCASE",
+    'product': "IFNULL(ibl.ProductDescription, '') COLLATE NOCASE",
+    'upc': "IFNULL(ibl.ProductUPC, '') COLLATE NOCASE",
+    'qty': 'IFNULL(ibl.Qty_Cases, 0)',
+    'updated': 'ibl.LastUpdate'
+}
+
+_DATETIME_COLUMNS = ('CreatedAt', 'LastUpdate')
+
+_BIN_LOCATION_JOINS = '''
+    FROM Items_BinLocations ibl
+    LEFT JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID
+    LEFT JOIN Items_tbl it ON ibl.ProductUPC = it.ProductUPC
+'''
+
+
+def _text(value: Optional[datetime]) -> Optional[str]:
+    """DATETIME keeps milliseconds; stored as sortable text"""
+    return value.isoformat(sep=' ', timespec='milliseconds') if value else None
+
+
+def _float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+@lru_cache(maxsize=256)
+def _like_regex(pattern: str):
+    return like_to_regex(pattern)
+
+
+def _like(pattern: Optional[str], value: Any) -> Optional[int]:
+    """SQL Server LIKE (character classes, case-insensitive) in place of SQLite's"""
+    if pattern is None or value is None:
+        return None
+    regex = _like_regex(pattern)
+    return 1 if regex is not None and regex.fullmatch(str(value)) else 0
+
+
+def _record(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    for column in _DATETIME_COLUMNS:
+        if record.get(column):
+            record[column] = datetime.fromisoformat(record[column])
+    return record
+
+
+def _sql(clauses: List[str]) -> List[str]:
+    """Filter clauses built for pymssql (%s placeholders) in sqlite3's paramstyle"""
+    return [clause.replace('%s', '?') for clause in clauses]
+
+
+class InventoryReplica:
+    """Local SQLite (WAL) copy of Items_BinLocations, BinLocations_tbl and the Items_tbl read columns
+
+    sync() catches up incrementally: rows whose LastUpdate is at or after
+    the previous high-water mark (re-read with the delta overlap), DELETE
+    history rows after the last HistoryID as tombstones, and the bin and
+    item tables whenever their CHECKSUM_AGG changes (checked every
+    `lookup_interval` seconds). Every `full_sync_interval` the copy is
+    reloaded whole, which also picks up changes made outside the app
+    without a LastUpdate stamp. Several processes can sync the same file:
+    one claims the sync in replica_state before querying SQL Server, and
+    the others skip theirs while it holds the claim or while its last
+    sync is younger than `sync_interval`.
+
+    Reads return None while the last completed sync, or the last lookup
+    check, started more than `max_staleness` seconds ago, so callers fall
+    back to SQL Server.
+    """
+
+    def __init__(self, db_path: str = '/app/data/replica.db', max_staleness: float = 30,
+                 full_sync_interval: float = 3600, lookup_interval: float = 20,
+                 sync_interval: float = 5, claim_timeout: float = 60):
+        if lookup_interval + sync_interval > max_staleness:
+            raise ValueError('Replica lookup interval plus sync interval must not exceed max staleness')
+        self.db_path = db_path
+        self.max_staleness = max_staleness
+        self.full_sync_interval = full_sync_interval
+        self.lookup_interval = lookup_interval
+        self.sync_interval = sync_interval
+        self.claim_timeout = claim_timeout
+        self.lock = Lock()
+        self.ready = False
+        self.syncs = 0
+        self.skipped_syncs = 0
+        self.full_syncs = 0
+        self.last_applied = 0
+        self.reads = 0
+        self.stale_reads = 0
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize SQLite database with the replicated tables and sync state"""
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS Items_BinLocations (
+                    id INTEGER PRIMARY KEY,
+                    ProductUPC TEXT COLLATE NOCASE,
+                    ProductDescription TEXT COLLATE NOCASE,
+                    Qty_Cases INTEGER,
+                    BinLocationID INTEGER,
+                    CreatedAt TEXT,
+                    LastUpdate TEXT
+                );
+                CREATE INDEX IF NOT EXISTS ix_replica_ibl_bin ON Items_BinLocations (BinLocationID);
+                CREATE INDEX IF NOT EXISTS ix_replica_ibl_upc ON Items_BinLocations (ProductUPC);
+                CREATE INDEX IF NOT EXISTS ix_replica_ibl_update ON Items_BinLocations (LastUpdate);
+
+                CREATE TABLE IF NOT EXISTS BinLocations_tbl (
+                    BinLocationID INTEGER PRIMARY KEY,
+                    BinLocation TEXT COLLATE NOCASE
+                );
+                CREATE INDEX IF NOT EXISTS ix_replica_bins_name ON BinLocations_tbl (BinLocation);
+
+                CREATE TABLE IF NOT EXISTS Items_tbl (
+                    ProductID INTEGER PRIMARY KEY,
+                    ProductUPC TEXT COLLATE NOCASE,
+                    ProductSKU TEXT COLLATE NOCASE,
+                    ProductDescription TEXT COLLATE NOCASE,
+                    UnitQty2 REAL,
+                    Discontinued INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS ix_replica_items_upc ON Items_tbl (ProductUPC);
+
+                CREATE TABLE IF NOT EXISTS deleted_records (
+                    history_id INTEGER PRIMARY KEY,
+                    record_id INTEGER NOT NULL
+                );
+
+                -- Deletes written through by this app, until their history tombstone is synced
+                CREATE TABLE IF NOT EXISTS local_deletes (
+                    record_id INTEGER PRIMARY KEY,
+                    deleted_at TEXT NOT NULL
+                );
+
+                CREATE TABLE IF NOT EXISTS replica_state (
+                    id INTEGER PRIMARY KEY,
+                    source TEXT,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    last_update TEXT,
+                    last_history_id INTEGER,
+                    tombstones_from INTEGER,
+                    bins_checksum INTEGER,
+                    items_checksum INTEGER,
+                    synced_at REAL,
+                    full_synced_at REAL,
+                    lookups_checked_at REAL,
+                    synced_by TEXT,
+                    claimed_by TEXT,
+                    claimed_at REAL
+                );
+                INSERT OR IGNORE INTO replica_state (id) VALUES (1);
+            ''')
+
+    @contextmanager
+    def get_connection(self):
+        """Get SQLite connection with automatic cleanup"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.create_function('like', 2, _like, deterministic=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _state(conn) -> sqlite3.Row:
+        return conn.execute('SELECT * FROM replica_state WHERE id = 1').fetchone()
+
+    @property
+    def _claimant(self) -> str:
+        # Evaluated per call so a forked worker claims syncs under its own pid
+        return f'{os.getpid()}:{id(self)}'
+
+    # ========================================================================
+    # Sync
+    # ========================================================================
+
+    def sync(self, source: str,
+             load_snapshot: Callable[[], Dict[str, Any]],
+             load_changes: Callable[[Optional[datetime], int, Optional[Tuple]], Dict[str, Any]]) -> int:
+        """Catch up with SQL Server; returns the number of rows and tombstones applied
+
+        `source` identifies the server/database (a different one triggers a
+        full reload). `load_snapshot()` returns history_id, rows, bins,
+        items and their checksums; `load_changes(last_update, history_id,
+        checksums)` returns history_id, the rows changed since last_update,
+        `deleted` (HistoryID, RecordID) pairs after history_id and, when
+        `checksums` (bins, items) is given, the checksums plus the bins or
+        items whose checksum differs (None when unchanged).
+        """
+        with self.lock:
+            with self.get_connection() as conn:
+                claimant = self._claimant
+                now = time.time()
+                conn.execute('BEGIN IMMEDIATE')
+                state = self._state(conn)
+                full = (state['source'] != source or state['last_history_id'] is None
+                        or now - (state['full_synced_at'] or 0) >= self.full_sync_interval)
+                claimed = (state['claimed_by'] not in (None, claimant)
+                           and now - (state['claimed_at'] or 0) < self.claim_timeout)
+                recent = (not full and state['synced_by'] != claimant
+                          and now - (state['synced_at'] or 0) < self.sync_interval)
+                if claimed or recent:
+                    # Another process is syncing or just did; its copy serves this one too
+                    conn.execute('ROLLBACK')
+                    self.ready = True
+                    self.skipped_syncs += 1
+                    return 0
+                conn.execute('UPDATE replica_state SET claimed_by = ?, claimed_at = ? WHERE id = 1',
+                             (claimant, now))
+                conn.execute('COMMIT')
+
+                try:
+                    check_lookups = full or now - (state['lookups_checked_at'] or 0) >= self.lookup_interval
+                    started = time.time()
+                    if full:
+                        data = load_snapshot()
+                    else:
+                        last_update = state['last_update']
+                        data = load_changes(datetime.fromisoformat(last_update) if last_update else None,
+                                            state['last_history_id'],
+                                            (state['bins_checksum'], state['items_checksum'])
+                                            if check_lookups else None)
+
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        if self._state(conn)['version'] != state['version']:
+                            # Our claim expired and another process synced meanwhile
+                            conn.execute('ROLLBACK')
+                            self.ready = True
+                            return 0
+                        if full:
+                            applied = self._apply_snapshot(conn, data)
+                        else:
+                            applied = self._apply_changes(conn, data)
+                        self._save_state(conn, state, source, data, started, full, check_lookups, claimant)
+                        conn.execute('COMMIT')
+                    except Exception:
+                        conn.execute('ROLLBACK')
+                        raise
+                finally:
+                    conn.execute('UPDATE replica_state SET claimed_by = NULL WHERE id = 1 AND claimed_by = ?',
+                                 (claimant,))
+
+            self.ready = True
+            self.syncs += 1
+            self.full_syncs += 1 if full else 0
+            self.last_applied = applied
+            return applied
+
+    @staticmethod
+    def _replace_lookups(conn, data: Dict[str, Any]):
+        if data.get('bins') is not None:
+            conn.execute('DELETE FROM BinLocations_tbl')
+            conn.executemany('INSERT OR REPLACE INTO BinLocations_tbl VALUES (?, ?)',
+                             [(row['BinLocationID'], row['BinLocation']) for row in data['bins']])
+        if data.get('items') is not None:
+            conn.execute('DELETE FROM Items_tbl')
+            conn.executemany('INSERT OR REPLACE INTO Items_tbl VALUES (?, ?, ?, ?, ?, ?)', [(
+                row['ProductID'],
+                row['ProductUPC'],
+                row['ProductSKU'],
+                row['ProductDescription'],
+                _float(row['UnitQty2']),
+                1 if row['Discontinued'] else 0
+            ) for row in data['items']])
+
+    @staticmethod
+    def _row_values(row: Dict[str, Any]) -> Tuple:
+        return (row['id'], row['ProductUPC'], row['ProductDescription'], row['Qty_Cases'],
+                row['BinLocationID'], _text(row['CreatedAt']), _text(row['LastUpdate']))
+
+    def _apply_snapshot(self, conn, data: Dict[str, Any]) -> int:
+        conn.execute('DELETE FROM Items_BinLocations')
+        conn.executemany('INSERT INTO Items_BinLocations VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         [self._row_values(row) for row in data['rows']])
+        # Tombstone coverage restarts at the snapshot
+        conn.execute('DELETE FROM deleted_records')
+        conn.execute('DELETE FROM local_deletes')
+        self._replace_lookups(conn, data)
+        return len(data['rows'])
+
+    def _apply_changes(self, conn, data: Dict[str, Any]) -> int:
+        # Rows written through by this app since the changes were read are not
+        # rolled back, and rows it deleted are not brought back before their tombstone
+        local_deletes = {row[0] for row in conn.execute('SELECT record_id FROM local_deletes')}
+        conn.executemany('''
+            INSERT INTO Items_BinLocations VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                ProductUPC = excluded.ProductUPC,
+                ProductDescription = excluded.ProductDescription,
+                Qty_Cases = excluded.Qty_Cases,
+                BinLocationID = excluded.BinLocationID,
+                CreatedAt = excluded.CreatedAt,
+                LastUpdate = excluded.LastUpdate
+            WHERE IFNULL(excluded.LastUpdate, '') >= IFNULL(Items_BinLocations.LastUpdate, '')
+        ''', [self._row_values(row) for row in data['rows'] if row['id'] not in local_deletes])
+        conn.executemany('DELETE FROM Items_BinLocations WHERE id = ?',
+                         [(record_id,) for _, record_id in data['deleted']])
+        conn.executemany('INSERT OR IGNORE INTO deleted_records VALUES (?, ?)', data['deleted'])
+        conn.executemany('DELETE FROM local_deletes WHERE record_id = ?',
+                         [(record_id,) for _, record_id in data['deleted']])
+        self._replace_lookups(conn, data)
+        return len(data['rows']) + len(data['deleted'])
+
+    @staticmethod
+    def _save_state(conn, state: sqlite3.Row, source: str, data: Dict[str, Any],
+                    started: float, full: bool, check_lookups: bool, claimant: str):
+        last_update = max((_text(row['LastUpdate']) for row in data['rows'] if row['LastUpdate']),
+                          default=None)
+        if not full:
+            last_update = max(filter(None, (last_update, state['last_update'])), default=None)
+        conn.execute('''
+            UPDATE replica_state SET
+                source = ?,
+                version = version + 1,
+                last_update = ?,
+                last_history_id = ?,
+                tombstones_from = ?,
+                bins_checksum = ?,
+                items_checksum = ?,
+                synced_at = ?,
+                full_synced_at = ?,
+                lookups_checked_at = ?,
+                synced_by = ?
+            WHERE id = 1
+        ''', (
+            source,
+            last_update,
+            max(data['history_id'], 0 if full else state['last_history_id']),
+            data['history_id'] if full else state['tombstones_from'],
+            data['bins_checksum'] if check_lookups else state['bins_checksum'],
+            data['items_checksum'] if check_lookups else state['items_checksum'],
+            started,
+            started if full else state['full_synced_at'],
+            started if check_lookups else state['lookups_checked_at'],
+            claimant
+        ))
+
+    def apply_writes(self, changes: List[Dict[str, Any]], timestamp: datetime):
+        """Apply committed @changes rows, so writers read their own writes before the next sync"""
+        if not changes:
+            return
+        try:
+            with self.get_connection() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                for change in changes:
+                    if change['OperationType'] == 'DELETE':
+                        conn.execute('DELETE FROM Items_BinLocations WHERE id = ?', (change['RecordID'],))
+                        conn.execute('INSERT OR REPLACE INTO local_deletes VALUES (?, ?)',
+                                     (change['RecordID'], _text(timestamp)))
+                        continue
+                    conn.execute('''
+                        INSERT INTO Items_BinLocations VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (id) DO UPDATE SET
+                            ProductUPC = excluded.ProductUPC,
+                            ProductDescription = excluded.ProductDescription,
+                            Qty_Cases = excluded.Qty_Cases,
+                            BinLocationID = excluded.BinLocationID,
+                            LastUpdate = excluded.LastUpdate
+                    ''', (change['RecordID'], change['NewProductUPC'], change['NewProductDescription'],
+                          change['NewQty_Cases'], change['NewBinLocationID'],
+                          _text(change['RecordCreatedAt'] or timestamp), _text(timestamp)))
+                conn.execute('COMMIT')
+        except sqlite3.Error:
+            # The next sync brings the rows over anyway
+            logger.exception('Replica write-through failed')
+
+    def note_unit_qty(self, product_upc: str, unit_qty: Any):
+        """Apply a UnitQty2 change made by this app before the next item checksum check"""
+        try:
+            with self.get_connection() as conn:
+                conn.execute('UPDATE Items_tbl SET UnitQty2 = ? WHERE ProductUPC = ?',
+                             (_float(unit_qty), product_upc))
+        except sqlite3.Error:
+            logger.exception('Replica write-through failed')
+
+    # ========================================================================
+    # Reads (None while stale)
+    # ========================================================================
+
+    @staticmethod
+    def _age(state: sqlite3.Row) -> Optional[float]:
+        """Seconds since the older of the last sync and the last bin/item check started"""
+        if state['synced_at'] is None or state['lookups_checked_at'] is None:
+            return None
+        return time.time() - min(state['synced_at'], state['lookups_checked_at'])
+
+    def _fresh_state(self, conn) -> Optional[sqlite3.Row]:
+        state = self._state(conn)
+        self.reads += 1
+        age = self._age(state)
+        if age is None or age > self.max_staleness:
+            self.stale_reads += 1
+            return None
+        return state
+
+    def fresh(self) -> bool:
+        """Whether reads are currently answered from the replica"""
+        with self.get_connection() as conn:
+            age = self._age(self._state(conn))
+        return age is not None and age <= self.max_staleness
+
+    @staticmethod
+    def _where(clauses: List[str]) -> str:
+        return 'WHERE ' + ' AND '.join(_sql(clauses)) if clauses else ''
+
+    def bin_locations(self, clauses: List[str], params: List[Any]) -> Optional[List[Dict[str, Any]]]:
+        """Rows of the full bin locations query (filter clauses from _bin_location_filters)"""
+        rows = self.iter_bin_locations(clauses, params)
+        return list(rows) if rows is not None else None
+
+    def iter_bin_locations(self, clauses: List[str],
+                           params: List[Any]) -> Optional[Iterator[Dict[str, Any]]]:
+        with self.get_connection() as conn:
+            if self._fresh_state(conn) is None:
+                return None
+        return self._iter(f'''
+            SELECT
+                ibl.id,
+                ibl.ProductUPC,
+                ibl.ProductDescription,
+                ibl.Qty_Cases,
+                ibl.BinLocationID,
+                bl.BinLocation,
+                IFNULL(it.UnitQty2, 0) as UnitQty2,
+                ibl.CreatedAt,
+                ibl.LastUpdate
+            {_BIN_LOCATION_JOINS}
+            {self._where(clauses)}
+            ORDER BY {REPLICA_SORTS['bin']}, {REPLICA_SORTS['product']}, ibl.id
+        ''', params)
+
+    def _iter(self, query: str, params: List[Any]) -> Iterator[Dict[str, Any]]:
+        with self.get_connection() as conn:
+            for row in conn.execute(query, params):
+                yield _record(row)
+
+    def page(self, clauses: List[str], params: List[Any], sort: str, descending: bool, limit: int,
+             after: Optional[Tuple[Any, int]] = None,
+             include_total: bool = False) -> Optional[Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+        """One keyset page (limit + 1 rows with SortKey) and, optionally, the filter totals"""
+        sort_expr = REPLICA_SORTS[sort]
+        direction = 'DESC' if descending else 'ASC'
+        comparison = '<' if descending else '>'
+        page_clauses, page_params = list(clauses), list(params)
+        if after is not None:
+            last_key, last_id = after
+            if sort == 'updated' and last_key:
+                last_key = _text(datetime.fromisoformat(last_key))
+            page_clauses.append(
+                f'({sort_expr} {comparison} %s OR ({sort_expr} = %s AND ibl.id {comparison} %s))'
+            )
+            page_params.extend([last_key, last_key, last_id])
+
+        with self.get_connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                if self._fresh_state(conn) is None:
+                    return None
+                rows = [_record(row) for row in conn.execute(f'''
+                    SELECT
+                        ibl.id,
+                        ibl.ProductUPC,
+                        ibl.ProductDescription,
+                        ibl.Qty_Cases,
+                        ibl.BinLocationID,
+                        bl.BinLocation,
+                        IFNULL(it.UnitQty2, 0) as UnitQty2,
+                        ibl.LastUpdate,
+                        {sort_expr} as SortKey
+                    {_BIN_LOCATION_JOINS}
+                    {self._where(page_clauses)}
+                    ORDER BY {sort_expr} {direction}, ibl.id {direction}
+                    LIMIT {int(limit) + 1}
+                ''', page_params)]
+
+                totals = None
+                if include_total:
+                    totals = dict(conn.execute(f'''
+                        SELECT
+                            COUNT(*) as total,
+                            IFNULL(SUM(IFNULL(ibl.Qty_Cases, 0)), 0) as total_cases,
+                            IFNULL(SUM(CASE WHEN it.UnitQty2 > 0
+                                            THEN IFNULL(ibl.Qty_Cases, 0) * it.UnitQty2
+                                            ELSE 0 END), 0) as total_items
+                        {_BIN_LOCATION_JOINS}
+                        {self._where(clauses)}
+                    ''', params).fetchone())
+            finally:
+                conn.execute('COMMIT')
+
+        if sort == 'updated':
+            for row in rows:
+                row['SortKey'] = row['LastUpdate']
+        return rows, totals
+
+    def history_id(self) -> Optional[int]:
+        """HistoryID the replica is synced to (for delta-sync watermarks)"""
+        with self.get_connection() as conn:
+            state = self._fresh_state(conn)
+        return state['last_history_id'] if state is not None else None
+
+    def changes(self, since: Optional[datetime], history_id: int,
+                position_limit: int) -> Optional[Dict[str, Any]]:
+        """Rows with LastUpdate >= since and IDs deleted after history_id
+
+        Deletes this app wrote but whose history tombstone is not synced yet
+        are included when made at or after `since`. None also when
+        history_id predates the tombstones kept here (the replica was
+        reloaded since), so deletes in between are not missed. `after` maps
+        each row to its predecessor in the grid order, as
+        MSSQLManager._grid_predecessors does (None above position_limit rows).
+        """
+        with self.get_connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                state = self._fresh_state(conn)
+                if state is None or history_id < (state['tombstones_from'] or 0):
+                    return None
+                where_sql = 'WHERE ibl.LastUpdate >= ?' if since else ''
+                rows = [_record(row) for row in conn.execute(f'''
+                    SELECT
+                        ibl.id,
+                        ibl.ProductUPC,
+                        ibl.ProductDescription,
+                        ibl.Qty_Cases,
+                        ibl.BinLocationID,
+                        bl.BinLocation,
+                        IFNULL(it.UnitQty2, 0) as UnitQty2,
+                        ibl.LastUpdate
+                    {_BIN_LOCATION_JOINS}
+                    {where_sql}
+                ''', (_text(since),) if since else ())]
+                after = None
+                if len(rows) <= position_limit:
+                    after = {row['id']: self._predecessor(conn, row['id']) for row in rows}
+                deleted = [row['record_id'] for row in conn.execute('''
+                    SELECT record_id FROM deleted_records WHERE history_id > ?
+                    UNION
+                    SELECT record_id FROM local_deletes WHERE deleted_at >= ?
+                ''', (history_id, _text(since) or ''))]
+            finally:
+                conn.execute('COMMIT')
+        return {
+            'data': rows,
+            'deleted': deleted,
+            'after': after,
+            # A watermark newer than this copy (issued by SQL Server) is kept
+            'history_id': max(state['last_history_id'], history_id)
+        }
+
+    @staticmethod
+    def _predecessor(conn, record_id: int) -> Optional[int]:
+        bin_key, product_key = REPLICA_SORTS['bin'], REPLICA_SORTS['product']
+        row = conn.execute(f'''
+            SELECT ibl.id
+            {_BIN_LOCATION_JOINS},
+            (SELECT {bin_key} as bin_key, {product_key} as product_key, ibl.id as id
+             {_BIN_LOCATION_JOINS}
+             WHERE ibl.id = ?) c
+            WHERE ({bin_key}, {product_key}, ibl.id) < (c.bin_key, c.product_key, c.id)
+            ORDER BY {bin_key} DESC, {product_key} DESC, ibl.id DESC
+            LIMIT 1
+        ''', (record_id,)).fetchone()
+        return row['id'] if row else None
+
+    def data_version(self) -> Optional[str]:
+        """Version token in the manner of get_data_version, from the local copy"""
+        with self.get_connection() as conn:
+            conn.execute('BEGIN')
+            try:
+                state = self._fresh_state(conn)
+                if state is None:
+                    return None
+                row = conn.execute('''
+                    SELECT
+                        (SELECT COUNT(*) FROM Items_BinLocations) as row_count,
+                        (SELECT MAX(LastUpdate) FROM Items_BinLocations) as last_update,
+                        (SELECT TOTAL(it.ProductID * it.UnitQty2)
+                         FROM Items_tbl it
+                         WHERE EXISTS (SELECT 1 FROM Items_BinLocations ibl
+                                       WHERE ibl.ProductUPC = it.ProductUPC)) as unit_qty_sum
+                ''').fetchone()
+            finally:
+                conn.execute('COMMIT')
+        # unit_qty_sum picks up UnitQty2 write-throughs before the next item checksum check
+        return (f"replica:{row['row_count']}:{row['last_update']}:{state['last_history_id']}:"
+                f"{state['bins_checksum']}:{state['items_checksum']}:{row['unit_qty_sum']}")
+
+    def search_products(self, search_pattern: str, field_name: str,
+                        limit: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """search_products on the local Items_tbl (field_name from PRODUCT_SEARCH_FIELDS)"""
+        with self.get_connection() as conn:
+            if self._fresh_state(conn) is None:
+                return None
+            rows = conn.execute(f'''
+                SELECT
+                    ProductID,
+                    ProductUPC,
+                    ProductSKU,
+                    ProductDescription,
+                    IFNULL(UnitQty2, 0) as UnitQty2
+                FROM Items_tbl
+                WHERE {field_name} LIKE ?
+                AND Discontinued = 0
+                ORDER BY ProductDescription
+                LIMIT {int(limit)}
+            ''', (search_pattern,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def search_bins(self, search_pattern: str, limit: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """search_bin_locations on the local bin table"""
+        with self.get_connection() as conn:
+            if self._fresh_state(conn) is None:
+                return None
+            rows = conn.execute(f'''
+                SELECT BinLocationID, BinLocation
+                FROM BinLocations_tbl
+                WHERE BinLocation LIKE ?
+                AND BinLocation IS NOT NULL
+                ORDER BY BinLocation
+                LIMIT {int(limit)}
+            ''', (search_pattern,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def unused_bins(self) -> Optional[List[Dict[str, Any]]]:
+        """Bins without an Items_BinLocations row"""
+        with self.get_connection() as conn:
+            if self._fresh_state(conn) is None:
+                return None
+            rows = conn.execute('''
+                SELECT bl.BinLocationID, bl.BinLocation
+                FROM BinLocations_tbl bl
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM Items_BinLocations ibl WHERE ibl.BinLocationID = bl.BinLocationID
+                )
+                ORDER BY bl.BinLocation
+            ''').fetchall()
+        return [dict(row) for row in rows]
+
+    def after_fork(self):
+        """Replace the lock inherited from the parent process"""
+        self.lock = Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Replica size, age and sync/read counters"""
+        with self.get_connection() as conn:
+            state = self._state(conn)
+            counts = conn.execute('''
+                SELECT
+                    (SELECT COUNT(*) FROM Items_BinLocations) as rows,
+                    (SELECT COUNT(*) FROM BinLocations_tbl) as bins,
+                    (SELECT COUNT(*) FROM Items_tbl) as items,
+                    (SELECT COUNT(*) FROM deleted_records) as tombstones
+            ''').fetchone()
+        age = self._age(state)
+        return {
+            'ready': self.ready,
+            **dict(counts),
+            'last_history_id': state['last_history_id'],
+            'age_seconds': round(age, 1) if age is not None else None,
+            'max_staleness_seconds': self.max_staleness,
+            'fresh': age is not None and age <= self.max_staleness,
+            'syncs': self.syncs,
+            'skipped_syncs': self.skipped_syncs,
+            'full_syncs': self.full_syncs,
+            'last_applied': self.last_applied,
+            'reads': self.reads,
+            'stale_reads': self.stale_reads
+        }
@@ -0,0 +1,192 @@
+import os
+import secrets
+import sqlite3
+import time
+from contextlib import contextmanager
+from threading import Lock, local
+from typing import Any, Dict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+
+class SQLiteSession(SecureCookieSession):
+    """Session data plus the id and stored expiry it was loaded with"""
+
+    def __init__(self, initial=None, sid: str = None, expires: float = 0):
+        super().__init__(initial)
+        self.sid = sid
+        self.expires = expires
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Server-side sessions in a SQLite file shared by all workers
+
+    Sessions expire `permanent_session_lifetime` after their last write.
+    Unchanged sessions are only re-written (to slide the expiry) once
+    `refresh_after` seconds have passed, so most requests are one indexed
+    read on a connection kept open per thread. sweep() deletes expired rows
+    and evicts the oldest sessions beyond `max_sessions`.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, db_path: str = '/app/data/sessions.db',
+                 refresh_after: float = 300,
+                 max_sessions: int = 10000):
+        self.db_path = db_path
+        self.refresh_after = refresh_after
+        self.max_sessions = max_sessions
+        self._lock = Lock()
+        self._local = local()
+        self.reads = 0
+        self.writes = 0
+        self.swept = 0
+        self._init_db()
+
+    def _init_db(self):
+        """Initialize SQLite database with sessions table"""
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_expires ON sessions (expires)')
+
+    @contextmanager
+    def get_connection(self):
+        """Get this thread's SQLite connection (opening one costs more than the query)"""
+        conn = getattr(self._local, 'conn', None)
+        # A connection inherited across fork() must not be used by the child
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        yield conn
+
+    def open_session(self, app, request) -> SQLiteSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            with self.get_connection() as conn:
+                row = conn.execute('SELECT data, expires FROM sessions WHERE sid = ? AND expires > ?',
+                                   (sid, time.time())).fetchone()
+            with self._lock:
+                self.reads += 1
+            if row:
+                return SQLiteSession(self.serializer.loads(row[0]), sid=sid, expires=row[1])
+        return SQLiteSession(sid=secrets.token_urlsafe(32))
+
+    def save_session(self, app, session: SQLiteSession, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                with self.get_connection() as conn:
+                    conn.execute('DELETE FROM sessions WHERE sid = ?', (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        now = time.time()
+        # Written less than refresh_after ago and unchanged: nothing to do
+        if not session.modified and session.expires - lifetime + self.refresh_after > now:
+            return
+
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO sessions (sid, data, expires) VALUES (?, ?, ?)
+                ON CONFLICT (sid) DO UPDATE SET data = excluded.data, expires = excluded.expires
+            ''', (session.sid, self.serializer.dumps(dict(session)), now + lifetime))
+        with self._lock:
+            self.writes += 1
+
+        response.set_cookie(
+            name, session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def sweep(self) -> int:
+        """Delete expired sessions and evict the oldest beyond max_sessions"""
+        with self.get_connection() as conn:
+            removed = conn.execute('DELETE FROM sessions WHERE expires <= ?', (time.time(),)).rowcount
+            removed += conn.execute('''
+                DELETE FROM sessions WHERE sid IN (
+                    SELECT sid FROM sessions ORDER BY expires DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_sessions,)).rowcount
+        with self._lock:
+            self.swept += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Stored session count and read/write counters"""
+        with self.get_connection() as conn:
+            sessions = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        return {
+            'backend': 'sqlite',
+            'sessions': sessions,
+            'reads': self.reads,
+            'writes': self.writes,
+            'swept': self.swept
+        }
+
+
+class SessionFileSweeper:
+    """Removes expired Flask-Session files
+
+    Flask-Session rewrites a session's file on every request, with an
+    expiry of the session lifetime, so a file whose mtime is older than
+    the lifetime belongs to an expired session.
+    """
+
+    def __init__(self, directory: str, max_age: float):
+        self.directory = directory
+        self.max_age = max_age
+        self.swept = 0
+
+    def sweep(self) -> int:
+        """Delete session files not written within max_age seconds"""
+        cutoff = time.time() - self.max_age
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            # Skip cachelib's bookkeeping file (__wz_cache_count)
+            if entry.name.startswith('__') or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Swept by another worker, or rewritten under a new name
+                pass
+        self.swept += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Session file count and sweep counter"""
+        try:
+            files = sum(1 for entry in os.scandir(self.directory)
+                        if entry.is_file() and not entry.name.startswith('__'))
+        except FileNotFoundError:
+            files = 0
+        return {
+            'backend': 'filesystem',
+            'sessions': files,
+            'swept': self.swept
+        }
@@ -1,5 +1,6 @@
 // Global state
 let allRecords = [];
+let syncWatermark = null;
 let currentEditId = null;
 let productSearchTimeout = null;
 let binSearchTimeout = null;
@@ -131,6 +132,7 @@ async function loadBinLocations() {
 
     if (result.success) {
       allRecords = result.data || [];
+      syncWatermark = result.watermark || null;
       renderTable(allRecords);
     } else {
       if (result.needs_config) {
@@ -156,6 +158,73 @@ async function loadBinLocations() {
   }
 }
 
+// Merge only the records changed since the last load/sync into allRecords
+async function syncBinLocations() {
+  if (!syncWatermark) {
+    await loadBinLocations();
+    return;
+  }
+
+  try {
+    const response = await fetch(
+      `/api/bin-locations/changes?since=${encodeURIComponent(syncWatermark)}`,
+    );
+    if (handleAuthError(response)) return;
+    const result = await response.json();
+
+    if (!result.success) {
+      // Fall back to a full reload (e.g. the watermark is no longer valid)
+      await loadBinLocations();
+      return;
+    }
+
+    const deletedIds = new Set(result.deleted || []);
+    const changed = new Map((result.data || []).map((r) => [r.id, r]));
+    // Each changed row's predecessor in the server's order (null when too many changed)
+    const after = result.after;
+    if (changed.size && !after) {
+      await loadBinLocations();
+      return;
+    }
+
+    const records = allRecords.filter(
+      (r) => !deletedIds.has(r.id) && !changed.has(r.id),
+    );
+    let pending = [...changed.values()].filter((r) => !deletedIds.has(r.id));
+    while (pending.length) {
+      const waiting = [];
+      for (const record of pending) {
+        const afterId = after[record.id];
+        if (afterId == null) {
+          records.unshift(record);
+          continue;
+        }
+        const index = records.findIndex((r) => r.id === afterId);
+        if (index >= 0) {
+          records.splice(index + 1, 0, record);
+        } else if (changed.has(afterId)) {
+          // Placed once its predecessor is
+          waiting.push(record);
+        } else {
+          await loadBinLocations();
+          return;
+        }
+      }
+      if (waiting.length === pending.length) {
+        await loadBinLocations();
+        return;
+      }
+      pending = waiting;
+    }
+    allRecords = records;
+
+    syncWatermark = result.watermark || null;
+    handleSearch();
+  } catch (error) {
+    await loadBinLocations();
+  }
+}
+
 // Render table
 function renderTable(records) {
   const tbody = document.getElementById("tableBody");
@@ -477,7 +546,7 @@ async function saveRecord() {
     if (result.success) {
       showToast(result.message, "success");
       closeModal();
-      await loadBinLocations();
+      await syncBinLocations();
     } else {
       showToast(result.message || "Failed to save record", "error");
     }
@@ -775,7 +844,7 @@ async function saveAdjustment() {
     if (result.success) {
       showToast(result.message, "success");
       closeAdjustModal();
-      await loadBinLocations();
+      await syncBinLocations();
     } else {
       showToast(result.message || "Failed to adjust quantity", "error");
     }
@@ -832,7 +901,9 @@ async function confirmDelete() {
     if (result.success) {
       showToast(result.message, "success");
       closeDeleteModal();
-      await loadBinLocations();
+      // Drop it locally too, in case its tombstone is not visible yet
+      allRecords = allRecords.filter((r) => r.id !== result.id);
+      await syncBinLocations();
     } else {
       showToast(result.message || "Failed to delete record", "error");
     }
@@ -1100,25 +1171,16 @@ async function exportToExcel() {
   showLoading();
 
   try {
-    // Get currently filtered records
-    const filteredRecords = getFilteredRecords();
-
-    if (filteredRecords.length === 0) {
-      showToast("No records to export", "warning");
-      hideLoading();
-      return;
-    }
-
-    const response = await fetch("/api/export-excel", {
-      method: "POST",
-      headers: {
-        "Content-Type": "application/json",
-      },
-      body: JSON.stringify({
-        records: filteredRecords,
-      }),
+    // Server queries the records itself using the same filters as the grid
+    const params = new URLSearchParams({
+      bin: document.getElementById("binSearch").value.trim(),
+      product: document.getElementById("productSearch").value.trim(),
+      upc: document.getElementById("upcSearch").value.trim(),
+      match: "grid",
     });
 
+    const response = await fetch(`/api/export-excel?${params.toString()}`);
+
     if (handleAuthError(response)) {
       hideLoading();
       return;
@@ -1126,11 +1188,16 @@ async function exportToExcel() {
 
     if (!response.ok) {
       const result = await response.json();
-      showToast(result.message || "Export failed", "error");
+      showToast(
+        result.message || "Export failed",
+        response.status === 400 ? "warning" : "error",
+      );
       hideLoading();
       return;
     }
 
+    const exportedCount = response.headers.get("X-Record-Count") || 0;
+
     // Download the file
     const blob = await response.blob();
     const url = window.URL.createObjectURL(blob);
@@ -1153,10 +1220,7 @@ async function exportToExcel() {
     window.URL.revokeObjectURL(url);
     document.body.removeChild(a);
 
-    showToast(
-      `Exported ${filteredRecords.length} record(s) successfully`,
-      "success"
-    );
+    showToast(`Exported ${exportedCount} record(s) successfully`, "success");
   } catch (error) {
     console.error("Export error:", error);
     showToast("Failed to export records", "error");
@@ -1165,50 +1229,6 @@ async function exportToExcel() {
   }
 }
 
-function getFilteredRecords() {
-  const binSearchValue = document
-    .getElementById("binSearch")
-    .value.trim()
-    .toLowerCase();
-  const productSearchValue = document
-    .getElementById("productSearch")
-    .value.trim()
-    .toLowerCase();
-  const upcSearchValue = document
-    .getElementById("upcSearch")
-    .value.trim()
-    .toLowerCase();
-
-  return allRecords.filter((record) => {
-    const binLocation = (record.BinLocation || "").toLowerCase();
-    const productDescription = (record.ProductDescription || "").toLowerCase();
-    const productUPC = (record.ProductUPC || "").toLowerCase();
-
-    // Bin search: exact match (case-insensitive)
-    const binMatch =
-      !binSearchValue || binLocation === binSearchValue;
-
-    // Product search: contains match with wildcard support
-    let productMatch = true;
-    if (productSearchValue) {
-      if (productSearchValue.includes("%")) {
-        // SQL-style wildcard: convert % to regex .*
-        const regexPattern = productSearchValue.replace(/%/g, ".*");
-        const regex = new RegExp(regexPattern, "i");
-        productMatch = regex.test(productDescription);
-      } else {
-        productMatch = productDescription.includes(productSearchValue);
-      }
-    }
-
-    // UPC search: exact match (case-insensitive)
-    const upcMatch =
-      !upcSearchValue || productUPC === upcSearchValue;
-
-    return binMatch && productMatch && upcMatch;
-  });
-}
-
 // ============================================================================
 // Authentication Functions
 // ============================================================================
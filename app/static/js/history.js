@@ -2,14 +2,20 @@
 // History Page
 // ============================================================================
 
+const HISTORY_PAGE_SIZE = 100;
+
 let historyRecords = [];
 let filteredRecords = [];
+let historyNextCursor = null;
+let historyLoadingMore = false;
+let historyRequestId = 0;
 
 // Initialize page
 document.addEventListener('DOMContentLoaded', () => {
     loadStatistics();
     loadHistory();
     setupEventListeners();
+    setupInfiniteScroll();
 });
 
 // Setup event listeners
@@ -53,31 +59,39 @@ async function loadStatistics() {
     }
 }
 
-async function loadHistory() {
-    showLoading();
+function buildHistoryUrl(cursor) {
+    // Build query params
+    const params = new URLSearchParams();
+    const operation = document.getElementById('filterOperation').value;
+    const startDate = document.getElementById('filterStartDate').value;
+    const endDate = document.getElementById('filterEndDate').value;
 
-    try {
-        // Build query params
-        const params = new URLSearchParams();
-        const operation = document.getElementById('filterOperation').value;
-        const startDate = document.getElementById('filterStartDate').value;
-        const endDate = document.getElementById('filterEndDate').value;
+    if (operation && operation !== 'ALL') params.append('operation_type', operation);
+    if (startDate) params.append('start_date', startDate);
+    if (endDate) params.append('end_date', endDate);
+    params.append('limit', HISTORY_PAGE_SIZE);
+    if (cursor) params.append('cursor', cursor);
 
-        if (operation && operation !== 'ALL') params.append('operation_type', operation);
-        if (startDate) params.append('start_date', startDate);
-        if (endDate) params.append('end_date', endDate);
+    return `/api/history?${params.toString()}`;
+}
 
-        const queryString = params.toString();
-        const url = `/api/history${queryString ? '?' + queryString : ''}`;
+async function loadHistory() {
+    // Requests started before a filter change are ignored when they finish
+    const requestId = ++historyRequestId;
+    historyNextCursor = null;
+    showLoading();
 
-        const response = await fetch(url);
+    try {
+        const response = await fetch(buildHistoryUrl(null));
         if (handleAuthError(response)) return;
 
         const result = await response.json();
+        if (requestId !== historyRequestId) return;
 
         if (result.success) {
             historyRecords = result.data || [];
             filteredRecords = historyRecords;
+            historyNextCursor = result.next_cursor || null;
             renderTable();
         } else {
             showError(result.message);
@@ -86,7 +100,67 @@ async function loadHistory() {
         console.error('Error loading history:', error);
         showError('Failed to load history records');
     } finally {
-        hideLoading();
+        if (requestId === historyRequestId) {
+            hideLoading();
+            fillViewport();
+        }
+    }
+}
+
+// Fetch the page after the last row shown and append it
+async function loadMoreHistory() {
+    if (!historyNextCursor || historyLoadingMore) return;
+
+    const requestId = historyRequestId;
+    historyLoadingMore = true;
+    document.getElementById('loadingState').style.display = 'block';
+
+    try {
+        const response = await fetch(buildHistoryUrl(historyNextCursor));
+        if (handleAuthError(response)) return;
+
+        const result = await response.json();
+        if (requestId !== historyRequestId) return;
+
+        if (result.success) {
+            const page = result.data || [];
+            historyRecords = historyRecords.concat(page);
+            filteredRecords = historyRecords;
+            historyNextCursor = result.next_cursor || null;
+            appendRows(page);
+        } else {
+            historyNextCursor = null;
+            console.error('Error loading more history:', result.message);
+        }
+    } catch (error) {
+        console.error('Error loading more history:', error);
+    } finally {
+        historyLoadingMore = false;
+        if (requestId === historyRequestId) {
+            hideLoading();
+            fillViewport();
+        }
+    }
+}
+
+// Load the next page whenever the sentinel below the table scrolls into view
+function setupInfiniteScroll() {
+    const sentinel = document.getElementById('historySentinel');
+    if (!sentinel || !('IntersectionObserver' in window)) return;
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) {
+            loadMoreHistory();
+        }
+    }, { rootMargin: '400px 0px' });
+    observer.observe(sentinel);
+}
+
+// Keep loading while the rows don't fill the window (the observer only fires on changes)
+function fillViewport() {
+    const sentinel = document.getElementById('historySentinel');
+    if (sentinel && historyNextCursor && sentinel.getBoundingClientRect().top < window.innerHeight + 400) {
+        loadMoreHistory();
     }
 }
 
@@ -145,27 +219,47 @@ function renderTable() {
     }
 
     emptyState.style.display = 'none';
-    resultsInfo.textContent = `Showing ${filteredRecords.length} record${filteredRecords.length === 1 ? '' : 's'}`;
+    tbody.innerHTML = filteredRecords.map(renderRow).join('');
+    renderResultsInfo();
+    toggleNotesColumn();
+}
 
-    tbody.innerHTML = filteredRecords.map(record => {
-        const timestamp = formatTimestamp(record.Timestamp);
-        const operationBadge = getOperationBadge(record.OperationType);
-        const changes = formatChanges(record);
-        const notes = record.Notes ? escapeHtml(record.Notes) : '-';
+function appendRows(records) {
+    if (records.length === 0) {
+        renderResultsInfo();
+        return;
+    }
 
-        return `
-            <tr>
-                <td>${timestamp}</td>
-                <td>${operationBadge}</td>
-                <td>${escapeHtml(record.Username)}</td>
-                <td>${escapeHtml(record.NewProductUPC || record.PreviousProductUPC || '-')}</td>
-                <td>${escapeHtml(record.NewProductDescription || record.PreviousProductDescription || '-')}</td>
-                <td>${escapeHtml(record.NewBinLocation || record.PreviousBinLocation || '-')}</td>
-                <td>${changes}</td>
-                <td class="notes-column notes-cell">${notes}</td>
-            </tr>
-        `;
-    }).join('');
+    const tbody = document.getElementById('historyTableBody');
+    tbody.insertAdjacentHTML('beforeend', records.map(renderRow).join(''));
+    renderResultsInfo();
+    toggleNotesColumn();
+}
+
+function renderResultsInfo() {
+    const count = filteredRecords.length;
+    document.getElementById('resultsInfo').textContent =
+        `Showing ${count} record${count === 1 ? '' : 's'}${historyNextCursor ? ' - scroll for more' : ''}`;
+}
+
+function renderRow(record) {
+    const timestamp = formatTimestamp(record.Timestamp);
+    const operationBadge = getOperationBadge(record.OperationType);
+    const changes = formatChanges(record);
+    const notes = record.Notes ? escapeHtml(record.Notes) : '-';
+
+    return `
+        <tr>
+            <td>${timestamp}</td>
+            <td>${operationBadge}</td>
+            <td>${escapeHtml(record.Username)}</td>
+            <td>${escapeHtml(record.NewProductUPC || record.PreviousProductUPC || '-')}</td>
+            <td>${escapeHtml(record.NewProductDescription || record.PreviousProductDescription || '-')}</td>
+            <td>${escapeHtml(record.NewBinLocation || record.PreviousBinLocation || '-')}</td>
+            <td>${changes}</td>
+            <td class="notes-column notes-cell">${notes}</td>
+        </tr>
+    `;
 }
 
 // ============================================================================
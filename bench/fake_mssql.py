@@ -0,0 +1,784 @@
+"""A pymssql stand-in backed by SQLite, for benchmarking MSSQLManager
+
+connect() takes pymssql.connect's arguments and opens `database` as a SQLite
+file laid out by create_schema(). Cursors translate the T-SQL this app sends
+into SQLite statements: batches with DECLARE and table variables, OUTPUT ...
+INTO, UPDATE/DELETE with FROM joins, MERGE, IF, TOP, ISNULL, DATEADD,
+CONVERT(char(10), x, 23), CHECKSUM_AGG and LIKE character classes. It is not
+a general T-SQL implementation - statements outside that set raise
+NotImplementedError.
+
+Timings taken through it compare the app's code paths with each other; they
+are not SQL Server numbers.
+"""
+import re
+import sqlite3
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.lookups import like_to_regex
+
+paramstyle = 'pyformat'
+
+
+# ============================================================================
+# Schema
+# ============================================================================
+
+# Text columns compare case-insensitively, like the SQL Server default collation
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS Items_tbl (
+    ProductID INTEGER PRIMARY KEY,
+    ProductSKU NVARCHAR(20) COLLATE NOCASE,
+    ProductUPC NVARCHAR(20) COLLATE NOCASE,
+    ProductDescription NVARCHAR(50) COLLATE NOCASE,
+    UnitQty2 REAL,
+    Discontinued BIT NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS IX_Items_tbl_ProductUPC ON Items_tbl (ProductUPC);
+
+CREATE TABLE IF NOT EXISTS BinLocations_tbl (
+    BinLocationID INTEGER PRIMARY KEY,
+    BinLocation NVARCHAR(50) COLLATE NOCASE
+);
+
+CREATE TABLE IF NOT EXISTS Items_BinLocations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    CreatedAt DATETIME NOT NULL,
+    ProductUPC VARCHAR(255) COLLATE NOCASE,
+    ProductDescription VARCHAR(255) COLLATE NOCASE,
+    Qty_Cases INT,
+    BinLocationID INT,
+    LastUpdate DATETIME NOT NULL,
+    int1 INT,
+    txt1 VARCHAR(255) COLLATE NOCASE
+);
+
+CREATE TABLE IF NOT EXISTS Items_BinLocations_History (
+    HistoryID INTEGER PRIMARY KEY AUTOINCREMENT,
+    RecordID INT NOT NULL,
+    OperationType VARCHAR(20) NOT NULL COLLATE NOCASE,
+    Timestamp DATETIME NOT NULL,
+    Username NVARCHAR(15) NOT NULL COLLATE NOCASE,
+    PreviousProductUPC VARCHAR(255) COLLATE NOCASE,
+    PreviousProductDescription VARCHAR(255) COLLATE NOCASE,
+    PreviousQty_Cases INT,
+    PreviousBinLocationID INT,
+    PreviousUnitQty2 REAL,
+    NewProductUPC VARCHAR(255) COLLATE NOCASE,
+    NewProductDescription VARCHAR(255) COLLATE NOCASE,
+    NewQty_Cases INT,
+    NewBinLocationID INT,
+    NewUnitQty2 REAL,
+    AdjustmentAmount INT,
+    Notes NVARCHAR(500) COLLATE NOCASE,
+    RecordCreatedAt DATETIME,
+    RecordLastUpdate DATETIME
+);
+CREATE INDEX IF NOT EXISTS IX_Items_BinLocations_History_RecordID
+    ON Items_BinLocations_History (RecordID, Timestamp DESC);
+CREATE INDEX IF NOT EXISTS IX_Items_BinLocations_History_Timestamp
+    ON Items_BinLocations_History (Timestamp DESC);
+CREATE INDEX IF NOT EXISTS IX_Items_BinLocations_History_OperationType
+    ON Items_BinLocations_History (OperationType);
+CREATE INDEX IF NOT EXISTS IX_Items_BinLocations_History_Username
+    ON Items_BinLocations_History (Username, Timestamp DESC);
+
+CREATE TABLE IF NOT EXISTS Trustees_tbl (
+    AutoID INTEGER PRIMARY KEY,
+    EmployeeID INT,
+    Login_name NVARCHAR(15) COLLATE NOCASE,
+    Password NVARCHAR(15),
+    acDsbld BIT
+);
+'''
+
+
+def create_schema(conn: sqlite3.Connection):
+    """Create the five tables the app uses (setup_tables*.sql plus the BackOffice ones)"""
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript(SCHEMA)
+
+
+# ============================================================================
+# Values
+# ============================================================================
+
+def to_sqlite(value: Any) -> Any:
+    """Parameter value as stored: DATETIME becomes millisecond-precision text"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='milliseconds')
+    if isinstance(value, str) and len(value) >= 19 and value[4] == '-' and value[10] == 'T':
+        # ISO timestamps (cursor tokens) are converted to DATETIME by SQL Server
+        try:
+            return datetime.fromisoformat(value).isoformat(sep=' ', timespec='milliseconds')
+        except ValueError:
+            return value
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _from_sqlite(value: Any) -> Any:
+    if value.__class__ is str and len(value) == 23 and value[10] == ' ' and value[4] == '-':
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+@lru_cache(maxsize=1024)
+def _like_regex(pattern: str):
+    return like_to_regex(pattern) or re.compile(re.escape(pattern), re.IGNORECASE | re.DOTALL)
+
+
+def _like(pattern, value):
+    if pattern is None or value is None:
+        return None
+    return 1 if _like_regex(pattern).fullmatch(str(value)) else 0
+
+
+def _checksum(*values):
+    return zlib.crc32(repr(values).encode()) - 2 ** 31
+
+
+class _ChecksumAgg:
+    def __init__(self):
+        self.value = 0
+
+    def step(self, value):
+        if value is not None:
+            self.value ^= value
+
+    def finalize(self):
+        return self.value
+
+
+# ============================================================================
+# Lexing Helpers
+# ============================================================================
+
+def _depths(sql: str) -> List[int]:
+    """Parenthesis depth of every character; -1 inside string literals"""
+    depths = []
+    depth = 0
+    quoted = False
+    for ch in sql:
+        if quoted:
+            depths.append(-1)
+            if ch == "'":
+                quoted = False
+        elif ch == "'":
+            quoted = True
+            depths.append(-1)
+        elif ch == '(':
+            depths.append(depth)
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            depths.append(depth)
+        else:
+            depths.append(depth)
+    return depths
+
+
+def _find_top(sql: str, pattern: str, start: int = 0, end: Optional[int] = None):
+    """First match of `pattern` outside parentheses and string literals"""
+    depths = _depths(sql)
+    for match in re.compile(pattern, re.IGNORECASE).finditer(sql, start, len(sql) if end is None else end):
+        if depths[match.start()] == 0:
+            return match
+    return None
+
+
+def _closing_paren(sql: str, open_index: int) -> int:
+    depths = _depths(sql)
+    level = depths[open_index]
+    for index in range(open_index + 1, len(sql)):
+        if sql[index] == ')' and depths[index] == level:
+            return index
+    raise NotImplementedError(f'Unbalanced parentheses: {sql[open_index:open_index + 60]!r}')
+
+
+def _split_top(sql: str, separator: str) -> List[str]:
+    """Split at `separator` characters outside parentheses and string literals"""
+    parts = []
+    last = 0
+    for index, depth in enumerate(_depths(sql)):
+        if depth == 0 and sql[index] == separator:
+            parts.append(sql[last:index])
+            last = index + 1
+    parts.append(sql[last:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _strip_comments(sql: str) -> str:
+    depths = _depths(sql)
+    out = []
+    index = 0
+    while index < len(sql):
+        if sql.startswith('--', index) and depths[index] >= 0:
+            newline = sql.find('\n', index)
+            index = len(sql) if newline == -1 else newline
+            continue
+        out.append(sql[index])
+        index += 1
+    return ''.join(out)
+
+
+# ============================================================================
+# Expression Translation
+# ============================================================================
+
+_TABLE_HINT = re.compile(r'\s+WITH\s*\(\s*(?:HOLDLOCK|READCOMMITTEDLOCK|NOLOCK|UPDLOCK|ROWLOCK|'
+                         r'READPAST|TABLOCK)(?:\s*,\s*\w+)*\s*\)', re.IGNORECASE)
+_DBO = re.compile(r'\bdbo\.', re.IGNORECASE)
+_ISNULL = re.compile(r'\bISNULL\s*\(', re.IGNORECASE)
+_CONVERT_DAY = re.compile(r'\bCONVERT\s*\(\s*char\s*\(\s*10\s*\)\s*,\s*([\w.]+)\s*,\s*23\s*\)', re.IGNORECASE)
+_DATEADD = re.compile(r'\bDATEADD\s*\(\s*(\w+)\s*,\s*([^,()]+?)\s*,\s*([^,()]+?)\s*\)', re.IGNORECASE)
+_TOP = re.compile(r'\bTOP\s*(?:\(\s*(\d+)\s*\)|(\d+))\s*', re.IGNORECASE)
+_VALUES_TABLE = re.compile(r'\(\s*VALUES\b', re.IGNORECASE)
+_VALUES_ALIAS = re.compile(r'\s*AS\s+(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+
+
+def _translate_top(sql: str) -> str:
+    """TOP n -> LIMIT n at the end of the SELECT it belongs to"""
+    matches = list(_TOP.finditer(sql))
+    for match in reversed(matches):
+        depths = _depths(sql)
+        level = depths[match.start()]
+        if level < 0:
+            continue
+        end = len(sql)
+        for index in range(match.end(), len(sql)):
+            if sql[index] == ')' and depths[index] == level - 1:
+                end = index
+                break
+        limit = match.group(1) or match.group(2)
+        sql = sql[:match.start()] + sql[match.end():end].rstrip() + f' LIMIT {limit} ' + sql[end:]
+    return sql
+
+
+def _translate_values_tables(sql: str) -> str:
+    """(VALUES ...) AS v (a, b) -> (SELECT column1 AS a, column2 AS b FROM (VALUES ...)) AS v"""
+    start = 0
+    while True:
+        match = _VALUES_TABLE.search(sql, start)
+        if not match:
+            return sql
+        close = _closing_paren(sql, match.start())
+        alias = _VALUES_ALIAS.match(sql, close + 1)
+        if not alias:
+            start = match.end()
+            continue
+        columns = [column.strip() for column in alias.group(2).split(',')]
+        select = ', '.join(f'column{index} AS {column}' for index, column in enumerate(columns, 1))
+        replacement = f'(SELECT {select} FROM {sql[match.start():close + 1]}) AS {alias.group(1)}'
+        sql = sql[:match.start()] + replacement + sql[alias.end():]
+        start = match.start() + len(replacement)
+
+
+def _translate(sql: str, table_vars: Dict[str, str]) -> str:
+    """Rewrite T-SQL functions and syntax in one statement into SQLite's"""
+    for name, table in table_vars.items():
+        sql = re.sub(rf'@{name}\b', table, sql)
+    sql = _TABLE_HINT.sub('', sql)
+    sql = _DBO.sub('', sql)
+    sql = _ISNULL.sub('IFNULL(', sql)
+    sql = _CONVERT_DAY.sub(r'substr(\1, 1, 10)', sql)
+    sql = _DATEADD.sub(r"strftime('%Y-%m-%d %H:%M:%f', \3, (\2) || ' \1')", sql)
+    sql = _translate_values_tables(sql)
+    if _TOP.search(sql):
+        sql = _translate_top(sql)
+    return sql
+
+
+def _columns(sql: str) -> List[str]:
+    return [column.strip() for column in sql.split(',')]
+
+
+def _assignments(sql: str) -> List[Tuple[str, str]]:
+    """SET a = x, b.c = y -> [(a, x), (c, y)]"""
+    pairs = []
+    for part in _split_top(sql, ','):
+        column, expr = part.split('=', 1)
+        pairs.append((column.strip().split('.')[-1], expr.strip()))
+    return pairs
+
+
+_NOT_TABLES = {'JOIN', 'FROM', 'ON', 'AND', 'OR', 'AS', 'INNER', 'LEFT', 'RIGHT', 'OUTER', 'CROSS', 'WHERE'}
+
+
+def _aliased_table(from_sql: str, alias: str) -> str:
+    """Table an alias in a FROM clause stands for (the alias itself when it is a table name)"""
+    for match in re.finditer(rf'\b(\w+)\s+(?:AS\s+)?{alias}\b(?!\.)', from_sql, re.IGNORECASE):
+        if match.group(1).upper() not in _NOT_TABLES:
+            return match.group(1)
+    return alias
+
+
+# ============================================================================
+# Statements
+# ============================================================================
+#
+# A batch compiles to a list of steps. run(db, binds) executes one step and
+# returns (sqlite cursor of a result set or None, affected row count).
+# `binds` maps :pN parameters and DECLAREd @variables to their values.
+
+class _Statement:
+    writes = True
+
+    def __init__(self, sql: str):
+        self.sql = sql
+
+    def run(self, db, binds):
+        cursor = db.execute(self.sql, binds)
+        if cursor.description is not None:
+            return cursor, -1
+        return None, cursor.rowcount
+
+
+class _Select(_Statement):
+    writes = False
+
+
+class _DeclareVariable:
+    writes = False
+
+    def __init__(self, name: str, expr: Optional[str]):
+        self.name = name
+        self.sql = f'SELECT {expr}' if expr else None
+
+    def run(self, db, binds):
+        binds[self.name] = db.execute(self.sql, binds).fetchone()[0] if self.sql else None
+        return None, -1
+
+
+class _DeclareTable:
+    writes = True
+
+    def __init__(self, table: str, body: str):
+        self.drop = f'DROP TABLE IF EXISTS temp.{table}'
+        self.create = f'CREATE TEMP TABLE {table} ({body})'
+
+    def run(self, db, binds):
+        db.execute(self.drop)
+        db.execute(self.create)
+        return None, -1
+
+
+class _If:
+    def __init__(self, condition: str, statement):
+        self.sql = f'SELECT CASE WHEN {condition} THEN 1 ELSE 0 END'
+        self.statement = statement
+        self.writes = statement.writes
+
+    def run(self, db, binds):
+        if db.execute(self.sql, binds).fetchone()[0]:
+            return self.statement.run(db, binds)
+        return None, -1
+
+
+def _output_clause(sql: str, start: int) -> Tuple[Optional[List[str]], Optional[str], int, int]:
+    """Find OUTPUT <exprs> INTO <table> after `start`: (exprs, table, clause start, clause end)"""
+    output = _find_top(sql, r'\bOUTPUT\b', start)
+    if not output:
+        return None, None, -1, -1
+    into = _find_top(sql, r'\bINTO\s+(\w+)\s*', output.end())
+    if not into:
+        raise NotImplementedError('OUTPUT without INTO')
+    return _split_top(sql[output.end():into.start()], ','), into.group(1), output.start(), into.end()
+
+
+class _ModifyJoined:
+    """UPDATE/DELETE alias ... [OUTPUT ... INTO t] FROM <joins> [WHERE ...]
+
+    SQLite can neither join the target in UPDATE ... FROM nor OUTPUT, so
+    the new values and outputs are selected first (from the pre-change
+    rows, as SQL Server's deleted.* sees them) and then applied by rowid.
+    """
+    writes = True
+
+    def __init__(self, sql: str, delete: bool):
+        head = re.match(r'DELETE\s+(?:FROM\s+)?(\w+)\s*' if delete else r'UPDATE\s+(\w+)\s+SET\s+',
+                        sql, re.IGNORECASE)
+        target = head.group(1)
+        outputs, self.into, output_start, output_end = _output_clause(sql, head.end())
+        from_match = _find_top(sql, r'\bFROM\b', max(head.end(), output_end))
+        where_match = _find_top(sql, r'\bWHERE\b', from_match.end() if from_match else head.end())
+
+        ends = [m.start() for m in (from_match, where_match) if m] + ([output_start] if outputs else [])
+        assignments = [] if delete else _assignments(sql[head.end():min(ends, default=len(sql))])
+        if from_match:
+            from_sql = sql[from_match.end():where_match.start() if where_match else len(sql)]
+        else:
+            from_sql = target
+        where_sql = f' WHERE {sql[where_match.end():]}' if where_match else ''
+        table = _aliased_table(from_sql, target)
+
+        values = dict(assignments)
+
+        def output(expr):
+            expr = re.sub(r'\binserted\.(\w+)',
+                          lambda m: f'({values[m.group(1)]})' if m.group(1) in values else f'{target}.{m.group(1)}',
+                          expr, flags=re.IGNORECASE)
+            return re.sub(r'\bdeleted\.(\w+)', rf'{target}.\1', expr, flags=re.IGNORECASE)
+
+        columns = [f'{target}.rowid'] + [expr for _, expr in assignments] + [output(e) for e in outputs or []]
+        self.select = f'SELECT {", ".join(columns)} FROM {from_sql}{where_sql}'
+        self.width = len(assignments)
+        if delete:
+            self.apply = f'DELETE FROM {table} WHERE rowid = ?'
+        else:
+            sets = ', '.join(f'{column} = ?' for column, _ in assignments)
+            self.apply = f'UPDATE {table} SET {sets} WHERE rowid = ?'
+        self.insert = (f'INSERT INTO {self.into} VALUES ({", ".join(["?"] * len(outputs))})'
+                       if outputs else None)
+
+    def run(self, db, binds):
+        rows = []
+        seen = set()
+        # A target row joined more than once is still changed (and output) once
+        for row in db.execute(self.select, binds):
+            if row[0] not in seen:
+                seen.add(row[0])
+                rows.append(row)
+        width = self.width
+        db.executemany(self.apply, [row[1:width + 1] + (row[0],) for row in rows])
+        if self.insert:
+            db.executemany(self.insert, [row[width + 1:] for row in rows])
+        return None, len(rows)
+
+
+class _InsertOutput:
+    """INSERT INTO t (cols) OUTPUT ... INTO @v VALUES/SELECT ..."""
+    writes = True
+
+    def __init__(self, sql: str):
+        head = re.match(r'INSERT\s+INTO\s+(\w+)\s*\(([^)]*)\)\s*', sql, re.IGNORECASE)
+        table = head.group(1)
+        outputs, into, _, output_end = _output_clause(sql, head.end())
+        self.insert = f'INSERT INTO {table} ({head.group(2)}) {sql[output_end:]} RETURNING rowid'
+        exprs = [re.sub(r'\bdeleted\.\w+', 'NULL',
+                        re.sub(r'\binserted\.', '_inserted.', expr, flags=re.IGNORECASE),
+                        flags=re.IGNORECASE) for expr in outputs]
+        self.output = (f'INSERT INTO {into} SELECT {", ".join(exprs)} '
+                       f'FROM {table} AS _inserted WHERE _inserted.rowid = :_rowid')
+
+    def run(self, db, binds):
+        rowids = [row[0] for row in db.execute(self.insert, binds).fetchall()]
+        for rowid in rowids:
+            db.execute(self.output, dict(binds, _rowid=rowid))
+        return None, len(rowids)
+
+
+class _Merge:
+    """MERGE t AS target USING <source> AS s ON ... WHEN MATCHED [AND ...] THEN UPDATE ...
+    WHEN NOT MATCHED [BY TARGET] THEN INSERT ... [OUTPUT ... INTO @v]"""
+    writes = True
+
+    def __init__(self, sql: str):
+        head = re.match(r'MERGE\s+(?:INTO\s+)?(\w+)\s+(?:AS\s+)?(\w+)\s+USING\s+', sql, re.IGNORECASE)
+        table, target = head.group(1), head.group(2)
+        if sql[head.end()] == '(':
+            close = _closing_paren(sql, head.end())
+            source_sql = sql[head.end():close + 1]
+            rest = close + 1
+        else:
+            word = re.match(r'\w+', sql[head.end():])
+            source_sql = word.group(0)
+            rest = head.end() + word.end()
+        alias = re.compile(r'\s*(?:AS\s+)?(\w+)\s+', re.IGNORECASE).match(sql, rest)
+        source = alias.group(1)
+
+        on = _find_top(sql, r'\bON\b', alias.end())
+        outputs, into, output_start, _ = _output_clause(sql, on.end())
+        whens_end = output_start if outputs else len(sql)
+        first_when = _find_top(sql, r'\bWHEN\b', on.end(), whens_end)
+        on_sql = sql[on.end():first_when.start()]
+
+        matched_sql = None
+        assignments = []
+        insert_columns = insert_values = None
+        position = first_when.start()
+        while position < whens_end:
+            following = _find_top(sql, r'\bWHEN\b', position + 4, whens_end)
+            clause = sql[position:following.start() if following else whens_end].strip()
+            position = following.start() if following else whens_end
+            update = re.match(r'WHEN\s+MATCHED\s+(?:AND\s+(.*?)\s+)?THEN\s+UPDATE\s+SET\s+(.*)$',
+                              clause, re.IGNORECASE | re.DOTALL)
+            insert = re.match(r'WHEN\s+NOT\s+MATCHED(?:\s+BY\s+TARGET)?\s+THEN\s+INSERT\s*\(([^)]*)\)\s*'
+                              r'VALUES\s*\((.*)\)$', clause, re.IGNORECASE | re.DOTALL)
+            if update:
+                matched_sql = update.group(1) or '1 = 1'
+                assignments = _assignments(update.group(2))
+            elif insert:
+                insert_columns = _columns(insert.group(1))
+                insert_values = _split_top(insert.group(2), ',')
+            else:
+                raise NotImplementedError(f'Unsupported MERGE clause: {clause[:60]!r}')
+
+        values = dict(assignments)
+
+        def updated_output(expr):
+            expr = re.sub(r'\$action', "'UPDATE'", expr)
+            expr = re.sub(r'\binserted\.(\w+)',
+                          lambda m: f'({values[m.group(1)]})' if m.group(1) in values else f'{target}.{m.group(1)}',
+                          expr, flags=re.IGNORECASE)
+            return re.sub(r'\bdeleted\.(\w+)', rf'{target}.\1', expr, flags=re.IGNORECASE)
+
+        def inserted_output(expr):
+            expr = re.sub(r'\$action', "'INSERT'", expr)
+            expr = re.sub(r'\binserted\.', '_inserted.', expr, flags=re.IGNORECASE)
+            expr = re.sub(r'\bdeleted\.\w+', 'NULL', expr, flags=re.IGNORECASE)
+            return re.sub(rf'\b{target}\.\w+', 'NULL', expr)
+
+        outputs = outputs or []
+        self.width = len(assignments)
+        self.outputs = len(outputs)
+        self.inserts = insert_columns is not None
+        columns = ([f'{target}.rowid', f'CASE WHEN {matched_sql or "0 = 1"} THEN 1 ELSE 0 END']
+                   + [expr for _, expr in assignments]
+                   + [updated_output(expr) for expr in outputs]
+                   + (insert_values or []) + [f'{source}.*'])
+        self.select = (f'SELECT {", ".join(columns)} FROM {source_sql} AS {source} '
+                       f'LEFT JOIN {table} AS {target} ON {on_sql}')
+        sets = ', '.join(f'{column} = ?' for column, _ in assignments)
+        self.apply = f'UPDATE {table} SET {sets} WHERE rowid = ?' if assignments else None
+        if self.inserts:
+            self.insert = (f'INSERT INTO {table} ({", ".join(insert_columns)}) '
+                           f'VALUES ({", ".join(["?"] * len(insert_columns))}) RETURNING rowid')
+        self.insert_into = f'INSERT INTO {into} VALUES ({", ".join(["?"] * len(outputs))})' if outputs else None
+        self.inserted_exprs = [inserted_output(expr) for expr in outputs]
+        self.source = source
+        self.table = table
+
+    def run(self, db, binds):
+        cursor = db.execute(self.select, binds)
+        names = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+        width, outputs = self.width, self.outputs
+        updates, output_rows, inserts = [], [], []
+        inserted_at = 2 + width + outputs
+        for row in rows:
+            if row[0] is not None:
+                if row[1] and self.apply:
+                    updates.append(row[2:2 + width] + (row[0],))
+                    output_rows.append(row[2 + width:inserted_at])
+            elif self.inserts:
+                inserts.append(row)
+        if updates:
+            db.executemany(self.apply, updates)
+
+        changed = len(updates)
+        if inserts:
+            insert_width = self.insert.count('?')
+            source_names = names[inserted_at + insert_width:]
+            source_select = ', '.join(f':_s{index} AS {name}' for index, name in enumerate(source_names))
+            output_sql = (f'SELECT {", ".join(self.inserted_exprs)} FROM {self.table} AS _inserted, '
+                          f'(SELECT {source_select}) AS {self.source} WHERE _inserted.rowid = :_rowid')
+            for row in inserts:
+                rowid = db.execute(self.insert, row[inserted_at:inserted_at + insert_width]).fetchone()[0]
+                if self.insert_into:
+                    params = dict(binds, _rowid=rowid)
+                    params.update((f'_s{index}', value)
+                                  for index, value in enumerate(row[inserted_at + insert_width:]))
+                    output_rows.append(db.execute(output_sql, params).fetchone())
+            changed += len(inserts)
+        if self.insert_into and output_rows:
+            db.executemany(self.insert_into, output_rows)
+        return None, changed
+
+
+_SKIPPED = re.compile(r'SET\s+\w+\s+(ON|OFF)$', re.IGNORECASE)
+_DECLARE_TABLE = re.compile(r'DECLARE\s+@(\w+)\s+TABLE\s*\((.*)\)$', re.IGNORECASE | re.DOTALL)
+_DECLARE_VARIABLE = re.compile(r'DECLARE\s+@(\w+)\s+\w+(?:\s*\([^)]*\))?\s*(?:=\s*(.+))?$',
+                               re.IGNORECASE | re.DOTALL)
+
+
+def _compile_statement(sql: str):
+    keyword = sql.split(None, 1)[0].upper()
+    if keyword in ('SELECT', 'WITH'):
+        return _Select(sql)
+    if keyword == 'IF':
+        body = _find_top(sql, r'\b(UPDATE|INSERT|DELETE|MERGE|SELECT)\b', 2)
+        return _If(sql[2:body.start()].strip(), _compile_statement(sql[body.start():]))
+    if keyword in ('UPDATE', 'DELETE'):
+        head = re.match(r'UPDATE\s+\w+|DELETE\s+(?:FROM\s+)?\w+', sql, re.IGNORECASE)
+        if _find_top(sql, r'\b(OUTPUT|FROM)\b', head.end()):
+            return _ModifyJoined(sql, delete=keyword == 'DELETE')
+        return _Statement(sql)
+    if keyword == 'INSERT':
+        return _InsertOutput(sql) if _find_top(sql, r'\bOUTPUT\b') else _Statement(sql)
+    if keyword == 'MERGE':
+        return _Merge(sql)
+    raise NotImplementedError(f'Unsupported statement: {sql[:60]!r}')
+
+
+@lru_cache(maxsize=512)
+def compile_batch(sql: str) -> Tuple[Any, ...]:
+    """Compile a T-SQL batch (with :pN parameters) into SQLite steps"""
+    steps = []
+    table_vars = {}
+    for statement in _split_top(_strip_comments(sql), ';'):
+        if _SKIPPED.match(statement):
+            continue
+        declare = _DECLARE_TABLE.match(statement)
+        if declare:
+            table_vars[declare.group(1)] = f'_tv_{declare.group(1)}'
+            steps.append(_DeclareTable(table_vars[declare.group(1)], declare.group(2)))
+            continue
+        declare = _DECLARE_VARIABLE.match(statement)
+        if declare:
+            expr = declare.group(2)
+            steps.append(_DeclareVariable(declare.group(1), _translate(expr, table_vars) if expr else None))
+            continue
+        steps.append(_compile_statement(_translate(statement, table_vars)))
+    return tuple(steps)
+
+
+_PLACEHOLDER = re.compile(r'%(s|%)')
+
+
+def _named_parameters(operation: str) -> str:
+    """%s -> :p0, :p1, ... and %% -> % (pymssql's pyformat, positional only)"""
+    counter = iter(range(1 << 30))
+    return _PLACEHOLDER.sub(lambda m: f':p{next(counter)}' if m.group(1) == 's' else '%', operation)
+
+
+# ============================================================================
+# DB-API Objects
+# ============================================================================
+
+class Cursor:
+    """pymssql-style cursor: the batch's first result set, as tuples or dicts"""
+
+    def __init__(self, connection: 'Connection', as_dict: bool = False):
+        self.connection = connection
+        self.as_dict = as_dict
+        self.rowcount = -1
+        self.description = None
+        self._rows = None
+        self._names = None
+        self._pending = []
+
+    def execute(self, operation: str, params: Any = None):
+        if params is not None:
+            if not isinstance(params, (tuple, list)):
+                params = (params,)
+            operation = _named_parameters(operation)
+            binds = {f'p{index}': to_sqlite(value) for index, value in enumerate(params)}
+        else:
+            binds = {}
+
+        steps = compile_batch(operation)
+        db = self.connection.db
+        results = []
+        self.rowcount = -1
+        for index, step in enumerate(steps):
+            if step.writes:
+                self.connection.begin()
+            cursor, count = step.run(db, binds)
+            if cursor is not None:
+                # Only the last statement's rows may stay unfetched in SQLite
+                last = index == len(steps) - 1
+                results.append((cursor.description, cursor if last else cursor.fetchall()))
+            if count >= 0:
+                self.rowcount = count
+        self._pending = results
+        self.nextset()
+
+    def executemany(self, operation: str, seq_of_params):
+        for params in seq_of_params:
+            self.execute(operation, params)
+
+    def _set(self, description, rows):
+        self.description = description
+        self._names = [column[0] for column in description] if description else None
+        self._rows = iter(rows) if rows is not None else None
+
+    def nextset(self) -> Optional[bool]:
+        if not self._pending:
+            self._set(None, None)
+            return None
+        description, rows = self._pending.pop(0)
+        self._set(description, rows)
+        return True
+
+    def _convert(self, row):
+        values = [_from_sqlite(value) for value in row]
+        return dict(zip(self._names, values)) if self.as_dict else tuple(values)
+
+    def fetchone(self):
+        if self._rows is None:
+            raise Exception('Statement not executed or executed statement has no resultset')
+        row = next(self._rows, None)
+        return None if row is None else self._convert(row)
+
+    def fetchmany(self, size: int = 1):
+        rows = []
+        for _ in range(size):
+            row = self.fetchone()
+            if row is None:
+                break
+            rows.append(row)
+        return rows
+
+    def fetchall(self):
+        if self._rows is None:
+            raise Exception('Statement not executed or executed statement has no resultset')
+        return [self._convert(row) for row in self._rows]
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._rows = None
+        self._pending = []
+
+
+class Connection:
+    """One SQLite connection; writes run in a transaction until commit()/rollback()"""
+
+    def __init__(self, path: str, timeout: float = 30):
+        self.db = sqlite3.connect(path, timeout=timeout or 30, isolation_level=None, check_same_thread=False)
+        self.db.create_function('like', 2, _like, deterministic=True)
+        self.db.create_function('CHECKSUM', -1, _checksum, deterministic=True)
+        self.db.create_aggregate('CHECKSUM_AGG', 1, _ChecksumAgg)
+
+    def begin(self):
+        if not self.db.in_transaction:
+            self.db.execute('BEGIN IMMEDIATE')
+
+    def cursor(self, as_dict: bool = False) -> Cursor:
+        return Cursor(self, as_dict)
+
+    def commit(self):
+        if self.db.in_transaction:
+            self.db.execute('COMMIT')
+
+    def rollback(self):
+        if self.db.in_transaction:
+            self.db.execute('ROLLBACK')
+
+    def close(self):
+        self.rollback()
+        self.db.close()
+
+
+def connect(server: str = None, user: str = None, password: str = None, database: str = '',
+            timeout: float = 0, login_timeout: float = 60, port: Any = None, **kwargs) -> Connection:
+    """pymssql.connect() stand-in: `database` is the SQLite file path"""
+    return Connection(database, timeout)
@@ -0,0 +1,160 @@
+"""Generate a synthetic warehouse for the benchmarks
+
+    python -m bench.generate --slots 100000 --out /tmp/warehouse_100k.db
+
+A warehouse of N slots (Items_BinLocations rows) gets N/2 products in
+Items_tbl (a few discontinued, some never slotted), bins for every slot
+plus 10% empty ones named aisle-rack-shelf, and history rows (2N by
+default) with the app's operation mix spread over the past year.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, Tuple
+
+from bench.fake_mssql import create_schema
+
+_ADJECTIVES = ['Organic', 'Classic', 'Premium', 'Fresh', 'Family Size', 'Low Fat', 'Spicy',
+               'Original', 'Frozen', 'Sugar Free', 'Roasted', 'Natural', 'Extra', 'Mini']
+_NOUNS = ['Whole Milk', 'Orange Juice', 'Potato Chips', 'Green Tea', 'Paper Towels', 'Rice',
+          'Coffee Beans', 'Pasta', 'Peanut Butter', 'Dish Soap', 'Tortillas', 'Granola Bars',
+          'Sparkling Water', 'Cat Food', 'Olive Oil', 'Tomato Sauce', 'Cereal', 'Almonds']
+_SIZES = ['8 oz', '12 oz', '16 oz', '1 lb', '2 lb', '1 gal', '32 ct', '6 pk', '12 pk', '500 ml']
+_UNIT_QTYS = [6, 12, 12, 24, 24, 48, None]
+
+# Share of history rows per operation type
+_OPERATION_MIX = [('ADJUST', 0.5), ('UPDATE', 0.2), ('CREATE', 0.2), ('DELETE', 0.1)]
+
+USERS = [f'user{index:02d}' for index in range(1, 21)] + ['admin']
+PASSWORD = 'bench'
+
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat(sep=' ', timespec='milliseconds')
+
+
+def _batches(rows: Iterator[Tuple], size: int = 10000) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(path: str, slots: int, history_factor: float = 2.0, seed: int = 42) -> Dict[str, Any]:
+    """Write a warehouse with `slots` bin assignments to a new SQLite file; returns its counts"""
+    rng = random.Random(seed)
+    if os.path.exists(path):
+        os.remove(path)
+    started = time.perf_counter()
+    now = datetime(2026, 1, 1)
+    year_ago = now - timedelta(days=365)
+
+    products = max(slots // 2, 50)
+    bins = max(int(slots * 1.1), 50)
+    history_rows = int(slots * history_factor)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        create_schema(conn)
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('BEGIN')
+
+        upcs = rng.sample(range(10 ** 11, 10 ** 12), products)
+        items = []
+        for index, upc in enumerate(upcs):
+            description = f'{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {rng.choice(_SIZES)}'
+            items.append((1000 + index * 10, f'SKU{index:07d}', f'0{upc}', description,
+                          rng.choice(_UNIT_QTYS), 1 if rng.random() < 0.05 else 0))
+        for batch in _batches(iter(items)):
+            conn.executemany('INSERT INTO Items_tbl VALUES (?, ?, ?, ?, ?, ?)', batch)
+
+        aisles = max(int(bins ** (1 / 3)), 1)
+        bin_names = [f'{chr(65 + aisle % 26)}{aisle // 26 + 1:02d}-{rack:02d}-{shelf:02d}'
+                     for aisle in range(aisles * 2) for rack in range(1, aisles + 1)
+                     for shelf in range(1, aisles + 2)][:bins]
+        while len(bin_names) < bins:
+            bin_names.append(f'OVERFLOW-{len(bin_names):07d}')
+        for batch in _batches((index, name) for index, name in enumerate(bin_names, 1)):
+            conn.executemany('INSERT INTO BinLocations_tbl VALUES (?, ?)', batch)
+
+        # Most products sit in one or two bins; slotted products skip the unslotted tail
+        slotted = items[:max(int(products * 0.9), 1)]
+
+        def slot_rows():
+            for index in range(slots):
+                item = slotted[index % len(slotted)] if index < len(slotted) else rng.choice(slotted)
+                created = year_ago + timedelta(seconds=rng.randrange(365 * 86400))
+                updated = created + timedelta(seconds=rng.randrange(int((now - created).total_seconds()) + 1))
+                yield (index + 1, _timestamp(created), item[2], item[3], rng.randrange(0, 200),
+                       index % bins + 1, _timestamp(updated))
+
+        for batch in _batches(slot_rows()):
+            conn.executemany('INSERT INTO Items_BinLocations (id, CreatedAt, ProductUPC, ProductDescription, '
+                             'Qty_Cases, BinLocationID, LastUpdate) VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+
+        operations = [name for name, _ in _OPERATION_MIX]
+        weights = [weight for _, weight in _OPERATION_MIX]
+
+        def history():
+            step = 365 * 86400 / max(history_rows, 1)
+            for index in range(history_rows):
+                operation = rng.choices(operations, weights)[0]
+                item = rng.choice(slotted)
+                qty = rng.randrange(0, 200)
+                adjustment = rng.randrange(-20, 21) if operation == 'ADJUST' else None
+                bin_id = rng.randrange(1, bins + 1)
+                previous = None if operation == 'CREATE' else (item[2], item[3], qty, bin_id, item[4])
+                new = None if operation == 'DELETE' else (
+                    item[2], item[3], qty + (adjustment or 0),
+                    rng.randrange(1, bins + 1) if operation == 'UPDATE' else bin_id, item[4])
+                timestamp = _timestamp(year_ago + timedelta(seconds=index * step))
+                yield ((rng.randrange(1, slots + 1), operation, timestamp, rng.choice(USERS))
+                       + (previous or (None,) * 5) + (new or (None,) * 5)
+                       + (adjustment, None, timestamp if previous else None, timestamp if previous else None))
+
+        for batch in _batches(history()):
+            conn.executemany('INSERT INTO Items_BinLocations_History (RecordID, OperationType, Timestamp, Username, '
+                             'PreviousProductUPC, PreviousProductDescription, PreviousQty_Cases, '
+                             'PreviousBinLocationID, PreviousUnitQty2, NewProductUPC, NewProductDescription, '
+                             'NewQty_Cases, NewBinLocationID, NewUnitQty2, AdjustmentAmount, Notes, '
+                             'RecordCreatedAt, RecordLastUpdate) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', batch)
+
+        conn.executemany('INSERT INTO Trustees_tbl VALUES (?, ?, ?, ?, 0)',
+                         [(index, 100 + index, name, PASSWORD) for index, name in enumerate(USERS, 1)])
+        conn.execute('COMMIT')
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+
+    return {
+        'slots': slots,
+        'products': products,
+        'bins': bins,
+        'history': history_rows,
+        'users': len(USERS),
+        'seed': seed,
+        'generate_seconds': round(time.perf_counter() - started, 3),
+        'file_bytes': os.path.getsize(path)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic warehouse SQLite database')
+    parser.add_argument('--slots', type=int, default=10000, help='Items_BinLocations rows (1k - 1M)')
+    parser.add_argument('--history-factor', type=float, default=2.0, help='History rows per slot')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', required=True, help='SQLite file to (re)create')
+    args = parser.parse_args()
+    print(generate(args.out, args.slots, args.history_factor, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,465 @@
+"""Replay recorded (or synthetic) warehouse traffic against a running app
+
+    python -m bench.replay http://localhost:5000 --user user01:secret \\
+        --start 2025-11-24 --end 2025-11-25 --speedup 60 --out replay.json
+    python -m bench.replay http://localhost:5000 --user user01:secret \\
+        --synthetic 2000 --rate 5 --sessions 20
+
+A history window is downloaded through /api/history/export-csv and each
+operation is replayed the way the UI performs it: creates and updates
+type into the product and bin searches first, every write is followed by
+the grid's delta sync (/api/bin-locations/changes), and each session loads
+the full grid when it starts and every --reload-every operations. Each
+historical user is pinned to one of --sessions concurrent HTTP sessions,
+so one user's operations stay in order; operations start at their
+recorded offsets divided by --speedup.
+
+--synthetic N instead generates N operations in the create/update/adjust/
+delete ratios of /api/history/stats, as Poisson arrivals at --rate per
+second (times --speedup), on records from the grid. Synthetic deletes only
+remove records the run created.
+
+Replayed writes change data (a history replay re-applies recorded updates
+and deletes): point it at a staging copy, or use --read-only to send only
+the searches and grid loads.
+
+The report has requests, errors, throughput and p50/p95/p99 latency per
+endpoint, plus how late operations started against their schedule - lag
+that keeps growing means the app is past its concurrency ceiling.
+"""
+import argparse
+import csv
+import http.client
+import io
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+OPERATIONS = ('CREATE', 'UPDATE', 'ADJUST', 'DELETE')
+
+# /api/history/stats column for each operation type
+_STATS_COLUMNS = {'CREATE': 'creates', 'UPDATE': 'updates', 'ADJUST': 'adjustments', 'DELETE': 'deletes'}
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+class Recorder:
+    """Latencies and status codes per endpoint, shared by all sessions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.lags: List[float] = []
+
+    def record(self, endpoint: str, seconds: float, status: str):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            self.statuses[endpoint][status] += 1
+
+    def lag(self, seconds: float):
+        with self._lock:
+            self.lags.append(seconds)
+
+
+class Client:
+    """One logged-in browser session: a keep-alive connection plus its cookies"""
+
+    def __init__(self, base_url: str, recorder: Optional[Recorder] = None, timeout: float = 120):
+        parts = urlsplit(base_url)
+        connection = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._connect = lambda: connection(parts.hostname, parts.port, timeout=timeout)
+        self._prefix = parts.path.rstrip('/')
+        self._conn = None
+        self.cookies: Dict[str, str] = {}
+        self.recorder = recorder
+
+    def request(self, method: str, path: str, endpoint: Optional[str] = None,
+                params: Optional[Dict[str, Any]] = None, body: Any = None) -> Tuple[int, Any]:
+        """Send a request; returns (status, parsed JSON or raw bytes)"""
+        url = self._prefix + path + ('?' + urlencode(params) if params else '')
+        headers = {'Accept': 'application/json'}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            status, response_headers, data = self._send(method, url, payload, headers)
+        except (OSError, http.client.HTTPException) as e:
+            if self.recorder:
+                self.recorder.record(endpoint or f'{method} {path}', time.perf_counter() - start,
+                                     type(e).__name__)
+            return 0, None
+        if self.recorder:
+            self.recorder.record(endpoint or f'{method} {path}', time.perf_counter() - start, str(status))
+
+        for header, value in response_headers:
+            if header.lower() == 'set-cookie':
+                name, _, rest = value.partition('=')
+                self.cookies[name.strip()] = rest.split(';', 1)[0]
+        if 'json' in dict((k.lower(), v) for k, v in response_headers).get('content-type', ''):
+            try:
+                return status, json.loads(data)
+            except ValueError:
+                pass
+        return status, data
+
+    def _send(self, method, url, payload, headers):
+        # A kept-alive connection the server has closed fails once; retry on a new one
+        for attempt in (1, 2):
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                self._conn.request(method, url, body=payload, headers=headers)
+                response = self._conn.getresponse()
+                data = response.read()
+                return response.status, response.getheaders(), data
+            except (OSError, http.client.HTTPException):
+                self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
+
+    def login(self, username: str, password: str):
+        status, result = self.request('POST', '/api/login', 'POST /api/login',
+                                      body={'username': username, 'password': password})
+        if status != 200 or not isinstance(result, dict) or not result.get('success'):
+            message = result.get('message') if isinstance(result, dict) else status
+            raise SystemExit(f'Login as {username} failed: {message}')
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+# ============================================================================
+# Workload
+# ============================================================================
+
+def _int(value: str) -> Optional[int]:
+    return int(float(value)) if value not in ('', None) else None
+
+
+def _float(value: str) -> Optional[float]:
+    return float(value) if value not in ('', None) else None
+
+
+def load_history(client: Client, start: Optional[str], end: Optional[str]) -> List[Dict[str, Any]]:
+    """History rows of the window, oldest first, from the app's CSV export"""
+    params = {key: value for key, value in (('start_date', start), ('end_date', end)) if value}
+    status, data = client.request('GET', '/api/history/export-csv', params=params)
+    if status != 200:
+        raise SystemExit(f'History export failed: HTTP {status}')
+    rows = list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+
+    operations = []
+    for row in rows:
+        operations.append({
+            'at': datetime.fromisoformat(row['Timestamp']),
+            'user': row['Username'],
+            'type': row['OperationType'],
+            'record_id': _int(row['RecordID']),
+            'adjustment': _int(row['AdjustmentAmount']),
+            'notes': row['Notes'] or None,
+            'product_upc': row['NewProductUPC'] or row['PreviousProductUPC'],
+            'product_description': row['NewProductDescription'] or row['PreviousProductDescription'],
+            'qty_cases': _int(row['NewQty_Cases']),
+            'bin_location_id': _int(row['NewBinLocationID']),
+            'bin_location': row['NewBinLocation'],
+            'qty_per_case': _float(row['NewUnitQty2'])
+        })
+    operations.sort(key=lambda op: op['at'])
+    if not operations:
+        raise SystemExit('No history in the requested window')
+    first = operations[0]['at']
+    for op in operations:
+        op['offset'] = (op['at'] - first).total_seconds()
+    return operations
+
+
+def synthetic_operations(client: Client, count: int, rate: float, users: int,
+                         rng: random.Random) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """`count` operations in the recorded operation mix, arriving at `rate` per second"""
+    status, stats = client.request('GET', '/api/history/stats')
+    stats = stats.get('data', stats) if isinstance(stats, dict) else {}
+    weights = {op: float(stats.get(column) or 0) for op, column in _STATS_COLUMNS.items()}
+    if not sum(weights.values()):
+        # No history yet: mostly adjustments, like a running warehouse
+        weights = {'CREATE': 2, 'UPDATE': 2, 'ADJUST': 5, 'DELETE': 1}
+    total = sum(weights.values())
+    mix = {op: weight / total for op, weight in weights.items()}
+
+    operations = []
+    offset = 0.0
+    for index in range(count):
+        offset += rng.expovariate(rate)
+        operations.append({
+            'offset': offset,
+            'user': f'synthetic{index % users}',
+            'type': rng.choices(list(mix), list(mix.values()))[0],
+            'synthetic': True
+        })
+    return operations, mix
+
+
+class Session(threading.Thread):
+    """Runs one session's operations in order, each no earlier than its scheduled time"""
+
+    def __init__(self, name: str, client: Client, credentials: Tuple[str, str],
+                 operations: List[Dict[str, Any]], args, started_at: float, shared: Dict[str, Any]):
+        super().__init__(name=name, daemon=True)
+        self.client = client
+        self.credentials = credentials
+        self.operations = operations
+        self.args = args
+        self.started_at = started_at
+        self.shared = shared
+        self.rng = random.Random(f'{args.seed}:{name}')
+        self.records: List[Dict[str, Any]] = []
+        self.watermark = None
+
+    def run(self):
+        self.client.login(*self.credentials)
+        self.load_grid()
+        for number, op in enumerate(self.operations, 1):
+            due = self.started_at + op['offset'] / self.args.speedup
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                self.client.recorder.lag(-delay)
+            if op.get('synthetic'):
+                self.synthesize(op)
+            self.perform(op)
+            if self.args.reload_every and number % self.args.reload_every == 0:
+                self.load_grid()
+        self.client.close()
+
+    def load_grid(self):
+        status, result = self.client.request('GET', '/api/bin-locations', 'GET /api/bin-locations')
+        if status == 200 and isinstance(result, dict):
+            self.records = result.get('data') or []
+            self.watermark = result.get('watermark')
+
+    def sync_grid(self):
+        if not self.watermark:
+            self.load_grid()
+            return
+        status, result = self.client.request('GET', '/api/bin-locations/changes',
+                                             'GET /api/bin-locations/changes',
+                                             params={'since': self.watermark})
+        if status == 200 and isinstance(result, dict):
+            self.watermark = result.get('watermark') or self.watermark
+
+    def type_search(self, path: str, endpoint: str, text: Optional[str], **params):
+        """Typeahead: one request per debounced prefix, as the search boxes send them"""
+        if not text:
+            return
+        for length in sorted({min(3, len(text)), min(6, len(text)), len(text)}):
+            self.client.request('GET', path, endpoint, params=dict(params, q=text[:length]))
+
+    def synthesize(self, op: Dict[str, Any]):
+        """Fill a synthetic operation's target from the grid this session loaded"""
+        if not self.records:
+            op['type'] = None
+            return
+        record = self.rng.choice(self.records)
+        other = self.rng.choice(self.records)
+        op.update({
+            'record_id': record['id'],
+            'adjustment': self.rng.choice([-3, -2, -1, 1, 2, 3, 5, 10]),
+            'notes': 'replay',
+            'product_upc': record['ProductUPC'],
+            'product_description': record['ProductDescription'],
+            'qty_cases': self.rng.randrange(0, 100),
+            'bin_location_id': other['BinLocationID'],
+            'bin_location': other.get('BinLocation'),
+            'qty_per_case': None
+        })
+        if op['type'] == 'DELETE':
+            created = self.shared['created']
+            with self.shared['lock']:
+                record_id = created.pop() if created else None
+            # Synthetic deletes only remove records this run created
+            if record_id is None:
+                op['type'] = 'CREATE'
+            else:
+                op['record_id'] = record_id
+
+    def perform(self, op: Dict[str, Any]):
+        kind = op['type']
+        client = self.client
+        fields = {key: op.get(key) for key in ('product_upc', 'product_description', 'qty_cases',
+                                                'bin_location_id', 'qty_per_case')}
+        if kind in ('CREATE', 'UPDATE'):
+            self.type_search('/api/products/search', 'GET /api/products/search',
+                             op.get('product_description') or op.get('product_upc'), field='description')
+            self.type_search('/api/bins/search', 'GET /api/bins/search', op.get('bin_location'))
+        if self.args.read_only or kind not in OPERATIONS:
+            return
+
+        if kind == 'ADJUST':
+            client.request('PATCH', f"/api/bin-locations/{op['record_id']}/adjust",
+                           'PATCH /api/bin-locations/<id>/adjust',
+                           body={'adjustment': op.get('adjustment') or 1, 'notes': op.get('notes')})
+        elif kind == 'UPDATE':
+            client.request('PUT', f"/api/bin-locations/{op['record_id']}", 'PUT /api/bin-locations/<id>',
+                           body=fields)
+        elif kind == 'CREATE':
+            status, result = client.request('POST', '/api/bin-locations', 'POST /api/bin-locations',
+                                            body=fields)
+            if op.get('synthetic') and isinstance(result, dict) and result.get('id'):
+                with self.shared['lock']:
+                    self.shared['created'].append(result['id'])
+        else:
+            client.request('DELETE', f"/api/bin-locations/{op['record_id']}", 'DELETE /api/bin-locations/<id>')
+        self.sync_grid()
+
+
+# ============================================================================
+# Report
+# ============================================================================
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def build_report(recorder: Recorder, elapsed: float, operations: int, args,
+                 mix: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    endpoints = {}
+    for endpoint, latencies in sorted(recorder.latencies.items()):
+        values = sorted(seconds * 1000 for seconds in latencies)
+        statuses = dict(recorder.statuses[endpoint])
+        errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '3')))
+        endpoints[endpoint] = {
+            'requests': len(values),
+            'errors': errors,
+            'statuses': statuses,
+            'throughput_rps': round(len(values) / elapsed, 2) if elapsed else None,
+            'p50_ms': round(_percentile(values, 0.50), 1),
+            'p95_ms': round(_percentile(values, 0.95), 1),
+            'p99_ms': round(_percentile(values, 0.99), 1),
+            'max_ms': round(values[-1], 1),
+            'mean_ms': round(statistics.fmean(values), 1)
+        }
+    requests = sum(item['requests'] for item in endpoints.values())
+    lags = sorted(recorder.lags)
+    return {
+        'target': args.base_url,
+        'mode': 'synthetic' if args.synthetic else 'history',
+        'window': None if args.synthetic else {'start': args.start, 'end': args.end},
+        'operation_mix': mix,
+        'speedup': args.speedup,
+        'sessions': args.sessions,
+        'read_only': args.read_only,
+        'operations': operations,
+        'elapsed_seconds': round(elapsed, 3),
+        'requests': requests,
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else None,
+        'late_operations': len(lags),
+        'lag_p95_seconds': round(_percentile(lags, 0.95), 3) if lags else 0,
+        'lag_max_seconds': round(lags[-1], 3) if lags else 0,
+        'endpoints': endpoints
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['operations']} operations, {report['requests']} requests in "
+          f"{report['elapsed_seconds']} s ({report['throughput_rps']} req/s); "
+          f"{report['late_operations']} started late (p95 {report['lag_p95_seconds']} s, "
+          f"max {report['lag_max_seconds']} s)")
+    print(f"{'endpoint':<42} {'reqs':>7} {'errs':>6} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for endpoint, item in report['endpoints'].items():
+        print(f"{endpoint:<42} {item['requests']:>7} {item['errors']:>6} {item['throughput_rps']:>8} "
+              f"{item['p50_ms']:>8} {item['p95_ms']:>8} {item['p99_ms']:>8}")
+
+
+# ============================================================================
+# Command Line
+# ============================================================================
+
+def _credentials(value: str) -> Tuple[str, str]:
+    username, sep, password = value.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError('expected username:password')
+    return username, password
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay warehouse traffic against a running app')
+    parser.add_argument('base_url', help='App URL, e.g. http://localhost:5000')
+    parser.add_argument('--user', action='append', type=_credentials, required=True,
+                        help='username:password to log in with (repeat to spread sessions over accounts)')
+    parser.add_argument('--start', help='History window start (YYYY-MM-DD or timestamp)')
+    parser.add_argument('--end', help='History window end')
+    parser.add_argument('--synthetic', type=int, help='Generate this many operations instead of replaying history')
+    parser.add_argument('--rate', type=float, default=1.0, help='Synthetic operations per second before speedup')
+    parser.add_argument('--speedup', type=float, default=1.0, help='Replay this many times faster than recorded')
+    parser.add_argument('--sessions', type=int, help='Concurrent sessions (default: one per historical user, '
+                                                     'or 10 for --synthetic)')
+    parser.add_argument('--reload-every', type=int, default=25,
+                        help='Operations between full grid loads per session (0: only at login)')
+    parser.add_argument('--read-only', action='store_true', help='Send the searches and grid loads, skip writes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='Write the report as JSON')
+    args = parser.parse_args()
+    if args.speedup <= 0 or args.rate <= 0:
+        parser.error('--speedup and --rate must be positive')
+
+    rng = random.Random(args.seed)
+    setup = Client(args.base_url)
+    setup.login(*args.user[0])
+    mix = None
+    if args.synthetic:
+        args.sessions = args.sessions or 10
+        operations, mix = synthetic_operations(setup, args.synthetic, args.rate, args.sessions, rng)
+    else:
+        operations = load_history(setup, args.start, args.end)
+    setup.close()
+
+    # Pin each (historical) user to a session so their operations stay in order
+    users = list(dict.fromkeys(op['user'] for op in operations))
+    args.sessions = args.sessions or len(users)
+    pinned = {user: index % args.sessions for index, user in enumerate(users)}
+    queues = [[] for _ in range(args.sessions)]
+    for op in operations:
+        queues[pinned[op['user']]].append(op)
+
+    print(f'{len(operations)} operations from {len(users)} users over '
+          f"{operations[-1]['offset']:.0f} s, replayed on {args.sessions} sessions at {args.speedup}x",
+          file=sys.stderr)
+
+    recorder = Recorder()
+    shared = {'lock': threading.Lock(), 'created': []}
+    started_at = time.perf_counter() + 1
+    sessions = [Session(f'session-{index}', Client(args.base_url, recorder), args.user[index % len(args.user)],
+                        queue, args, started_at, shared)
+                for index, queue in enumerate(queues) if queue]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    elapsed = time.perf_counter() - started_at
+
+    report = build_report(recorder, elapsed, len(operations), args, mix)
+    print_report(report)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+"""Benchmark MSSQLManager methods and export paths on synthetic warehouses
+
+    python -m bench.run --sizes 1000,10000,100000 --out bench_results.json
+
+Each size is generated once into --data-dir (and reused by later runs with
+the same size and seed), copied to a scratch file, and served to an
+MSSQLManager through bench.fake_mssql. Every benchmark runs up to --repeat
+times, stopping early once it has used --budget seconds; the first run is
+included, so max_ms shows the cold cost.
+
+The suite runs three times per size: `direct` with no optional features, as
+every method queries the database, then `cached` with the product index, bin
+directory, unused-bin set and history rollups built in-process (the same
+objects the enable_* methods create, without their background threads), then
+`replica` with the SQLite read replica synced in-process, so the inventory
+reads are served from the copy. Writes run after the reads of each phase,
+against the scratch copy.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.database import SQLiteManager, MSSQLManager
+from app.exports import (write_bin_locations_xlsx, iter_csv, gzip_chunks,
+                         BIN_LOCATION_CSV_COLUMNS, HISTORY_CSV_COLUMNS)
+from app.history_rollups import HistoryRollupStore
+from app.lookups import ProductSearchIndex, BinDirectory, UnusedBinSet
+from app.replica import InventoryReplica
+from bench import fake_mssql
+from bench.generate import generate, PASSWORD
+
+DEFAULT_SIZES = '1000,10000,100000'
+
+
+# ============================================================================
+# Setup
+# ============================================================================
+
+def build_manager(db_path: str, workdir: str) -> MSSQLManager:
+    """An MSSQLManager whose pool opens bench.fake_mssql connections to db_path"""
+    sqlite_manager = SQLiteManager(os.path.join(workdir, 'config.db'))
+    sqlite_manager.save_config({
+        'server': 'bench',
+        'port': 0,
+        'database': db_path,
+        'username': 'bench',
+        'password': 'bench'
+    })
+    return MSSQLManager(sqlite_manager, connect=fake_mssql.connect)
+
+
+def enable_caches(manager: MSSQLManager, workdir: str):
+    """Attach the optional in-process structures without their refresh threads"""
+    manager.product_index = ProductSearchIndex(manager._load_search_products)
+    manager.bin_directory = BinDirectory(manager._load_bins)
+    manager.unused_bins = UnusedBinSet(manager._load_bin_usage)
+    manager.history_rollups = HistoryRollupStore(os.path.join(workdir, 'history_rollups.db'))
+
+
+def enable_replica(manager: MSSQLManager, workdir: str):
+    """Attach the read replica without its sync thread; it stays fresh for the whole run"""
+    day = 24 * 3600
+    manager.replica = InventoryReplica(os.path.join(workdir, 'replica.db'), max_staleness=day,
+                                       full_sync_interval=day, lookup_interval=60, sync_interval=0)
+
+
+def sample_data(db_path: str, seed: int) -> Dict[str, Any]:
+    """Real IDs, UPCs, bins and names from the warehouse for benchmark arguments"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rng = random.Random(seed)
+        ids = [row[0] for row in conn.execute('SELECT id FROM Items_BinLocations')]
+        slots = [dict(zip(('ProductUPC', 'ProductDescription', 'BinLocation'), row)) for row in conn.execute('''
+            SELECT ibl.ProductUPC, ibl.ProductDescription, bl.BinLocation
+            FROM Items_BinLocations ibl
+            JOIN BinLocations_tbl bl ON ibl.BinLocationID = bl.BinLocationID
+            ORDER BY random() LIMIT 1000
+        ''')]
+        bins = [row[0] for row in conn.execute('SELECT BinLocationID FROM BinLocations_tbl')]
+        users = [row[0] for row in conn.execute('SELECT Login_name FROM Trustees_tbl')]
+        last_day = conn.execute('SELECT substr(MAX(Timestamp), 1, 10) FROM Items_BinLocations_History').fetchone()[0]
+    finally:
+        conn.close()
+    return {
+        'rng': rng,
+        'ids': ids,
+        'slots': slots,
+        'bins': bins,
+        'users': users,
+        'last_day': last_day,
+        'created': []
+    }
+
+
+# ============================================================================
+# Benchmarks
+# ============================================================================
+
+def _count(iterable) -> int:
+    return sum(1 for _ in iterable)
+
+
+def _drain(chunks) -> int:
+    return sum(len(chunk) for chunk in chunks)
+
+
+def read_benchmarks(manager: MSSQLManager, data: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any]]]:
+    rng = data['rng']
+    slot = data['slots'][0]
+    bin_prefix = slot['BinLocation'][:3]
+    word = slot['ProductDescription'].split()[-1]
+    first_day = (datetime.fromisoformat(data['last_day']) - timedelta(days=30)).date().isoformat()
+    page = manager.query_bin_locations(limit=100)
+    history_page = manager.query_history_records(limit=100)
+    watermark = manager.get_bin_locations_with_watermark()[1]
+    return [
+        ('test_connection', manager.test_connection),
+        ('get_bin_locations[all]', manager.get_bin_locations),
+        ('get_bin_locations[bin]', lambda: manager.get_bin_locations(bin_pattern=bin_prefix)),
+        ('get_bin_locations[product]', lambda: manager.get_bin_locations(product_pattern=word)),
+        ('get_bin_locations[grid]', lambda: manager.get_bin_locations(
+            bin_pattern=rng.choice(data['slots'])['BinLocation'], grid_match=True)),
+        ('iter_bin_locations[all]', lambda: _count(manager.iter_bin_locations())),
+        ('query_bin_locations[first_page]', lambda: manager.query_bin_locations(limit=100)),
+        ('query_bin_locations[first_page_total]', lambda: manager.query_bin_locations(limit=100,
+                                                                                      include_total=True)),
+        ('query_bin_locations[next_page]', lambda: manager.query_bin_locations(
+            limit=100, cursor_token=page['next_cursor'])),
+        ('query_bin_locations[updated_desc]', lambda: manager.query_bin_locations(
+            sort='updated', descending=True, limit=100)),
+        ('query_bin_locations[product]', lambda: manager.query_bin_locations(product_pattern=word, limit=100)),
+        ('get_data_version', manager.get_data_version),
+        ('get_bin_locations_with_watermark[all]', manager.get_bin_locations_with_watermark),
+        ('get_bin_location_changes', lambda: manager.get_bin_location_changes(watermark)),
+        ('search_products[description]', lambda: manager.search_products(word)),
+        ('search_products[upc]', lambda: manager.search_products(rng.choice(data['slots'])['ProductUPC'][:6], 'upc')),
+        ('search_products[sku]', lambda: manager.search_products('SKU00001', 'sku')),
+        ('search_bin_locations', lambda: manager.search_bin_locations(bin_prefix)),
+        ('get_unused_bin_locations', manager.get_unused_bin_locations),
+        ('verify_user_credentials', lambda: manager.verify_user_credentials(rng.choice(data['users']), PASSWORD)),
+        ('get_history_records[latest]', manager.get_history_records),
+        ('get_history_records[record]', lambda: manager.get_history_records(record_id=rng.choice(data['ids']))),
+        ('get_history_records[user]', lambda: manager.get_history_records(username=rng.choice(data['users']))),
+        ('query_history_records[first_page]', lambda: manager.query_history_records(limit=100)),
+        ('query_history_records[next_page]', lambda: manager.query_history_records(
+            limit=100, cursor_token=history_page['next_cursor'])),
+        ('iter_history_records[all]', lambda: _count(manager.iter_history_records())),
+        ('get_history_stats', manager.get_history_stats),
+        ('get_history_daily[30d]', lambda: manager.get_history_daily(first_day, data['last_day'])),
+        ('get_history_users[30d]', lambda: manager.get_history_users(first_day, data['last_day'])),
+    ]
+
+
+def cache_benchmarks(manager: MSSQLManager) -> List[Tuple[str, Callable[[], Any]]]:
+    """Building the in-process structures (the first run is the full load)"""
+    return [
+        ('product_index.refresh', manager.product_index.refresh),
+        ('bin_directory.refresh', manager.bin_directory.refresh),
+        ('unused_bins.refresh', manager.unused_bins.refresh),
+        ('sync_history_rollups', manager.sync_history_rollups),
+    ]
+
+
+def replica_benchmarks(manager: MSSQLManager) -> List[Tuple[str, Callable[[], Any]]]:
+    """Replica syncs (the first run of sync_replica[full] is the initial load)"""
+    replica = manager.replica
+
+    def sync(**intervals):
+        saved = {name: getattr(replica, name) for name in intervals}
+        for name, value in intervals.items():
+            setattr(replica, name, value)
+        try:
+            return manager.sync_replica()
+        finally:
+            for name, value in saved.items():
+                setattr(replica, name, value)
+
+    return [
+        ('sync_replica[full]', lambda: sync(full_sync_interval=0)),
+        ('sync_replica[incremental]', sync),
+        ('sync_replica[lookups]', lambda: sync(lookup_interval=0)),
+    ]
+
+
+def write_benchmarks(manager: MSSQLManager, data: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any]]]:
+    rng = data['rng']
+    ids = data['ids']
+
+    def record():
+        slot = rng.choice(data['slots'])
+        return {
+            'product_upc': slot['ProductUPC'],
+            'product_description': slot['ProductDescription'],
+            'qty_cases': rng.randrange(200),
+            'bin_location_id': rng.choice(data['bins'])
+        }
+
+    def create():
+        result = manager.create_bin_location(record(), rng.choice(data['users']))
+        data['created'].append(result['id'])
+        return result
+
+    def delete():
+        if not data['created']:
+            create()
+        return manager.delete_bin_location(data['created'].pop(), rng.choice(data['users']))
+
+    def bulk(kinds):
+        operations = []
+        for record_id in rng.sample(ids, 100):
+            kind = rng.choice(kinds)
+            operation = {'id': record_id, 'op': kind}
+            if kind == 'adjust':
+                operation['adjustment'] = rng.randrange(-5, 6)
+            elif kind == 'move':
+                operation['bin_location_id'] = rng.choice(data['bins'])
+            else:
+                operation.update(record())
+            operations.append(operation)
+        return manager.bulk_apply(operations, rng.choice(data['users']))
+
+    def import_rows():
+        return iter([(number, {'upc': slot['ProductUPC'], 'bin': slot['BinLocation'],
+                               'cases': rng.randrange(200)}, None)
+                     for number, slot in enumerate(rng.sample(data['slots'], 500), 2)])
+
+    def history_row():
+        return {
+            'RecordID': rng.choice(ids),
+            'OperationType': 'ADJUST',
+            'Timestamp': datetime.now(),
+            'Username': rng.choice(data['users']),
+            'AdjustmentAmount': rng.randrange(-5, 6)
+        }
+
+    return [
+        ('create_bin_location', create),
+        ('update_bin_location', lambda: manager.update_bin_location(
+            rng.choice(ids), dict(record(), qty_per_case=rng.choice([6, 12, 24])), rng.choice(data['users']))),
+        ('adjust_quantity', lambda: manager.adjust_quantity(rng.choice(ids), rng.randrange(-5, 6),
+                                                            rng.choice(data['users']), 'bench')),
+        ('delete_bin_location', delete),
+        ('bulk_apply[100_adjust]', lambda: bulk(['adjust'])),
+        ('bulk_apply[100_mixed]', lambda: bulk(['adjust', 'move', 'update'])),
+        ('import_bin_locations[500_dry_run]', lambda: manager.import_bin_locations(
+            import_rows(), 'bench', dry_run=True)),
+        ('import_bin_locations[500]', lambda: manager.import_bin_locations(import_rows(), 'bench')),
+        ('insert_history_record', lambda: manager.insert_history_record(
+            rng.choice(ids), 'ADJUST', rng.choice(data['users']), adjustment_amount=1)),
+        ('insert_history_rows[100]', lambda: manager.insert_history_rows([history_row() for _ in range(100)])),
+    ]
+
+
+def export_benchmarks(manager: MSSQLManager) -> List[Tuple[str, Callable[[], Any]]]:
+    """The download paths: rows streamed from the cursor into each file format"""
+    posted = None
+
+    def posted_xlsx():
+        nonlocal posted
+        if posted is None:
+            # POST /api/export-excel receives the rows the client already has
+            posted = json.loads(json.dumps(manager.get_bin_locations(), default=str))
+        return write_bin_locations_xlsx(posted, io.BytesIO())
+
+    def streamed_xlsx():
+        with tempfile.TemporaryFile() as output:
+            return write_bin_locations_xlsx(manager.iter_bin_locations(), output)
+
+    return [
+        ('export_xlsx[streamed]', streamed_xlsx),
+        ('export_xlsx[posted]', posted_xlsx),
+        ('export_csv[bin_locations]', lambda: _drain(iter_csv(manager.iter_bin_locations(),
+                                                              BIN_LOCATION_CSV_COLUMNS))),
+        ('export_csv_gzip[bin_locations]', lambda: _drain(gzip_chunks(iter_csv(manager.iter_bin_locations(),
+                                                                               BIN_LOCATION_CSV_COLUMNS)))),
+        ('export_csv[history]', lambda: _drain(iter_csv(manager.iter_history_records(), HISTORY_CSV_COLUMNS))),
+    ]
+
+
+# ============================================================================
+# Timing
+# ============================================================================
+
+def _rows(result: Any) -> Optional[int]:
+    """Rows (or bytes, for exports) a benchmark produced, where that is meaningful"""
+    if isinstance(result, bool) or result is None:
+        return None
+    if isinstance(result, int):
+        return result
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict) and isinstance(result.get('data'), list):
+        return len(result['data'])
+    return None
+
+
+def measure(func: Callable[[], Any], repeat: int, budget: float) -> Dict[str, Any]:
+    """Run func up to `repeat` times (at least once) within `budget` seconds"""
+    durations = []
+    result = None
+    started = time.perf_counter()
+    while len(durations) < repeat:
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+        if time.perf_counter() - started >= budget:
+            break
+
+    durations_ms = sorted(duration * 1000 for duration in durations)
+    return {
+        'runs': len(durations_ms),
+        'min_ms': round(durations_ms[0], 3),
+        'median_ms': round(statistics.median(durations_ms), 3),
+        'p95_ms': round(durations_ms[min(len(durations_ms) - 1, int(len(durations_ms) * 0.95))], 3),
+        'mean_ms': round(statistics.fmean(durations_ms), 3),
+        'max_ms': round(durations_ms[-1], 3),
+        'rows': _rows(result)
+    }
+
+
+def run_benchmarks(benchmarks: List[Tuple[str, Callable[[], Any]]], results: Dict[str, Any],
+                   repeat: int, budget: float, only: Optional[str]):
+    for name, func in benchmarks:
+        if only and only not in name:
+            continue
+        try:
+            results[name] = measure(func, repeat, budget)
+        except Exception as e:
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+        summary = results[name]
+        print(f"  {name:<42} {summary.get('median_ms', '-'):>12} ms  {summary.get('error', '')}", flush=True)
+
+
+def run_size(slots: int, args) -> Dict[str, Any]:
+    """Generate (or reuse) one warehouse and run both phases against a scratch copy"""
+    source = os.path.join(args.data_dir, f'warehouse_{slots}_{args.seed}.db')
+    if not os.path.exists(source):
+        print(f'Generating {slots} slots -> {source}', flush=True)
+        dataset = generate(source, slots, args.history_factor, args.seed)
+        with open(source + '.json', 'w') as f:
+            json.dump(dataset, f)
+    with open(source + '.json') as f:
+        dataset = json.load(f)
+
+    report = {'dataset': dataset, 'phases': {}}
+    workdir = tempfile.mkdtemp(prefix=f'bench_{slots}_')
+    try:
+        for phase in ('direct', 'cached', 'replica'):
+            print(f'{slots} slots, {phase}:', flush=True)
+            scratch = os.path.join(workdir, f'{phase}.db')
+            with sqlite3.connect(source) as src, sqlite3.connect(scratch) as dst:
+                src.backup(dst)
+            phase_dir = os.path.join(workdir, phase)
+            os.makedirs(phase_dir)
+
+            manager = build_manager(scratch, phase_dir)
+            data = sample_data(scratch, args.seed)
+            results = {}
+            if phase == 'cached':
+                enable_caches(manager, phase_dir)
+                run_benchmarks(cache_benchmarks(manager), results, args.repeat, args.budget, args.only)
+                if not (manager.product_index.ready and manager.bin_directory.ready):
+                    # Filtered out by --only: build them untimed so the reads below use them
+                    for _, func in cache_benchmarks(manager):
+                        func()
+            elif phase == 'replica':
+                enable_replica(manager, phase_dir)
+                run_benchmarks(replica_benchmarks(manager), results, args.repeat, args.budget, args.only)
+                if not manager.replica.fresh():
+                    manager.sync_replica()
+            run_benchmarks(read_benchmarks(manager, data), results, args.repeat, args.budget, args.only)
+            run_benchmarks(write_benchmarks(manager, data), results, args.repeat, args.budget, args.only)
+            run_benchmarks(export_benchmarks(manager), results, args.repeat, args.budget, args.only)
+            manager.reset_pool()
+            report['phases'][phase] = results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark MSSQLManager on synthetic warehouses')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'Comma-separated slot counts, 1000 to 1000000 (default {DEFAULT_SIZES})')
+    parser.add_argument('--repeat', type=int, default=20, help='Maximum runs per benchmark')
+    parser.add_argument('--budget', type=float, default=5.0, help='Seconds per benchmark before it stops repeating')
+    parser.add_argument('--only', help='Run only benchmarks whose name contains this text')
+    parser.add_argument('--history-factor', type=float, default=2.0, help='History rows per slot')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'bin_locations_bench'),
+                        help='Where generated warehouses are kept between runs')
+    parser.add_argument('--out', default='bench_results.json', help='JSON results file')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    os.makedirs(args.data_dir, exist_ok=True)
+
+    results = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'backend': 'bench.fake_mssql (SQLite)',
+        'repeat': args.repeat,
+        'budget_seconds': args.budget,
+        'sizes': {}
+    }
+    for slots in sizes:
+        results['sizes'][str(slots)] = run_size(slots, args)
+        # Written after every size so a long run leaves partial results behind
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f'Results written to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# Gunicorn configuration for the production container:
+#   gunicorn -c gunicorn.conf.py app.main:app
+#
+# Each worker process imports the app itself (no preload), so it gets its own
+# MSSQL connection pool, background refresh threads and in-memory caches.
+# With WEB_PRELOAD=1 the app is imported once in the master instead, without
+# starting any threads or pools, and post_fork starts them in every worker.
+import os
+import sys
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+
+# Threaded workers: blocking pymssql calls release the GIL, so a slow export
+# or query only ties up one thread. MSSQL connections per container are at
+# most workers x the manager's pool size (10).
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_WORKERS', 2))
+threads = int(os.environ.get('WEB_THREADS', 8))
+
+# Large Excel/CSV exports and imports can take a while
+timeout = int(os.environ.get('WEB_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+preload_app = os.environ.get('WEB_PRELOAD', '').lower() in ('1', 'true')
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Give a worker that inherited a preloaded app its own pool, locks and threads"""
+    main = sys.modules.get('app.main')
+    if main is not None:
+        main.after_fork()